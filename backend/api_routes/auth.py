@@ -0,0 +1,16 @@
+"""
+Shared route dependencies for admin-only endpoints.
+"""
+import secrets
+from fastapi import Header, HTTPException, status
+
+from config import settings
+
+
+async def require_admin(x_admin_key: str = Header(None)):
+    """Allow only requests carrying the API secret key in X-Admin-Key."""
+    if x_admin_key is None or not secrets.compare_digest(x_admin_key, settings.api_secret_key):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin key required"
+        )
@@ -0,0 +1,46 @@
+"""
+Debug API routes - on-demand profiling (admin).
+"""
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from config import settings
+from api_routes.auth import require_admin
+from services.profiling import StackSampler, save_profile
+
+router = APIRouter()
+
+
+@router.post("/profile", dependencies=[Depends(require_admin)])
+async def profile_event_loop(
+    seconds: float = Query(5.0, gt=0, le=60),
+    interval_ms: float = Query(None, gt=0, le=100)
+):
+    """Sample this worker's event loop for a while and save a flamegraph-ready profile."""
+    interval = interval_ms / 1000 if interval_ms else settings.profile_sample_interval
+    sampler = StackSampler(interval)
+    if not sampler.start():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running"
+        )
+    
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        stacks = sampler.stop()
+    
+    try:
+        path = await asyncio.to_thread(save_profile, stacks, settings.profile_output_dir, f"on-demand {seconds:g}s")
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save profile: {str(e)}"
+        )
+    
+    return {
+        "path": path,
+        "duration_s": round(sampler.duration, 3),
+        "samples": sum(stacks.values()),
+        "top_functions": sampler.top_functions()
+    }
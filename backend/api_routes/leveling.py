@@ -1,72 +1,80 @@
 """
 Leveling and XP API routes.
 """
-from fastapi import APIRouter, HTTPException, status
-from typing import List
-from datetime import datetime
+import asyncio
+from datetime import date, datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from typing import Dict, List, Tuple
 
-from models.xp import XPEvent, XPGainResponse, LevelUpEvent
-from models.user import LeaderboardEntry, UserResponse
+from models.xp import (
+    XPEvent, XPGainResponse, LevelUpEvent,
+    XPBatchRequest, XPBatchResponse, XPBatchResult, XPBatchUnknownUser,
+    XPDailyTotal, GuildXPDailyTotal
+)
+from models.user import LeaderboardEntry, UserResponse, RankResponse, GLOBAL_GUILD_ID
+from models.profile import LevelingProfile, LevelingProfileResponse
+from api_routes.auth import require_admin
+from config import settings
+from services.cluster import on_peer, publish_to_peers
 from services.database import db
-from services.leveling_service import leveling_service
+from services.level_table import LevelTable
+from services.leveling_profiles import DEFAULT_PROFILE, compile_profile, leveling_profiles
+from services.rank_index import rank_indexes
+from services.standings import invalidate_leaderboard, leaderboard_cache, update_standing
+from services.tool_catalog import grant_level_unlocks
+from services.metrics import count_xp_events
+from services.realtime import notify_xp_award, send_emits, xp_award_emits
+from jobs.recalculate_levels import recalculate_levels
 
 router = APIRouter()
 
+leaderboard_adapter = TypeAdapter(List[LeaderboardEntry])
+
+# Running level recalculations by guild, so a newer profile cancels an older run
+recalculation_tasks: Dict[str, asyncio.Task] = {}
+
 
 @router.post("/xp", response_model=XPGainResponse)
-async def add_xp(discord_id: str, event_type: str, xp_amount: int = None, channel_id: str = None):
+async def add_xp(
+    discord_id: str,
+    event_type: str,
+    xp_amount: int = None,
+    channel_id: str = None,
+    guild_id: str = GLOBAL_GUILD_ID
+):
     """Add XP to a user and check for level up."""
     try:
-        # Get user
-        user_result = db.client.table('users').select('*').eq('discord_id', discord_id).execute()
+        # Calculate XP amount if not provided
+        if xp_amount is None:
+            xp_amount = leveling_profiles.get(guild_id).xp_amount(event_type)
+        
+        # Update XP, level and tier and log the event in one round trip
+        award = await db.award_xp(discord_id, guild_id, event_type, xp_amount, channel_id)
         
-        if not user_result.data:
+        if not award:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"User with Discord ID {discord_id} not found"
             )
         
-        user = user_result.data[0]
-        old_xp = user['xp']
-        old_level = user['level']
-        
-        # Calculate XP amount if not provided
-        if xp_amount is None:
-            xp_amount = leveling_service.XP_AMOUNTS.get(event_type, 0)
-        
-        # Add XP
-        new_xp = old_xp + xp_amount
-        
-        # Check for level up
-        leveled_up, _, new_level = leveling_service.check_level_up(old_xp, new_xp)
+        count_xp_events((event_type,))
         
-        # Update tier if leveled up
-        new_tier = leveling_service.get_tier_from_level(new_level) if leveled_up else user['rank_tier']
+        new_xp = award['new_xp']
+        new_level = award['new_level']
+        leveled_up = new_level > award['old_level']
+        update_standing(guild_id, discord_id, new_xp)
         
-        # Update user in database
-        update_data = {
-            'xp': new_xp,
-            'level': new_level,
-            'rank_tier': new_tier,
-            'last_active': datetime.utcnow().isoformat()
-        }
+        unlocked = await grant_level_unlocks([award]) if leveled_up else {}
+        unlocked_tools = unlocked.get(award['user_id'], [])
+        if unlocked_tools:
+            invalidate_leaderboard(guild_id)
         
-        db.client.table('users').update(update_data).eq('discord_id', discord_id).execute()
-        
-        # Log XP event
-        xp_event = {
-            'user_id': user['id'],
-            'event_type': event_type,
-            'xp_amount': xp_amount,
-            'channel_id': channel_id,
-            'created_at': datetime.utcnow().isoformat()
-        }
-        db.client.table('xp_events').insert(xp_event).execute()
-        
-        # TODO: Check for newly unlocked tools
-        unlocked_tools = []
-        
-        # TODO: Emit Socket.IO event if leveled up
+        await notify_xp_award(
+            guild_id, discord_id, xp_amount, new_xp,
+            award['old_level'], new_level, unlocked_tools
+        )
         
         return XPGainResponse(
             success=True,
@@ -87,22 +95,196 @@ async def add_xp(discord_id: str, event_type: str, xp_amount: int = None, channe
         )
 
 
+@router.post("/xp/batch", response_model=XPBatchResponse)
+async def add_xp_batch(batch: XPBatchRequest):
+    """Add XP for many events at once and report level ups per user."""
+    try:
+        if not batch.events:
+            return XPBatchResponse(success=True)
+        
+        # Build parallel arrays for the set-based award
+        guild_ids = []
+        discord_ids = []
+        event_types = []
+        xp_amounts = []
+        channel_ids = []
+        for event in batch.events:
+            xp_amount = event.xp_amount
+            if xp_amount is None:
+                xp_amount = leveling_profiles.get(event.guild_id).xp_amount(event.event_type)
+            guild_ids.append(event.guild_id)
+            discord_ids.append(event.discord_id)
+            event_types.append(event.event_type)
+            xp_amounts.append(xp_amount)
+            channel_ids.append(event.channel_id)
+        
+        awards = await db.award_xp_batch(guild_ids, discord_ids, event_types, xp_amounts, channel_ids)
+        
+        unlocked = await grant_level_unlocks(
+            award for award in awards if award['new_level'] > award['old_level']
+        )
+        for guild_id in {award['guild_id'] for award in awards if award['user_id'] in unlocked}:
+            invalidate_leaderboard(guild_id)
+        
+        results = []
+        emits = []
+        known_users = set()
+        for award in awards:
+            known_users.add((award['guild_id'], award['discord_id']))
+            update_standing(award['guild_id'], award['discord_id'], award['new_xp'])
+            leveled_up = award['new_level'] > award['old_level']
+            unlocked_tools = unlocked.get(award['user_id'], [])
+            emits.extend(xp_award_emits(
+                award['guild_id'], award['discord_id'], award['xp_gained'], award['new_xp'],
+                award['old_level'], award['new_level'], unlocked_tools
+            ))
+            results.append(XPBatchResult(
+                discord_id=award['discord_id'],
+                guild_id=award['guild_id'],
+                xp_gained=award['xp_gained'],
+                total_xp=award['new_xp'],
+                current_level=award['new_level'],
+                leveled_up=leveled_up,
+                new_level=award['new_level'] if leveled_up else None,
+                unlocked_tools=unlocked_tools
+            ))
+        
+        # One publish for the whole batch when workers share a queue
+        await send_emits(emits)
+        
+        event_users = list(zip(guild_ids, discord_ids))
+        unknown_users = [
+            XPBatchUnknownUser(guild_id=guild_id, discord_id=discord_id)
+            for guild_id, discord_id in sorted(set(event_users) - known_users)
+        ]
+        processed_events = sum(1 for member in event_users if member in known_users)
+        count_xp_events(
+            event_type for member, event_type in zip(event_users, event_types) if member in known_users
+        )
+        
+        return XPBatchResponse(
+            success=True,
+            processed_events=processed_events,
+            results=results,
+            unknown_users=unknown_users
+        )
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to add XP batch: {str(e)}"
+        )
+
+
 @router.get("/leaderboard", response_model=List[LeaderboardEntry])
-async def get_leaderboard(limit: int = 10):
+async def get_leaderboard(guild_id: str = GLOBAL_GUILD_ID, limit: int = Query(10, ge=1, le=100)):
     """Get server leaderboard by XP."""
     try:
-        result = db.client.table('users').select('*').order('xp', desc=True).limit(limit).execute()
+        # Serve the rendered page from cache when nothing visible has changed
+        body = leaderboard_cache.get(guild_id, limit)
+        if body is not None:
+            return Response(content=body, media_type="application/json")
+        
+        generation = leaderboard_cache.generation(guild_id)
+        rows = await db.get_leaderboard(guild_id, limit)
+        
+        leaderboard = []
+        for rank, user_dict in enumerate(rows, start=1):
+            next_level_xp = leveling_profiles.get(guild_id).next_level_xp(
+                user_dict['xp'],
+                user_dict['level']
+            )
+            
+            user_response = UserResponse(
+                **user_dict,
+                next_level_xp=next_level_xp
+            )
+            
+            leaderboard.append(LeaderboardEntry(
+                rank=rank,
+                user=user_response,
+                xp=user_dict['xp'],
+                level=user_dict['level']
+            ))
+        
+        body = leaderboard_adapter.dump_json(leaderboard)
+        leaderboard_cache.put(
+            guild_id,
+            limit,
+            body,
+            {row['discord_id']: row['xp'] for row in rows},
+            generation
+        )
+        
+        return Response(content=body, media_type="application/json")
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get leaderboard: {str(e)}"
+        )
+
+
+@router.get("/rank/{discord_id}", response_model=RankResponse)
+async def get_rank(discord_id: str, guild_id: str = GLOBAL_GUILD_ID):
+    """Get a user's leaderboard position."""
+    index = rank_indexes.get(guild_id)
+    rank = index.rank(discord_id) if index else None
+    
+    if rank is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with Discord ID {discord_id} not found"
+        )
+    
+    xp = index.get_xp(discord_id)
+    profile = leveling_profiles.get(guild_id)
+    level = profile.level_table.level_for(xp)
+    return RankResponse(
+        discord_id=discord_id,
+        guild_id=guild_id,
+        rank=rank,
+        total_users=len(index),
+        xp=xp,
+        level=level,
+        rank_tier=profile.level_table.tier_for(level),
+        next_level_xp=profile.next_level_xp(xp, level)
+    )
+
+
+@router.get("/leaderboard/around/{discord_id}", response_model=List[LeaderboardEntry])
+async def get_leaderboard_around(
+    discord_id: str,
+    guild_id: str = GLOBAL_GUILD_ID,
+    radius: int = Query(5, ge=0, le=50)
+):
+    """Get the users ranked directly above and below a user."""
+    try:
+        index = rank_indexes.get(guild_id)
+        window = index.around(discord_id, radius) if index else []
+        
+        if not window:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User with Discord ID {discord_id} not found"
+            )
+        
+        rows = await db.get_users_by_discord_ids(guild_id, [entry_id for _, entry_id, _ in window])
+        users_by_id = {row['discord_id']: row for row in rows}
         
         leaderboard = []
-        for rank, user_dict in enumerate(result.data, start=1):
-            next_level_xp = leveling_service.get_xp_for_next_level(
+        for rank, entry_id, xp in window:
+            user_dict = users_by_id.get(entry_id)
+            if user_dict is None:
+                continue
+            
+            next_level_xp = leveling_profiles.get(guild_id).next_level_xp(
                 user_dict['xp'],
                 user_dict['level']
             )
             
             user_response = UserResponse(
                 **user_dict,
-                unlocked_tools_count=0,
                 next_level_xp=next_level_xp
             )
             
@@ -115,6 +297,8 @@ async def get_leaderboard(limit: int = 10):
         
         return leaderboard
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -123,24 +307,22 @@ async def get_leaderboard(limit: int = 10):
 
 
 @router.get("/xp-history/{discord_id}", response_model=List[XPEvent])
-async def get_xp_history(discord_id: str, limit: int = 50):
+async def get_xp_history(discord_id: str, guild_id: str = GLOBAL_GUILD_ID, limit: int = 50):
     """Get XP history for a user."""
     try:
         # Get user ID
-        user_result = db.client.table('users').select('id').eq('discord_id', discord_id).execute()
+        user = await db.get_user(discord_id, guild_id)
         
-        if not user_result.data:
+        if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"User with Discord ID {discord_id} not found"
             )
         
-        user_id = user_result.data[0]['id']
-        
         # Get XP events
-        events_result = db.client.table('xp_events').select('*').eq('user_id', user_id).order('created_at', desc=True).limit(limit).execute()
+        events = await db.get_xp_history(guild_id, user['id'], limit)
         
-        return [XPEvent(**event) for event in events_result.data]
+        return [XPEvent(**event) for event in events]
     
     except HTTPException:
         raise
@@ -150,3 +332,187 @@ async def get_xp_history(discord_id: str, limit: int = 50):
             detail=f"Failed to get XP history: {str(e)}"
         )
 
+
+def daily_range(days: int) -> Tuple[date, date]:
+    """
+    UTC day range for the daily XP endpoints.
+
+    Args:
+        days: Number of days ending today, inclusive
+
+    Returns:
+        (first day, today)
+    """
+    if days < 1 or days > settings.xp_daily_totals_max_days:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"days must be between 1 and {settings.xp_daily_totals_max_days}"
+        )
+    today = datetime.utcnow().date()
+    return today - timedelta(days=days - 1), today
+
+
+@router.get("/xp-history/{discord_id}/daily", response_model=List[XPDailyTotal])
+async def get_xp_history_daily(discord_id: str, guild_id: str = GLOBAL_GUILD_ID, days: int = 30):
+    """Get a user's XP per day and event type, including days past raw event retention."""
+    try:
+        start_day, end_day = daily_range(days)
+        user = await db.get_user(discord_id, guild_id)
+        
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User with Discord ID {discord_id} not found"
+            )
+        
+        totals = await db.get_xp_daily_totals(guild_id, user['id'], start_day, end_day)
+        
+        return [XPDailyTotal(**total) for total in totals]
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get daily XP history: {str(e)}"
+        )
+
+
+@router.get("/analytics/{guild_id}/daily", response_model=List[GuildXPDailyTotal])
+async def get_guild_xp_daily(guild_id: str, days: int = 30):
+    """Get a guild's XP and active members per day and event type."""
+    try:
+        start_day, end_day = daily_range(days)
+        totals = await db.get_guild_xp_daily_totals(guild_id, start_day, end_day)
+        
+        return [GuildXPDailyTotal(**total) for total in totals]
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get guild XP analytics: {str(e)}"
+        )
+
+
+async def recalculate_guild_levels(guild_id: str, table: LevelTable):
+    """Rewrite a guild's stored levels and tiers after its profile changed."""
+    try:
+        progress = await recalculate_levels(table=table, guild_id=guild_id)
+        invalidate_leaderboard(guild_id)
+        print(f"[Profiles] Recalculated guild {guild_id}: {progress.scanned} scanned, {progress.updated} updated")
+    except asyncio.CancelledError:
+        pass
+    except Exception as e:
+        print(f"[Profiles] Recalculation for guild {guild_id} failed: {e}")
+    finally:
+        if recalculation_tasks.get(guild_id) is asyncio.current_task():
+            del recalculation_tasks[guild_id]
+
+
+def start_guild_recalculation(guild_id: str, table: LevelTable):
+    """Recalculate a guild in the background, replacing any run still in progress."""
+    previous = recalculation_tasks.get(guild_id)
+    if previous is not None:
+        previous.cancel()
+    recalculation_tasks[guild_id] = asyncio.create_task(recalculate_guild_levels(guild_id, table))
+
+
+@on_peer("leveling_profile")
+async def apply_peer_leveling_profile(data):
+    """Swap in a profile another worker set, or drop one it deleted."""
+    guild_id, profile = data
+    if profile is None:
+        leveling_profiles.remove(guild_id)
+    else:
+        leveling_profiles.set(compile_profile(guild_id, LevelingProfile(**profile)))
+
+
+@router.get("/profiles", response_model=List[LevelingProfileResponse])
+async def list_leveling_profiles():
+    """List every guild that has its own leveling profile."""
+    try:
+        rows = await db.get_leveling_profiles()
+        
+        return [
+            LevelingProfileResponse(**row['profile'], guild_id=row['guild_id'], updated_at=row['updated_at'])
+            for row in rows
+        ]
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to list leveling profiles: {str(e)}"
+        )
+
+
+@router.get("/profiles/{guild_id}", response_model=LevelingProfileResponse)
+async def get_leveling_profile(guild_id: str):
+    """Get a guild's leveling profile (the default profile if it has none)."""
+    compiled = leveling_profiles.get(guild_id)
+    return LevelingProfileResponse(**compiled.profile.model_dump(), guild_id=guild_id)
+
+
+@router.put(
+    "/profiles/{guild_id}",
+    response_model=LevelingProfileResponse,
+    dependencies=[Depends(require_admin)]
+)
+async def set_leveling_profile(guild_id: str, profile: LevelingProfile):
+    """
+    Create or replace a guild's leveling profile.
+    
+    The profile is compiled and swapped in immediately; stored levels and
+    tiers for the guild are recalculated in the background.
+    """
+    try:
+        compiled = compile_profile(guild_id, profile)
+        
+        row = await db.upsert_leveling_profile(
+            guild_id,
+            profile.model_dump(mode="json"),
+            compiled.level_table.thresholds,
+            compiled.level_table.tier_starts,
+            compiled.level_table.tier_names
+        )
+        leveling_profiles.set(compiled)
+        await publish_to_peers("leveling_profile", (guild_id, profile.model_dump(mode="json")))
+        start_guild_recalculation(guild_id, compiled.level_table)
+        
+        return LevelingProfileResponse(**profile.model_dump(), guild_id=guild_id, updated_at=row['updated_at'])
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to set leveling profile: {str(e)}"
+        )
+
+
+@router.delete(
+    "/profiles/{guild_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(require_admin)]
+)
+async def delete_leveling_profile(guild_id: str):
+    """Remove a guild's leveling profile so it falls back to the default."""
+    try:
+        deleted = await db.delete_leveling_profile(guild_id)
+        
+        if not deleted:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Guild {guild_id} has no leveling profile"
+            )
+        
+        leveling_profiles.remove(guild_id)
+        await publish_to_peers("leveling_profile", (guild_id, None))
+        start_guild_recalculation(guild_id, DEFAULT_PROFILE.level_table)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to delete leveling profile: {str(e)}"
+        )
@@ -5,9 +5,12 @@ from fastapi import APIRouter, HTTPException, status
 from typing import List
 from uuid import UUID
 
-from models.tool import Tool, ToolCreate, ToolResponse
+from models.tool import Tool, ToolCreate, ToolUpdate, ToolResponse
+from models.user import GLOBAL_GUILD_ID
 from services.database import db
-from services.leveling_service import leveling_service
+from services.tool_catalog import tool_catalog, reload_tool_catalog_everywhere
+from services.realtime import notify_tools_unlocked
+from services.standings import invalidate_leaderboard
 
 router = APIRouter()
 
@@ -16,10 +19,10 @@ router = APIRouter()
 async def create_tool(tool_data: ToolCreate):
     """Create a new tool."""
     try:
-        tool_dict = tool_data.dict()
-        result = db.client.table('tools').insert(tool_dict).execute()
+        tool_dict = await db.create_tool(tool_data.dict())
+        await reload_tool_catalog_everywhere()
         
-        return Tool(**result.data[0])
+        return Tool(**tool_dict)
     
     except Exception as e:
         raise HTTPException(
@@ -28,21 +31,44 @@ async def create_tool(tool_data: ToolCreate):
         )
 
 
-@router.get("/", response_model=List[Tool])
-async def list_tools(tier: str = None, enabled_only: bool = True):
-    """List all tools, optionally filtered by tier."""
+@router.patch("/{tool_id}", response_model=Tool)
+async def update_tool(tool_id: UUID, tool_update: ToolUpdate):
+    """Update a tool."""
     try:
-        query = db.client.table('tools').select('*')
+        update_data = {k: v for k, v in tool_update.dict().items() if v is not None}
+        
+        if not update_data:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No fields to update"
+            )
         
-        if tier:
-            query = query.eq('tier', tier)
+        tool_dict = await db.update_tool(tool_id, update_data)
         
-        if enabled_only:
-            query = query.eq('enabled', True)
+        if not tool_dict:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Tool with ID {tool_id} not found"
+            )
         
-        result = query.order('required_level').execute()
+        await reload_tool_catalog_everywhere()
         
-        return [Tool(**tool) for tool in result.data]
+        return Tool(**tool_dict)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update tool: {str(e)}"
+        )
+
+
+@router.get("/", response_model=List[Tool])
+async def list_tools(tier: str = None, enabled_only: bool = True):
+    """List all tools, optionally filtered by tier."""
+    try:
+        return tool_catalog.list(tier=tier, enabled_only=enabled_only)
     
     except Exception as e:
         raise HTTPException(
@@ -52,37 +78,34 @@ async def list_tools(tier: str = None, enabled_only: bool = True):
 
 
 @router.get("/user/{discord_id}", response_model=List[ToolResponse])
-async def get_user_tools(discord_id: str):
+async def get_user_tools(discord_id: str, guild_id: str = GLOBAL_GUILD_ID):
     """Get all tools with user's access status."""
     try:
-        # Get user
-        user_result = db.client.table('users').select('*').eq('discord_id', discord_id).execute()
+        # Get user and their unlocked tools in one query
+        user = await db.get_user_with_tool_access(discord_id, guild_id)
         
-        if not user_result.data:
+        if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"User with Discord ID {discord_id} not found"
             )
         
-        user = user_result.data[0]
         user_level = user['level']
-        
-        # Get all tools
-        tools_result = db.client.table('tools').select('*').eq('enabled', True).order('required_level').execute()
-        
-        # Get user's unlocked tools
-        access_result = db.client.table('user_tool_access').select('*').eq('user_id', user['id']).execute()
-        unlocked_tool_ids = {access['tool_id'] for access in access_result.data}
-        access_map = {access['tool_id']: access for access in access_result.data}
+        access_map = {
+            tool_id: {'unlocked_at': unlocked_at, 'usage_count': usage_count}
+            for tool_id, unlocked_at, usage_count in zip(
+                user['access_tool_ids'],
+                user['access_unlocked_at'],
+                user['access_usage_counts']
+            )
+        }
         
         tool_responses = []
-        for tool_dict in tools_result.data:
-            tool = Tool(**tool_dict)
-            tool_id = str(tool.id)
-            is_unlocked = tool_id in unlocked_tool_ids
+        for tool in tool_catalog.list():
+            is_unlocked = tool.id in access_map
             can_unlock = user_level >= tool.required_level and not is_unlocked
             
-            access_info = access_map.get(tool_id, {})
+            access_info = access_map.get(tool.id, {})
             
             tool_responses.append(ToolResponse(
                 tool=tool,
@@ -104,54 +127,44 @@ async def get_user_tools(discord_id: str):
 
 
 @router.post("/unlock/{discord_id}/{tool_id}", response_model=dict)
-async def unlock_tool(discord_id: str, tool_id: UUID):
+async def unlock_tool(discord_id: str, tool_id: UUID, guild_id: str = GLOBAL_GUILD_ID):
     """Unlock a tool for a user."""
     try:
         # Get user
-        user_result = db.client.table('users').select('*').eq('discord_id', discord_id).execute()
+        user = await db.get_user(discord_id, guild_id)
         
-        if not user_result.data:
+        if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"User with Discord ID {discord_id} not found"
             )
         
-        user = user_result.data[0]
-        
         # Get tool
-        tool_result = db.client.table('tools').select('*').eq('id', str(tool_id)).execute()
+        tool = tool_catalog.get(tool_id)
         
-        if not tool_result.data:
+        if not tool:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Tool with ID {tool_id} not found"
             )
         
-        tool = tool_result.data[0]
-        
         # Check if user has required level
-        if user['level'] < tool['required_level']:
+        if user['level'] < tool.required_level:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"User level {user['level']} is below required level {tool['required_level']}"
+                detail=f"User level {user['level']} is below required level {tool.required_level}"
             )
         
-        # Check if already unlocked
-        existing = db.client.table('user_tool_access').select('*').eq('user_id', user['id']).eq('tool_id', str(tool_id)).execute()
+        # Unlock tool (no-op if already unlocked)
+        unlocked = await db.grant_tool_access(user['id'], tool_id)
         
-        if existing.data:
+        if not unlocked:
             return {"message": "Tool already unlocked", "already_unlocked": True}
         
-        # Unlock tool
-        access_data = {
-            'user_id': user['id'],
-            'tool_id': str(tool_id),
-            'usage_count': 0
-        }
-        
-        db.client.table('user_tool_access').insert(access_data).execute()
+        invalidate_leaderboard(guild_id)
+        await notify_tools_unlocked(guild_id, discord_id, [tool.name])
         
-        return {"message": "Tool unlocked successfully", "tool_name": tool['name']}
+        return {"message": "Tool unlocked successfully", "tool_name": tool.name}
     
     except HTTPException:
         raise
@@ -1,13 +1,16 @@
 """
 User API routes.
 """
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from typing import List
 from uuid import UUID
 
-from models.user import User, UserCreate, UserUpdate, UserResponse
+from models.user import User, UserCreate, UserUpdate, UserResponse, SocketTokenResponse, GLOBAL_GUILD_ID
+from api_routes.auth import require_admin
 from services.database import db
-from services.leveling_service import leveling_service
+from services.leveling_profiles import leveling_profiles
+from services.standings import update_standing
+from services.socket_auth import create_socket_token
 
 router = APIRouter()
 
@@ -16,42 +19,22 @@ router = APIRouter()
 async def create_user(user_data: UserCreate):
     """Create a new user or return existing user."""
     try:
-        # Check if user already exists
-        existing = db.client.table('users').select('*').eq('discord_id', user_data.discord_id).execute()
-        
-        if existing.data:
-            # User exists, update their info
-            user = existing.data[0]
-            updated = db.client.table('users').update({
-                'username': user_data.username,
-                'avatar_url': user_data.avatar_url
-            }).eq('discord_id', user_data.discord_id).execute()
-            
-            user_dict = updated.data[0]
-        else:
-            # Create new user
-            new_user = {
-                'discord_id': user_data.discord_id,
-                'username': user_data.username,
-                'avatar_url': user_data.avatar_url,
-                'xp': 0,
-                'level': 1,
-                'rank_tier': 'Basic',
-                'streak_days': 0
-            }
-            
-            result = db.client.table('users').insert(new_user).execute()
-            user_dict = result.data[0]
+        user_dict = await db.upsert_user(
+            user_data.discord_id,
+            user_data.guild_id,
+            user_data.username,
+            user_data.avatar_url
+        )
+        update_standing(user_dict['guild_id'], user_dict['discord_id'], user_dict['xp'])
         
         # Calculate next level XP
-        next_level_xp = leveling_service.get_xp_for_next_level(
+        next_level_xp = leveling_profiles.get(user_dict['guild_id']).next_level_xp(
             user_dict['xp'],
             user_dict['level']
         )
         
         return UserResponse(
             **user_dict,
-            unlocked_tools_count=0,  # TODO: Query from user_tool_access
             next_level_xp=next_level_xp
         )
     
@@ -63,28 +46,25 @@ async def create_user(user_data: UserCreate):
 
 
 @router.get("/{discord_id}", response_model=UserResponse)
-async def get_user(discord_id: str):
+async def get_user(discord_id: str, guild_id: str = GLOBAL_GUILD_ID):
     """Get user by Discord ID."""
     try:
-        result = db.client.table('users').select('*').eq('discord_id', discord_id).execute()
+        user_dict = await db.get_user(discord_id, guild_id)
         
-        if not result.data:
+        if not user_dict:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"User with Discord ID {discord_id} not found"
             )
         
-        user_dict = result.data[0]
-        
         # Calculate next level XP
-        next_level_xp = leveling_service.get_xp_for_next_level(
+        next_level_xp = leveling_profiles.get(user_dict['guild_id']).next_level_xp(
             user_dict['xp'],
             user_dict['level']
         )
         
         return UserResponse(
             **user_dict,
-            unlocked_tools_count=0,  # TODO: Query from user_tool_access
             next_level_xp=next_level_xp
         )
     
@@ -98,7 +78,7 @@ async def get_user(discord_id: str):
 
 
 @router.patch("/{discord_id}", response_model=UserResponse)
-async def update_user(discord_id: str, user_update: UserUpdate):
+async def update_user(discord_id: str, user_update: UserUpdate, guild_id: str = GLOBAL_GUILD_ID):
     """Update user information."""
     try:
         # Build update dict (only include non-None values)
@@ -110,24 +90,23 @@ async def update_user(discord_id: str, user_update: UserUpdate):
                 detail="No fields to update"
             )
         
-        result = db.client.table('users').update(update_data).eq('discord_id', discord_id).execute()
+        user_dict = await db.update_user(discord_id, guild_id, update_data)
         
-        if not result.data:
+        if not user_dict:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"User with Discord ID {discord_id} not found"
             )
         
-        user_dict = result.data[0]
+        update_standing(guild_id, discord_id, user_dict['xp'])
         
-        next_level_xp = leveling_service.get_xp_for_next_level(
+        next_level_xp = leveling_profiles.get(user_dict['guild_id']).next_level_xp(
             user_dict['xp'],
             user_dict['level']
         )
         
         return UserResponse(
             **user_dict,
-            unlocked_tools_count=0,
             next_level_xp=next_level_xp
         )
     
@@ -141,20 +120,19 @@ async def update_user(discord_id: str, user_update: UserUpdate):
 
 
 @router.get("/", response_model=List[UserResponse])
-async def list_users(limit: int = 100, offset: int = 0):
-    """List all users with pagination."""
+async def list_users(guild_id: str = GLOBAL_GUILD_ID, limit: int = 100, offset: int = 0):
+    """List a guild's users with pagination."""
     try:
-        result = db.client.table('users').select('*').range(offset, offset + limit - 1).execute()
+        rows = await db.list_users(guild_id, limit, offset)
         
         users = []
-        for user_dict in result.data:
-            next_level_xp = leveling_service.get_xp_for_next_level(
+        for user_dict in rows:
+            next_level_xp = leveling_profiles.get(user_dict['guild_id']).next_level_xp(
                 user_dict['xp'],
                 user_dict['level']
             )
             users.append(UserResponse(
                 **user_dict,
-                unlocked_tools_count=0,
                 next_level_xp=next_level_xp
             ))
         
@@ -166,3 +144,18 @@ async def list_users(limit: int = 100, offset: int = 0):
             detail=f"Failed to list users: {str(e)}"
         )
 
+
+@router.post(
+    "/{discord_id}/socket-token",
+    response_model=SocketTokenResponse,
+    dependencies=[Depends(require_admin)]
+)
+async def issue_socket_token(discord_id: str, guild_ids: List[str] = Query([GLOBAL_GUILD_ID])):
+    """Issue a Socket.IO token for a user's rooms (admin; called by the login flow)."""
+    issued = create_socket_token(discord_id, guild_ids)
+    return SocketTokenResponse(
+        token=issued["token"],
+        discord_id=discord_id,
+        guilds=guild_ids,
+        expires_at=issued["expires_at"]
+    )
@@ -0,0 +1,4 @@
+"""
+Benchmark scripts for the backend API and Discord bot.
+Run from the backend directory, e.g. ``python -m benchmarks.api_latency``.
+"""
@@ -0,0 +1,122 @@
+"""
+Concurrent latency benchmark for the API server.
+
+Fires a fixed number of GET requests at a running server with N requests
+in flight and reports throughput and p50/p95/p99 latency per endpoint.
+Used to compare the event loop's behaviour before and after a change:
+
+    # against the old build
+    python -m benchmarks.api_latency --output before.json
+    # against the new build
+    python -m benchmarks.api_latency --output after.json --compare before.json
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List, Any
+
+import httpx
+
+from benchmarks.common import summarize_latencies, write_results, load_results, print_summary
+
+
+DEFAULT_PATHS = [
+    "/api/leveling/leaderboard?limit=10",
+    "/api/users/{discord_id}",
+    "/api/tools/user/{discord_id}",
+]
+
+
+async def run_endpoint(
+    client: httpx.AsyncClient,
+    path: str,
+    total_requests: int,
+    concurrency: int
+) -> Dict[str, Any]:
+    """
+    Send total_requests GETs to one path with `concurrency` requests in flight.
+
+    Returns:
+        Latency summary for the endpoint
+    """
+    latencies: List[float] = []
+    errors = 0
+    remaining = total_requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code >= 500:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize_latencies(latencies, time.perf_counter() - started, errors)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the benchmark for every configured path."""
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    timeout = httpx.Timeout(args.timeout)
+    paths = args.path or DEFAULT_PATHS
+
+    results: Dict[str, Any] = {
+        "base_url": args.base_url,
+        "concurrency": args.concurrency,
+        "requests_per_endpoint": args.requests,
+        "endpoints": {},
+    }
+
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+        for raw_path in paths:
+            path = raw_path.format(discord_id=args.discord_id)
+            # Warm up connections and caches before measuring
+            await run_endpoint(client, path, min(args.requests, args.concurrency), args.concurrency)
+            summary = await run_endpoint(client, path, args.requests, args.concurrency)
+            results["endpoints"][raw_path] = summary
+            print_summary(raw_path, summary)
+
+    return results
+
+
+def compare(before: Dict[str, Any], after: Dict[str, Any]) -> None:
+    """Print p99 before/after for endpoints present in both runs."""
+    print("\np99 comparison")
+    for path, summary in after["endpoints"].items():
+        previous = before["endpoints"].get(path)
+        if not previous:
+            continue
+        old_p99, new_p99 = previous["p99_ms"], summary["p99_ms"]
+        speedup = old_p99 / new_p99 if new_p99 else float("inf")
+        print(f"{path:<40} {old_p99:>9.2f}ms -> {new_p99:>9.2f}ms  ({speedup:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API latency under concurrent load")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--path", action="append", help="Endpoint path (repeatable); {discord_id} is substituted")
+    parser.add_argument("--discord-id", default="123456789")
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per endpoint")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="Write results JSON to this file")
+    parser.add_argument("--compare", help="Previous results JSON to compare p99 against")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    if args.output:
+        write_results(args.output, results)
+    if args.compare:
+        compare(load_results(args.compare), results)
+
+
+if __name__ == "__main__":
+    main()
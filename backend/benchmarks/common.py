@@ -0,0 +1,112 @@
+"""
+Shared helpers for benchmark scripts: latency summaries and result files.
+"""
+import json
+import math
+from typing import Dict, List, Any
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    
+    Args:
+        sorted_values: Values sorted ascending
+        pct: Percentile between 0 and 100
+        
+    Returns:
+        Percentile value (0.0 for an empty list)
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize_latencies(latencies_ms: List[float], elapsed_s: float, errors: int = 0) -> Dict[str, Any]:
+    """
+    Build a latency/throughput summary.
+    
+    Args:
+        latencies_ms: Per-request latencies in milliseconds
+        elapsed_s: Wall-clock duration of the run
+        errors: Number of failed requests
+        
+    Returns:
+        Summary dict with count, throughput and p50/p95/p99/max
+    """
+    values = sorted(latencies_ms)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "elapsed_s": round(elapsed_s, 3),
+        "throughput_rps": round(len(values) / elapsed_s, 1) if elapsed_s > 0 else 0.0,
+        "p50_ms": round(percentile(values, 50), 2),
+        "p95_ms": round(percentile(values, 95), 2),
+        "p99_ms": round(percentile(values, 99), 2),
+        "max_ms": round(values[-1], 2) if values else 0.0,
+    }
+
+
+def write_results(path: str, results: Dict[str, Any]) -> None:
+    """Write benchmark results as pretty JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    """Load benchmark results written by write_results."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_summary(name: str, summary: Dict[str, Any]) -> None:
+    """Print a one-line summary."""
+    print(
+        f"{name:<40} {summary['requests']:>7} req  "
+        f"{summary['throughput_rps']:>9.1f} rps  "
+        f"p50 {summary['p50_ms']:>8.2f}ms  "
+        f"p95 {summary['p95_ms']:>8.2f}ms  "
+        f"p99 {summary['p99_ms']:>8.2f}ms  "
+        f"errors {summary['errors']}"
+    )
+
+
+def find_regressions(
+    baseline: Dict[str, Any],
+    results: Dict[str, Any],
+    max_regression_pct: float,
+    min_delta_ms: float = 1.0
+) -> List[str]:
+    """
+    Compare per-endpoint summaries against a baseline run.
+    
+    An endpoint regresses if its p95 or p99 grows, or its throughput drops,
+    by more than max_regression_pct, or if it starts failing requests.
+    Latency changes smaller than min_delta_ms are treated as noise.
+    
+    Args:
+        baseline: Results JSON of the reference run
+        results: Results JSON of the current run
+        max_regression_pct: Allowed change in percent
+        min_delta_ms: Absolute latency change always tolerated
+        
+    Returns:
+        One message per regression (empty if none)
+    """
+    allowed = max_regression_pct / 100
+    regressions = []
+    for name, summary in results["endpoints"].items():
+        previous = baseline["endpoints"].get(name)
+        if not previous:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            old, new = previous[metric], summary[metric]
+            if new - old > min_delta_ms and new > old * (1 + allowed):
+                regressions.append(f"{name}: {metric} {old:.2f} -> {new:.2f}")
+        old_rps, new_rps = previous["throughput_rps"], summary["throughput_rps"]
+        if old_rps and new_rps < old_rps * (1 - allowed):
+            regressions.append(f"{name}: throughput_rps {old_rps:.1f} -> {new_rps:.1f}")
+        if summary["errors"] and not previous["errors"]:
+            regressions.append(f"{name}: {summary['errors']} errors (baseline had none)")
+    return regressions
@@ -0,0 +1,129 @@
+"""
+Cooldown tracker memory benchmark.
+
+Feeds a stream of distinct members through the message cooldown on a
+simulated clock and samples traced memory as it goes. With expiry the
+tracker only holds members seen within the last cooldown window, so
+memory levels off instead of growing with every new member.
+
+Usage (from the backend directory):
+    python -m benchmarks.cooldown_memory --users 1000000 --rate 1000
+    python -m benchmarks.cooldown_memory --users 1000000 --legacy --output cooldowns.json
+"""
+import argparse
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from bot.cooldowns import CooldownTracker
+from services.leveling_service import LevelingService
+from benchmarks.common import write_results
+
+
+GUILD_ID = "100000000000000000"
+FIRST_USER_ID = 200000000000000000
+
+
+def run_tracker(users: int, rate: int, samples: int) -> Dict[str, Any]:
+    """Drive CooldownTracker with `users` distinct members at `rate` members per simulated second."""
+    tracker = CooldownTracker(LevelingService.COOLDOWNS)
+    step_ms = 1000 / rate
+    checkpoints = _checkpoints(users, samples)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    points: List[Dict[str, int]] = []
+    started = time.perf_counter()
+
+    for i in range(users):
+        tracker.try_acquire("message", (GUILD_ID, str(FIRST_USER_ID + i)), now_ms=int(i * step_ms))
+        if i + 1 in checkpoints:
+            points.append({
+                "users_seen": i + 1,
+                "entries": len(tracker),
+                "traced_bytes": tracemalloc.get_traced_memory()[0] - baseline,
+            })
+
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    return {"samples": points, "peak_bytes": peak, "elapsed_s": round(elapsed, 3)}
+
+
+def run_legacy(users: int, rate: int, samples: int) -> Dict[str, Any]:
+    """Same stream through the old defaultdict(datetime.min) approach."""
+    cooldowns = defaultdict(lambda: datetime.min)
+    cooldown = timedelta(seconds=LevelingService.COOLDOWNS["message"])
+    start = datetime(2024, 1, 1)
+    step = timedelta(seconds=1 / rate)
+    checkpoints = _checkpoints(users, samples)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    points: List[Dict[str, int]] = []
+    started = time.perf_counter()
+
+    for i in range(users):
+        key = (GUILD_ID, str(FIRST_USER_ID + i))
+        now = start + step * i
+        if now - cooldowns[key] >= cooldown:
+            cooldowns[key] = now
+        if i + 1 in checkpoints:
+            points.append({
+                "users_seen": i + 1,
+                "entries": len(cooldowns),
+                "traced_bytes": tracemalloc.get_traced_memory()[0] - baseline,
+            })
+
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    return {"samples": points, "peak_bytes": peak, "elapsed_s": round(elapsed, 3)}
+
+
+def _checkpoints(users: int, samples: int) -> set:
+    """Evenly spaced member counts at which to sample memory."""
+    samples = max(1, min(samples, users))
+    return {users * (k + 1) // samples for k in range(samples)}
+
+
+def _print_run(name: str, run: Dict[str, Any]) -> None:
+    """Print one run's memory samples."""
+    print(f"\n{name} ({run['elapsed_s']}s, peak {run['peak_bytes'] / 2**20:.1f} MiB)")
+    print(f"{'users seen':>12} {'entries':>10} {'traced MiB':>12}")
+    for point in run["samples"]:
+        print(f"{point['users_seen']:>12} {point['entries']:>10} {point['traced_bytes'] / 2**20:>12.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cooldown tracker memory benchmark")
+    parser.add_argument("--users", type=int, default=1_000_000, help="Distinct members to feed through")
+    parser.add_argument("--rate", type=int, default=1000, help="New members per simulated second")
+    parser.add_argument("--samples", type=int, default=10, help="Memory samples to take")
+    parser.add_argument("--legacy", action="store_true", help="Also run the old unbounded defaultdict")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {
+        "users": args.users,
+        "rate_per_s": args.rate,
+        "cooldown_s": LevelingService.COOLDOWNS["message"],
+        "tracker": run_tracker(args.users, args.rate, args.samples),
+    }
+    _print_run("CooldownTracker", results["tracker"])
+
+    if args.legacy:
+        results["legacy"] = run_legacy(args.users, args.rate, args.samples)
+        _print_run("defaultdict (legacy)", results["legacy"])
+
+    if args.output:
+        write_results(args.output, results)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""
+Synthetic gateway firehose for the bot's XP hot path.
+
+Feeds fake messages and voice state updates straight into XPCog's
+listeners (no gateway connection) at a fixed rate or as fast as possible,
+with SyncCog shipping the buffered XP to a local HTTP stub of the API.
+The voice accrual loop is ticked on a compressed interval. Reports
+events/sec, event-loop lag, memory growth and the API request rate, and
+can fail on regressions against a stored baseline:
+
+    python -m benchmarks.gateway_firehose --rate 5000 --users 100000 --output firehose.json
+    python -m benchmarks.gateway_firehose --rate 0 --duration 20 --baseline firehose.json
+
+The fakes only carry the attributes the cogs read, so they are far
+cheaper than real discord.py models; numbers measure the cogs, not
+discord.py's payload parsing.
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import discord
+from aiohttp import web
+from discord.ext import commands
+
+from bot.cogs.sync import SyncCog
+from bot.cogs.xp import XPCog
+from bot.cooldowns import CooldownTracker
+from benchmarks.common import percentile, write_results, load_results
+
+
+FIRST_GUILD_ID = 100000000000000000
+FIRST_USER_ID = 200000000000000000
+FIRST_CHANNEL_ID = 300000000000000000
+
+
+class FakeGuild:
+    __slots__ = ("id", "afk_channel")
+
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.afk_channel = None
+
+
+class FakeChannel:
+    __slots__ = ("id",)
+
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+
+
+class FakeMember:
+    __slots__ = ("id", "guild", "bot", "name")
+
+    def __init__(self, user_id: int, guild: FakeGuild):
+        self.id = user_id
+        self.guild = guild
+        self.bot = False
+        self.name = f"user-{user_id}"
+
+
+class FakeMessage:
+    __slots__ = ("author", "guild", "channel", "content")
+
+    def __init__(self, author: FakeMember, channel: FakeChannel):
+        self.author = author
+        self.guild = author.guild
+        self.channel = channel
+        self.content = "hello"
+
+
+class FakeVoiceState:
+    __slots__ = ("channel", "self_mute", "self_deaf")
+
+    def __init__(self, channel: Optional[FakeChannel] = None, self_mute: bool = False):
+        self.channel = channel
+        self.self_mute = self_mute
+        self.self_deaf = False
+
+
+class APIStub:
+    """Local stand-in for the API endpoints SyncCog calls, counting what it receives."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.requests: Counter = Counter()
+        self.events_received = 0
+        self.app = web.Application()
+        self.app.router.add_post("/api/leveling/xp/batch", self.xp_batch)
+        self.app.router.add_get("/api/leveling/profiles", self.profiles)
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self, port: int):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", port).start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def xp_batch(self, request: web.Request) -> web.Response:
+        self.requests["POST /api/leveling/xp/batch"] += 1
+        events = (await request.json())["events"]
+        self.events_received += len(events)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.json_response({
+            "success": True, "processed_events": len(events), "results": [], "unknown_users": []
+        })
+
+    async def profiles(self, request: web.Request) -> web.Response:
+        self.requests["GET /api/leveling/profiles"] += 1
+        return web.json_response([])
+
+
+def rss_mb() -> float:
+    """Current resident set size in MiB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def monitor_loop_lag(samples: List[float], stop: asyncio.Event, interval: float = 0.01):
+    """Record how late a short sleep wakes up, i.e. how long the loop was blocked."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, (time.perf_counter() - started - interval) * 1000))
+
+
+async def monitor_memory(samples: List[Dict[str, float]], stop: asyncio.Event, started: float, interval: float = 1.0):
+    """Sample RSS once per interval."""
+    while not stop.is_set():
+        samples.append({"t_s": round(time.perf_counter() - started, 1), "rss_mb": round(rss_mb(), 1)})
+        await asyncio.sleep(interval)
+
+
+class Firehose:
+    """Generates guild members and a stream of message/voice events for them."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.rng = random.Random(args.seed)
+        self.voice_share = args.voice_share
+        self.guilds = [FakeGuild(FIRST_GUILD_ID + i) for i in range(args.guilds)]
+        self.text_channels = {
+            guild.id: [FakeChannel(FIRST_CHANNEL_ID + i * 100 + c) for c in range(5)]
+            for i, guild in enumerate(self.guilds)
+        }
+        self.voice_channels = {
+            guild.id: [FakeChannel(FIRST_CHANNEL_ID + i * 100 + 50 + c) for c in range(args.voice_channels)]
+            for i, guild in enumerate(self.guilds)
+        }
+        self.members = [
+            FakeMember(FIRST_USER_ID + i, self.guilds[i % len(self.guilds)]) for i in range(args.users)
+        ]
+        # Member index -> their current voice state
+        self.voice_states: Dict[int, FakeVoiceState] = {}
+        self.counts: Counter = Counter()
+
+    async def send_one(self, cog: XPCog):
+        """Deliver one random event to the cog."""
+        index = self.rng.randrange(len(self.members))
+        member = self.members[index]
+        if self.rng.random() >= self.voice_share:
+            channel = self.rng.choice(self.text_channels[member.guild.id])
+            self.counts["message"] += 1
+            await cog.on_message(FakeMessage(member, channel))
+            return
+
+        before = self.voice_states.get(index, FakeVoiceState())
+        roll = self.rng.random()
+        if before.channel is None or roll < 0.2:
+            after = FakeVoiceState(self.rng.choice(self.voice_channels[member.guild.id]))  # join or move
+        elif roll < 0.5:
+            after = FakeVoiceState(before.channel, not before.self_mute)  # mute toggle
+        else:
+            after = FakeVoiceState()  # leave
+        if after.channel is None:
+            self.voice_states.pop(index, None)
+        else:
+            self.voice_states[index] = after
+        self.counts["voice_state_update"] += 1
+        await cog.on_voice_state_update(member, before, after)
+
+
+async def tick_voice_accrual(cog: XPCog, interval: float, stop: asyncio.Event, ticks: List[float]):
+    """Run the voice accrual body every `interval` seconds, timing each pass."""
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            started = time.perf_counter()
+            await cog.voice_accrual()
+            ticks.append((time.perf_counter() - started) * 1000)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Wire the cogs to the stub, drive the firehose and collect metrics."""
+    stub = APIStub(args.api_latency_ms)
+    await stub.start(args.port)
+
+    bot = commands.Bot(command_prefix="!", intents=discord.Intents.none())
+    # Entering the bot initialises it without logging in; its loops then
+    # sit in wait_until_ready and voice accrual is ticked by hand instead
+    await bot.__aenter__()
+    sync_cog = SyncCog(bot)
+    sync_cog.api_url = f"http://127.0.0.1:{args.port}/api"
+    sync_cog.xp_buffer.flush_interval = args.flush_interval
+    sync_cog.xp_buffer.flush_size = args.flush_size
+    await bot.add_cog(sync_cog)
+    xp_cog = XPCog(bot)
+    if args.no_cooldowns:
+        xp_cog.cooldowns = CooldownTracker({})
+    await bot.add_cog(xp_cog)
+
+    firehose = Firehose(args)
+    lag_samples: List[float] = []
+    memory_samples: List[Dict[str, float]] = []
+    accrual_ticks: List[float] = []
+    stop = asyncio.Event()
+
+    rss_start = rss_mb()
+    started = time.perf_counter()
+    monitors = [
+        asyncio.create_task(monitor_loop_lag(lag_samples, stop)),
+        asyncio.create_task(monitor_memory(memory_samples, stop, started)),
+        asyncio.create_task(tick_voice_accrual(xp_cog, args.voice_interval, stop, accrual_ticks)),
+    ]
+
+    deadline = started + args.duration
+    sent = 0
+    while True:
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        if args.rate > 0:
+            due = int((now - started) * args.rate) - sent
+            if due <= 0:
+                await asyncio.sleep(0.001)
+                continue
+        else:
+            due = 1000
+        for _ in range(due):
+            await firehose.send_one(xp_cog)
+        sent += due
+        # Let the flush loop and monitors run between slices, like gateway reads do
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+
+    state_sizes = {
+        "cooldown_entries": len(xp_cog.cooldowns),
+        "voice_tracked": len(xp_cog.voice_tracker),
+        "buffered_entries": len(sync_cog.xp_buffer),
+    }
+    stop.set()
+    await asyncio.gather(*monitors)
+    rss_end = rss_mb()
+
+    # Unloading drains the XP buffer into the stub
+    await bot.remove_cog("XPCog")
+    await bot.remove_cog("SyncCog")
+    await bot.close()
+    await stub.stop()
+
+    lag = sorted(lag_samples)
+    batches = stub.requests["POST /api/leveling/xp/batch"]
+    results = {
+        "config": {
+            "rate": args.rate, "duration_s": args.duration, "users": args.users, "guilds": args.guilds,
+            "voice_share": args.voice_share, "cooldowns": not args.no_cooldowns,
+            "flush_interval": args.flush_interval, "flush_size": args.flush_size,
+            "api_latency_ms": args.api_latency_ms,
+        },
+        "events": {
+            **dict(firehose.counts),
+            "total": sent,
+            "elapsed_s": round(elapsed, 3),
+            "events_per_s": round(sent / elapsed, 1),
+        },
+        "loop_lag_ms": {
+            "p50": round(percentile(lag, 50), 2),
+            "p95": round(percentile(lag, 95), 2),
+            "p99": round(percentile(lag, 99), 2),
+            "max": round(lag[-1], 2) if lag else 0.0,
+        },
+        "voice_accrual_ms": {
+            "ticks": len(accrual_ticks),
+            "max": round(max(accrual_ticks), 2) if accrual_ticks else 0.0,
+        },
+        "memory": {
+            "rss_start_mb": round(rss_start, 1),
+            "rss_end_mb": round(rss_end, 1),
+            "rss_growth_mb": round(rss_end - rss_start, 1),
+            "samples": memory_samples,
+            **state_sizes,
+        },
+        "api": {
+            "requests": dict(stub.requests),
+            "xp_batches_per_s": round(batches / elapsed, 2),
+            "xp_events_sent": stub.events_received,
+            "xp_events_per_batch": round(stub.events_received / batches, 1) if batches else 0.0,
+        },
+    }
+    return results
+
+
+def print_report(results: Dict[str, Any]):
+    events, lag, memory, api = results["events"], results["loop_lag_ms"], results["memory"], results["api"]
+    print(f"events        {events['total']:>9} in {events['elapsed_s']:.1f}s  ({events['events_per_s']:.0f}/s)  "
+          f"messages {events.get('message', 0)}, voice updates {events.get('voice_state_update', 0)}")
+    print(f"loop lag      p50 {lag['p50']:.2f}ms  p95 {lag['p95']:.2f}ms  p99 {lag['p99']:.2f}ms  max {lag['max']:.2f}ms")
+    print(f"voice accrual {results['voice_accrual_ms']['ticks']} ticks, slowest {results['voice_accrual_ms']['max']:.2f}ms")
+    print(f"memory        {memory['rss_start_mb']:.1f} -> {memory['rss_end_mb']:.1f} MiB  "
+          f"(cooldowns {memory['cooldown_entries']}, in voice {memory['voice_tracked']}, buffered {memory['buffered_entries']})")
+    print(f"api           {api['xp_batches_per_s']:.2f} batches/s, {api['xp_events_sent']} XP entries sent, "
+          f"{api['xp_events_per_batch']:.0f} per batch")
+
+
+def find_regressions(baseline: Dict[str, Any], results: Dict[str, Any], max_regression_pct: float) -> List[str]:
+    """Throughput drops, loop lag growth or memory growth beyond the allowed percentage."""
+    allowed = max_regression_pct / 100
+    regressions = []
+    old_rate, new_rate = baseline["events"]["events_per_s"], results["events"]["events_per_s"]
+    if new_rate < old_rate * (1 - allowed):
+        regressions.append(f"events_per_s {old_rate:.0f} -> {new_rate:.0f}")
+    for metric in ("p95", "p99"):
+        old, new = baseline["loop_lag_ms"][metric], results["loop_lag_ms"][metric]
+        if new - old > 1.0 and new > old * (1 + allowed):
+            regressions.append(f"loop lag {metric} {old:.2f}ms -> {new:.2f}ms")
+    old_growth, new_growth = baseline["memory"]["rss_growth_mb"], results["memory"]["rss_growth_mb"]
+    if new_growth - old_growth > 5.0 and new_growth > old_growth * (1 + allowed):
+        regressions.append(f"rss growth {old_growth:.1f} -> {new_growth:.1f} MiB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic gateway load on XPCog/SyncCog")
+    parser.add_argument("--rate", type=float, default=2000.0, help="Events per second (0 = as fast as possible)")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--guilds", type=int, default=50)
+    parser.add_argument("--voice-channels", type=int, default=5, help="Voice channels per guild")
+    parser.add_argument("--voice-share", type=float, default=0.1, help="Fraction of events that are voice state updates")
+    parser.add_argument("--voice-interval", type=float, default=5.0, help="Seconds between voice accrual ticks")
+    parser.add_argument("--no-cooldowns", action="store_true", help="Disable cooldowns so every message is queued")
+    parser.add_argument("--flush-interval", type=float, default=2.0)
+    parser.add_argument("--flush-size", type=int, default=500)
+    parser.add_argument("--api-latency-ms", type=float, default=5.0, help="Stub API response delay")
+    parser.add_argument("--port", type=int, default=8799, help="Port for the API stub")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write results JSON to this file")
+    parser.add_argument("--baseline", help="Results JSON to check for regressions against")
+    parser.add_argument("--max-regression", type=float, default=20.0)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_report(results)
+
+    if args.output:
+        write_results(args.output, results)
+    if args.baseline:
+        regressions = find_regressions(load_results(args.baseline), results, args.max_regression)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.max_regression:.0f}%:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions over {args.max_regression:.0f}% against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
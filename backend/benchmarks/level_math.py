@@ -0,0 +1,151 @@
+"""
+Level math micro-benchmark.
+
+Compares the original float-quadratic level calculation and linear tier
+scan with the precomputed level table (bisect per value) and the NumPy
+bulk API, and checks that all of them agree. Inputs are random XP totals
+plus every level threshold and its neighbours, where float rounding
+would show up first.
+
+Usage (from the backend directory):
+    python -m benchmarks.level_math
+    python -m benchmarks.level_math --values 1000000 --max-xp 50000000 --output level_math.json
+"""
+import argparse
+import math
+import random
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from services.leveling_service import LevelingService
+from benchmarks.common import write_results
+
+
+def legacy_level_from_xp(xp: int) -> int:
+    """The original quadratic-formula implementation, kept as the baseline."""
+    a = LevelingService.BASE_XP
+    b = LevelingService.COEFFICIENT
+    c = LevelingService.CONSTANT - xp
+    discriminant = b**2 - 4*a*c
+    if discriminant < 0:
+        return 1
+    level = (-b + math.sqrt(discriminant)) / (2 * a)
+    return max(1, int(level))
+
+
+def legacy_tier_from_level(level: int) -> str:
+    """The original linear scan over TIERS, kept as the baseline."""
+    for tier_name, (min_level, max_level) in LevelingService.TIERS.items():
+        if min_level <= level <= max_level:
+            return tier_name
+    return "Master"
+
+
+def exact_level_from_xp(xp: int) -> int:
+    """Reference answer by definition: highest level whose threshold is reached."""
+    level = 1
+    while LevelingService.calculate_xp_for_level(level + 1) <= xp:
+        level += 1
+    return level
+
+
+def build_inputs(values: int, max_xp: int, seed: int) -> List[int]:
+    """Random XP totals plus every threshold up to max_xp and its neighbours."""
+    rng = random.Random(seed)
+    xp_values = [rng.randrange(0, max_xp + 1) for _ in range(values)]
+    level = 1
+    while True:
+        threshold = LevelingService.calculate_xp_for_level(level)
+        if threshold > max_xp:
+            break
+        xp_values.extend((threshold - 1, threshold, threshold + 1))
+        level += 1
+    return xp_values
+
+
+def time_per_value(fn: Callable[[], Any], count: int, repeat: int) -> float:
+    """Best-of-`repeat` nanoseconds per value for a call that processes `count` values."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best / count * 1e9
+
+
+def check_agreement(xp_values: List[int]) -> Dict[str, int]:
+    """Count disagreements between implementations."""
+    table_levels = [LevelingService.calculate_level_from_xp(xp) for xp in xp_values]
+    bulk_levels = LevelingService.levels_for(xp_values).tolist()
+    legacy_levels = [legacy_level_from_xp(xp) for xp in xp_values]
+
+    # The definition-based reference is slow, so check it against a thinned sample
+    step = max(1, len(xp_values) // 20000)
+    reference_mismatches = sum(
+        1 for xp, level in zip(xp_values[::step], table_levels[::step]) if exact_level_from_xp(xp) != level
+    )
+
+    levels = list(range(0, 151))
+    table_tiers = [LevelingService.get_tier_from_level(level) for level in levels[1:]]
+    legacy_tiers = [legacy_tier_from_level(level) for level in levels[1:]]
+    bulk_tiers = LevelingService.tiers_for(levels[1:]).tolist()
+
+    return {
+        "table_vs_reference_sampled": reference_mismatches,
+        "table_vs_bulk": sum(1 for a, b in zip(table_levels, bulk_levels) if a != b),
+        "table_vs_legacy": sum(1 for a, b in zip(table_levels, legacy_levels) if a != b),
+        "tier_table_vs_legacy": sum(1 for a, b in zip(table_tiers, legacy_tiers) if a != b),
+        "tier_table_vs_bulk": sum(1 for a, b in zip(table_tiers, bulk_tiers) if a != b),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Level math micro-benchmark")
+    parser.add_argument("--values", type=int, default=200_000, help="Random XP totals to evaluate")
+    parser.add_argument("--max-xp", type=int, default=10_000_000, help="Upper bound for random XP")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions (best is kept)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    xp_values = build_inputs(args.values, args.max_xp, args.seed)
+    xp_array = np.array(xp_values, dtype=np.int64)
+    levels = LevelingService.levels_for(xp_array)
+    level_list = levels.tolist()
+    count = len(xp_values)
+
+    timings = {
+        "level_legacy_ns": time_per_value(lambda: [legacy_level_from_xp(xp) for xp in xp_values], count, args.repeat),
+        "level_table_ns": time_per_value(
+            lambda: [LevelingService.calculate_level_from_xp(xp) for xp in xp_values], count, args.repeat
+        ),
+        "level_bulk_ns": time_per_value(lambda: LevelingService.levels_for(xp_array), count, args.repeat),
+        "tier_legacy_ns": time_per_value(lambda: [legacy_tier_from_level(lvl) for lvl in level_list], count, args.repeat),
+        "tier_table_ns": time_per_value(
+            lambda: [LevelingService.get_tier_from_level(lvl) for lvl in level_list], count, args.repeat
+        ),
+        "tier_bulk_ns": time_per_value(lambda: LevelingService.tiers_for(levels), count, args.repeat),
+    }
+    mismatches = check_agreement(xp_values)
+
+    print(f"{count} XP values (max {args.max_xp}), best of {args.repeat}")
+    for name, value in timings.items():
+        print(f"  {name:<18} {value:>10.1f} ns/value")
+    print("Mismatches:")
+    for name, value in mismatches.items():
+        print(f"  {name:<28} {value}")
+
+    if args.output:
+        write_results(args.output, {
+            "values": count,
+            "max_xp": args.max_xp,
+            "timings_ns": {name: round(value, 1) for name, value in timings.items()},
+            "mismatches": mismatches,
+        })
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+Load test for the full app (FastAPI + Socket.IO).
+
+Starts `main:socket_app` under uvicorn on the in-memory database backend
+(or targets an already running server with --base-url), seeds a guild of
+members, holds open a set of Socket.IO connections pinging the server, and
+runs a weighted mix of HTTP traffic for a fixed duration. Reports
+throughput and p50/p95/p99 latency per endpoint and can fail the run on
+regressions against a stored baseline:
+
+    python -m benchmarks.load_test --output baseline.json
+    python -m benchmarks.load_test --baseline baseline.json --max-regression 20
+
+The server needs the usual settings (.env or environment); with the
+memory backend DATABASE_URL is not used.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import socketio
+
+from benchmarks.common import (
+    summarize_latencies, write_results, load_results, print_summary, find_regressions
+)
+
+
+# Operation name -> default weight in the traffic mix
+DEFAULT_MIX = {
+    "POST /api/leveling/xp": 30,
+    "POST /api/leveling/xp/batch": 10,
+    "GET /api/leveling/leaderboard": 25,
+    "GET /api/tools/user/{discord_id}": 20,
+    "GET /api/leveling/rank/{discord_id}": 15,
+}
+
+Operation = Callable[[httpx.AsyncClient, random.Random], Awaitable[httpx.Response]]
+
+
+class Recorder:
+    """Collects latencies and errors per operation name."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, name: str, latency_ms: float, failed: bool = False):
+        self.latencies[name].append(latency_ms)
+        if failed:
+            self.errors[name] += 1
+
+    def summaries(self, elapsed_s: float) -> Dict[str, Any]:
+        return {
+            name: summarize_latencies(values, elapsed_s, self.errors[name])
+            for name, values in sorted(self.latencies.items())
+        }
+
+
+def build_operations(args: argparse.Namespace, members: List[str]) -> Dict[str, Operation]:
+    """HTTP operations of the traffic mix, each picking random members."""
+    guild_id = args.guild_id
+
+    async def award_xp(client, rng):
+        return await client.post("/api/leveling/xp", params={
+            "discord_id": rng.choice(members),
+            "event_type": "message",
+            "xp_amount": rng.randint(5, 25),
+            "guild_id": guild_id,
+        })
+
+    async def award_xp_batch(client, rng):
+        events = [
+            {"discord_id": rng.choice(members), "guild_id": guild_id, "event_type": "message"}
+            for _ in range(args.burst_size)
+        ]
+        return await client.post("/api/leveling/xp/batch", json={"events": events})
+
+    async def leaderboard(client, rng):
+        return await client.get("/api/leveling/leaderboard", params={"guild_id": guild_id, "limit": 10})
+
+    async def user_tools(client, rng):
+        return await client.get(f"/api/tools/user/{rng.choice(members)}", params={"guild_id": guild_id})
+
+    async def rank(client, rng):
+        return await client.get(f"/api/leveling/rank/{rng.choice(members)}", params={"guild_id": guild_id})
+
+    return {
+        "POST /api/leveling/xp": award_xp,
+        "POST /api/leveling/xp/batch": award_xp_batch,
+        "GET /api/leveling/leaderboard": leaderboard,
+        "GET /api/tools/user/{discord_id}": user_tools,
+        "GET /api/leveling/rank/{discord_id}": rank,
+    }
+
+
+def parse_mix(raw: Optional[str]) -> Dict[str, int]:
+    """Parse "name=weight,..." overrides on top of DEFAULT_MIX (names may omit the method)."""
+    mix = dict(DEFAULT_MIX)
+    if not raw:
+        return mix
+    for item in raw.split(","):
+        name, _, weight = item.rpartition("=")
+        matches = [key for key in mix if key == name or key.split(" ", 1)[1] == name]
+        if not matches:
+            raise SystemExit(f"Unknown operation in --mix: {name!r}; known: {', '.join(mix)}")
+        mix[matches[0]] = int(weight)
+    return mix
+
+
+def start_server(args: argparse.Namespace) -> subprocess.Popen:
+    """Start uvicorn with main:socket_app on the in-memory backend."""
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_BACKEND": "memory",
+        "MOCK_DB_LATENCY_MS": str(args.db_latency_ms),
+        "DEBUG": "false",
+    })
+    command = [
+        sys.executable, "-m", "uvicorn", "main:socket_app",
+        "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning",
+        "--timeout-graceful-shutdown", "5",
+    ]
+    output = None if args.server_log else subprocess.DEVNULL
+    return subprocess.Popen(command, env=env, stdout=output, stderr=output)
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float):
+    """Poll /health until the server answers."""
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        if time.perf_counter() > deadline:
+            raise SystemExit(f"Server did not become ready within {timeout:.0f}s")
+        await asyncio.sleep(0.2)
+
+
+async def seed_members(client: httpx.AsyncClient, args: argparse.Namespace) -> List[str]:
+    """Create the load-test guild's members (idempotent upserts)."""
+    members = [f"loadtest-{i}" for i in range(args.users)]
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def create(discord_id: str):
+        async with semaphore:
+            response = await client.post("/api/users/", json={
+                "discord_id": discord_id, "guild_id": args.guild_id, "username": discord_id,
+            })
+            response.raise_for_status()
+
+    await asyncio.gather(*(create(discord_id) for discord_id in members))
+    return members
+
+
+async def open_sockets(args: argparse.Namespace, recorder: Recorder) -> List[socketio.AsyncClient]:
+    """Open Socket.IO connections in waves, recording connect latency."""
+    clients: List[socketio.AsyncClient] = []
+    failures: List[str] = []
+
+    async def connect_one():
+        client = socketio.AsyncClient(reconnection=False)
+
+        @client.on("pong")
+        async def on_pong(data):
+            recorder.record("socket.io ping", (time.perf_counter() - data["timestamp"]) * 1000)
+
+        started = time.perf_counter()
+        try:
+            await client.connect(args.base_url, transports=[args.socket_transport], socketio_path="/socket.io")
+            clients.append(client)
+            recorder.record("socket.io connect", (time.perf_counter() - started) * 1000)
+        except Exception as e:
+            recorder.record("socket.io connect", (time.perf_counter() - started) * 1000, failed=True)
+            failures.append(repr(e))
+            await client.disconnect()
+
+    for first in range(0, args.sockets, args.socket_wave):
+        await asyncio.gather(*(connect_one() for _ in range(min(args.socket_wave, args.sockets - first))))
+    if failures:
+        print(f"{len(failures)} Socket.IO connection(s) failed, e.g. {failures[0]}")
+    return clients
+
+
+async def ping_sockets(clients: List[socketio.AsyncClient], interval: float, deadline: float):
+    """Have every connected client ping the server every `interval` seconds until the deadline."""
+    async def pinger(client: socketio.AsyncClient, offset: float):
+        await asyncio.sleep(offset)
+        while time.perf_counter() < deadline and client.connected:
+            await client.emit("ping", {"timestamp": time.perf_counter()})
+            await asyncio.sleep(interval)
+
+    rng = random.Random(0)
+    await asyncio.gather(*(pinger(client, rng.uniform(0, interval)) for client in clients))
+
+
+async def run_traffic(
+    client: httpx.AsyncClient,
+    operations: Dict[str, Operation],
+    mix: Dict[str, int],
+    args: argparse.Namespace,
+    duration: float,
+    recorder: Optional[Recorder]
+) -> float:
+    """
+    Run closed-loop workers issuing mixed requests for `duration` seconds.
+
+    Returns:
+        Elapsed wall-clock seconds
+    """
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    deadline = time.perf_counter() + duration
+
+    async def worker(seed: int):
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                response = await operations[name](client, rng)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            if recorder is not None:
+                recorder.record(name, (time.perf_counter() - started) * 1000, failed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(args.seed + i) for i in range(args.concurrency)))
+    return time.perf_counter() - started
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Seed, connect sockets, warm up, then measure the traffic mix."""
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    mix = parse_mix(args.mix)
+    recorder = Recorder()
+
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=httpx.Timeout(args.timeout)) as client:
+        await wait_until_ready(client, args.startup_timeout)
+        members = await seed_members(client, args)
+        operations = build_operations(args, members)
+
+        sockets = await open_sockets(args, recorder)
+        try:
+            await run_traffic(client, operations, mix, args, args.warmup, recorder=None)
+
+            deadline = time.perf_counter() + args.duration
+            pings = asyncio.create_task(ping_sockets(sockets, args.ping_interval, deadline))
+            elapsed = await run_traffic(client, operations, mix, args, args.duration, recorder)
+            await pings
+        finally:
+            await asyncio.gather(*(socket.disconnect() for socket in sockets), return_exceptions=True)
+
+    endpoints = recorder.summaries(elapsed)
+    for name, summary in endpoints.items():
+        print_summary(name, summary)
+
+    return {
+        "base_url": args.base_url,
+        "backend": "external" if args.external else f"memory ({args.db_latency_ms}ms per call)",
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "users": args.users,
+        "sockets_connected": len(sockets),
+        "burst_size": args.burst_size,
+        "mix": mix,
+        "endpoints": endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed HTTP + Socket.IO load test")
+    parser.add_argument("--base-url", help="Test an already running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the server started by the test")
+    parser.add_argument("--db-latency-ms", type=float, default=1.0, help="Simulated database round trip")
+    parser.add_argument("--server-log", action="store_true", help="Show the server's output")
+    parser.add_argument("--startup-timeout", type=float, default=30.0)
+    parser.add_argument("--guild-id", default="loadtest")
+    parser.add_argument("--users", type=int, default=1000, help="Members seeded into the guild")
+    parser.add_argument("--concurrency", type=int, default=100, help="HTTP requests in flight")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds before measuring")
+    parser.add_argument("--burst-size", type=int, default=50, help="Events per XP batch")
+    parser.add_argument("--mix", help='Weight overrides, e.g. "/api/leveling/xp/batch=40,/api/leveling/leaderboard=10"')
+    parser.add_argument("--sockets", type=int, default=500, help="Socket.IO connections held open")
+    parser.add_argument("--socket-transport", choices=["websocket", "polling"], default="websocket")
+    parser.add_argument("--socket-wave", type=int, default=100, help="Socket.IO connections opened at once")
+    parser.add_argument("--ping-interval", type=float, default=5.0, help="Seconds between pings per socket")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write results JSON to this file")
+    parser.add_argument("--baseline", help="Results JSON to check for regressions against")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="Allowed p95/p99/throughput change in percent")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Latency change always tolerated")
+    args = parser.parse_args()
+
+    args.external = args.base_url is not None
+    server = None
+    if not args.external:
+        args.base_url = f"http://127.0.0.1:{args.port}"
+        server = start_server(args)
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+
+    if args.output:
+        write_results(args.output, results)
+    if args.baseline:
+        regressions = find_regressions(load_results(args.baseline), results, args.max_regression, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.max_regression:.0f}%:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions over {args.max_regression:.0f}% against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Socket.IO room fan-out benchmark.
+
+Registers N authenticated connections directly with the Socket.IO manager
+(one user room each plus a guild room), with the Engine.IO send replaced by
+a counter, then times:
+- targeted XP notifications (notify_xp_award) with and without a level-up
+- the same level_up broadcast to every connection, the only option before rooms
+- disconnecting every client, with the indexed manager and the stock one
+
+Transport I/O is left out on purpose: this measures the server-side cost
+that grows with connection count. Targeted cost should stay flat as N
+grows while broadcast and stock disconnect grow with N.
+
+Usage (from the backend directory):
+    python -m benchmarks.socket_rooms --connections 20000 --guilds 50
+    python -m benchmarks.socket_rooms --scale 1000,5000,20000 --output rooms.json
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, Dict, List
+
+import socketio
+
+import services.realtime as realtime
+from services.metrics import MeteredAsyncServer
+from services.realtime import IndexedAsyncManager, guild_room, notify_xp_award, user_room
+from benchmarks.common import write_results
+
+
+FIRST_USER_ID = 200000000000000000
+
+
+def build_server(manager) -> MeteredAsyncServer:
+    """A Socket.IO server whose sends only count packets."""
+    server = MeteredAsyncServer(client_manager=manager, async_mode='asgi')
+    server.packets_sent = 0
+
+    async def send_packet(eio_sid, pkt):
+        server.packets_sent += 1
+
+    server.eio.send_packet = send_packet
+    return server
+
+
+async def connect_clients(server, connections: int, guilds: int) -> List[str]:
+    """Register `connections` clients, each in its user room and one guild room."""
+    sids = []
+    for i in range(connections):
+        sid = await server.manager.connect(f"eio-{i}", "/")
+        await server.enter_room(sid, user_room(str(FIRST_USER_ID + i)))
+        await server.enter_room(sid, guild_room(f"guild-{i % guilds}"))
+        sids.append(sid)
+    return sids
+
+
+async def time_calls(calls: int, make_call) -> float:
+    """Average milliseconds per awaited call."""
+    started = time.perf_counter()
+    for i in range(calls):
+        await make_call(i)
+    return (time.perf_counter() - started) * 1000 / calls
+
+
+async def run_size(connections: int, guilds: int, calls: int, broadcasts: int, seed: int) -> Dict[str, Any]:
+    """Measure targeted emits, broadcast and disconnect at one connection count."""
+    rng = random.Random(seed)
+    server = build_server(IndexedAsyncManager())
+    realtime.sio = server
+
+    started = time.perf_counter()
+    sids = await connect_clients(server, connections, guilds)
+    connect_ms = (time.perf_counter() - started) * 1000
+
+    members = [(f"guild-{i % guilds}", str(FIRST_USER_ID + i)) for i in rng.sample(range(connections), calls)]
+
+    async def xp_only(i):
+        guild_id, discord_id = members[i]
+        await notify_xp_award(guild_id, discord_id, 15, 1000, 3, 3)
+
+    async def level_up(i):
+        guild_id, discord_id = members[i]
+        await notify_xp_award(guild_id, discord_id, 15, 1000, 3, 4, ["Daily Rewards"])
+
+    async def absent(i):
+        await notify_xp_award("guild-x", "not-connected", 15, 1000, 3, 3)
+
+    async def broadcast(i):
+        guild_id, discord_id = members[i]
+        await server.emit('level_up', {"guild_id": guild_id, "discord_id": discord_id, "old_level": 3, "new_level": 4})
+
+    server.packets_sent = 0
+    xp_ms = await time_calls(calls, xp_only)
+    xp_packets = server.packets_sent / calls
+
+    server.packets_sent = 0
+    level_up_ms = await time_calls(calls, level_up)
+    level_up_packets = server.packets_sent / calls
+
+    absent_ms = await time_calls(calls, absent)
+
+    server.packets_sent = 0
+    broadcast_ms = await time_calls(broadcasts, broadcast)
+    broadcast_packets = server.packets_sent / broadcasts
+
+    started = time.perf_counter()
+    for sid in sids:
+        await server.manager.disconnect(sid, "/")
+    disconnect_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        "connections": connections,
+        "guilds": guilds,
+        "connect_all_ms": round(connect_ms, 1),
+        "xp_gained_ms": round(xp_ms, 4),
+        "xp_gained_packets": xp_packets,
+        "level_up_ms": round(level_up_ms, 4),
+        "level_up_packets": level_up_packets,
+        "absent_member_ms": round(absent_ms, 4),
+        "broadcast_ms": round(broadcast_ms, 3),
+        "broadcast_packets": broadcast_packets,
+        "disconnect_all_ms": round(disconnect_ms, 1),
+    }
+
+
+async def run_stock_disconnect(connections: int, guilds: int) -> float:
+    """Milliseconds to disconnect every client with the stock manager."""
+    server = build_server(socketio.AsyncManager())
+    sids = await connect_clients(server, connections, guilds)
+    started = time.perf_counter()
+    for sid in sids:
+        await server.manager.disconnect(sid, "/")
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Socket.IO room fan-out benchmark")
+    parser.add_argument("--connections", type=int, default=20000)
+    parser.add_argument("--scale", help="Comma-separated connection counts to compare (overrides --connections)")
+    parser.add_argument("--guilds", type=int, default=50)
+    parser.add_argument("--calls", type=int, default=2000, help="Targeted notifications per measurement")
+    parser.add_argument("--broadcasts", type=int, default=20)
+    parser.add_argument("--stock-disconnect", type=int, default=5000,
+                        help="Connections for the stock-manager disconnect comparison (0 skips; it is quadratic)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write results JSON to this file")
+    args = parser.parse_args()
+
+    sizes = [int(n) for n in args.scale.split(",")] if args.scale else [args.connections]
+    results: Dict[str, Any] = {"sizes": []}
+    print(f"{'conns':>7} {'xp_gained':>10} {'level_up':>10} {'recips':>7} {'absent':>9} "
+          f"{'broadcast':>10} {'recips':>7} {'disconnect all':>15}")
+    for connections in sizes:
+        row = asyncio.run(run_size(connections, args.guilds, min(args.calls, connections), args.broadcasts, args.seed))
+        results["sizes"].append(row)
+        print(f"{connections:>7} {row['xp_gained_ms']:>8.3f}ms {row['level_up_ms']:>8.3f}ms "
+              f"{row['level_up_packets']:>7.0f} {row['absent_member_ms']:>7.4f}ms "
+              f"{row['broadcast_ms']:>8.2f}ms {row['broadcast_packets']:>7.0f} {row['disconnect_all_ms']:>13.1f}ms")
+
+    if args.stock_disconnect:
+        indexed = asyncio.run(run_size(args.stock_disconnect, args.guilds, 1, 1, args.seed))["disconnect_all_ms"]
+        stock = asyncio.run(run_stock_disconnect(args.stock_disconnect, args.guilds))
+        results["disconnect_comparison"] = {
+            "connections": args.stock_disconnect,
+            "indexed_ms": indexed,
+            "stock_ms": round(stock, 1),
+        }
+        print(f"\nDisconnect {args.stock_disconnect} clients: indexed manager {indexed:.1f}ms, stock manager {stock:.1f}ms")
+
+    if args.output:
+        write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
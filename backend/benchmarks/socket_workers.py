@@ -0,0 +1,236 @@
+"""
+Multi-worker Socket.IO emit fan-out benchmark.
+
+Starts a local pub/sub broker and W worker processes, each holding its
+share of N registered connections (one user room each plus a guild room;
+guild members are spread over every worker). A separate publisher process
+emits at a fixed rate through the queue, the way an API worker handling
+an XP award does:
+- level_up to a guild room, which every worker has members in
+- xp_gained to a user room, which one worker has a member in
+
+Each worker timestamps when an emit has been handed to all of its local
+sockets; fan-out latency is the time from the publisher's emit call until
+the last worker got there. Engine.IO sends are replaced by a counter as in
+socket_rooms, so this measures queue hops and per-worker fan-out, not
+transport I/O. A no-queue row gives the single-process cost for reference.
+Timestamps come from the system-wide monotonic clock (Linux).
+
+Usage (from the backend directory):
+    python -m benchmarks.socket_workers --workers 1,4,8 --connections 20000
+    python -m benchmarks.socket_workers --workers 1,4,8 --rate 500 --output workers.json
+"""
+import argparse
+import asyncio
+import multiprocessing
+import time
+from typing import Any, Dict, List
+
+from benchmarks.common import percentile, write_results
+from benchmarks.socket_rooms import FIRST_USER_ID, build_server
+from services.local_pubsub import LocalBroker, LocalPubSubManager
+from services.realtime import IndexedAsyncManager, RoomIndexMixin, guild_room, user_room
+
+
+class TimedManager(RoomIndexMixin, LocalPubSubManager):
+    """Local pub/sub manager that records when each emit finished locally."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.delivered: Dict[int, tuple] = {}  # seq -> (finished at, packets sent)
+
+    async def _handle_emit(self, message):
+        before = self.server.packets_sent
+        await super()._handle_emit(message)
+        data = message.get('data')
+        if isinstance(data, dict) and 'seq' in data:
+            self.delivered[data['seq']] = (time.perf_counter(), self.server.packets_sent - before)
+
+
+async def register_clients(server, worker: int, workers: int, connections: int, guilds: int) -> int:
+    """Register this worker's share of the connections; returns how many."""
+    count = 0
+    for i in range(worker, connections, workers):
+        sid = await server.manager.connect(f"eio-{i}", "/")
+        await server.enter_room(sid, user_room(str(FIRST_USER_ID + i)))
+        await server.enter_room(sid, guild_room(f"guild-{i % guilds}"))
+        count += 1
+    return count
+
+
+async def wait_for_broker(manager: LocalPubSubManager):
+    """Wait until the manager's listener is connected to the broker."""
+    while manager._writer is None:
+        await asyncio.sleep(0.01)
+
+
+async def run_worker(port: int, worker: int, workers: int, connections: int, guilds: int, ready, stop, results):
+    server = build_server(TimedManager(f"local://127.0.0.1:{port}"))
+    server.manager_initialized = True
+    server.manager.initialize()
+    registered = await register_clients(server, worker, workers, connections, guilds)
+    await wait_for_broker(server.manager)
+    ready.put(registered)
+    while not stop.is_set():
+        await asyncio.sleep(0.05)
+    results.put(server.manager.delivered)
+
+
+def worker_process(*args):
+    asyncio.run(run_worker(*args))
+
+
+async def run_publisher(port: int, emits: int, rate: float, connections: int, guilds: int, start, results):
+    server = build_server(LocalPubSubManager(f"local://127.0.0.1:{port}"))
+    server.manager_initialized = True
+    server.manager.initialize()
+    await wait_for_broker(server.manager)
+    start.wait()
+
+    sent_at: Dict[int, float] = {}
+    interval = 1 / rate
+    started = time.perf_counter()
+    for seq in range(emits):
+        delay = started + seq * interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        member = (seq * 7919) % connections
+        sent_at[seq] = time.perf_counter()
+        if seq % 2:
+            await server.emit('xp_gained', {"seq": seq, "xp_gained": 15}, room=user_room(str(FIRST_USER_ID + member)))
+        else:
+            await server.emit('level_up', {"seq": seq, "new_level": 4}, room=guild_room(f"guild-{member % guilds}"))
+    results.put(sent_at)
+
+
+def publisher_process(*args):
+    asyncio.run(run_publisher(*args))
+
+
+def latency_summary(latencies_ms: List[float]) -> Dict[str, float]:
+    values = sorted(latencies_ms)
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+        "max_ms": round(values[-1], 3) if values else 0.0,
+    }
+
+
+async def run_workers(workers: int, connections: int, guilds: int, emits: int, rate: float) -> Dict[str, Any]:
+    """Run one measurement with `workers` worker processes behind a local broker."""
+    broker = LocalBroker()
+    port = await broker.start()
+    ctx = multiprocessing.get_context("spawn")
+    ready, results, publisher_results = ctx.Queue(), ctx.Queue(), ctx.Queue()
+    stop, start = ctx.Event(), ctx.Event()
+    loop = asyncio.get_running_loop()
+
+    processes = [
+        ctx.Process(target=worker_process, args=(port, i, workers, connections, guilds, ready, stop, results))
+        for i in range(workers)
+    ]
+    publisher = ctx.Process(target=publisher_process,
+                            args=(port, emits, rate, connections, guilds, start, publisher_results))
+    for process in processes + [publisher]:
+        process.start()
+    registered = sum([await loop.run_in_executor(None, ready.get) for _ in processes])
+    while len(broker.clients) < workers + 1:
+        await asyncio.sleep(0.01)
+
+    frames_before = broker.frames
+    start.set()
+    sent_at = await loop.run_in_executor(None, publisher_results.get)
+    await asyncio.sleep(1.0)
+    stop.set()
+    delivered = [await loop.run_in_executor(None, results.get) for _ in processes]
+    for process in processes + [publisher]:
+        await loop.run_in_executor(None, process.join)
+    frames = broker.frames - frames_before
+    await broker.stop()
+
+    fan_out: Dict[str, List[float]] = {"level_up": [], "xp_gained": []}
+    packets = {"level_up": 0, "xp_gained": 0}
+    missing = 0
+    for seq, sent in sent_at.items():
+        reached = [worker[seq] for worker in delivered if seq in worker]
+        if len(reached) < workers:
+            missing += 1
+            continue
+        event = "xp_gained" if seq % 2 else "level_up"
+        fan_out[event].append((max(finished for finished, _ in reached) - sent) * 1000)
+        packets[event] += sum(count for _, count in reached)
+
+    return {
+        "workers": workers,
+        "connections": registered,
+        "emits": emits,
+        "rate": rate,
+        "broker_frames": frames,
+        "missing": missing,
+        "level_up": {**latency_summary(fan_out["level_up"]),
+                     "packets_per_emit": round(packets["level_up"] / max(1, len(fan_out["level_up"])), 1)},
+        "xp_gained": {**latency_summary(fan_out["xp_gained"]),
+                      "packets_per_emit": round(packets["xp_gained"] / max(1, len(fan_out["xp_gained"])), 1)},
+    }
+
+
+async def run_single_process(connections: int, guilds: int, emits: int) -> Dict[str, Any]:
+    """Emit cost with the in-process manager and no queue, for reference."""
+    server = build_server(IndexedAsyncManager())
+    for i in range(connections):
+        sid = await server.manager.connect(f"eio-{i}", "/")
+        await server.enter_room(sid, user_room(str(FIRST_USER_ID + i)))
+        await server.enter_room(sid, guild_room(f"guild-{i % guilds}"))
+
+    timings: Dict[str, List[float]] = {"level_up": [], "xp_gained": []}
+    for seq in range(emits):
+        member = (seq * 7919) % connections
+        started = time.perf_counter()
+        if seq % 2:
+            await server.emit('xp_gained', {"seq": seq}, room=user_room(str(FIRST_USER_ID + member)))
+            timings["xp_gained"].append((time.perf_counter() - started) * 1000)
+        else:
+            await server.emit('level_up', {"seq": seq}, room=guild_room(f"guild-{member % guilds}"))
+            timings["level_up"].append((time.perf_counter() - started) * 1000)
+    return {"workers": 0, "level_up": latency_summary(timings["level_up"]),
+            "xp_gained": latency_summary(timings["xp_gained"])}
+
+
+def print_row(label: str, row: Dict[str, Any]):
+    level_up, xp_gained = row["level_up"], row["xp_gained"]
+    print(f"{label:<10} {level_up['p50_ms']:>9.3f} {level_up['p99_ms']:>9.3f} {level_up['max_ms']:>9.3f}   "
+          f"{xp_gained['p50_ms']:>9.3f} {xp_gained['p99_ms']:>9.3f} {xp_gained['max_ms']:>9.3f}   "
+          f"{row.get('missing', 0):>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-worker Socket.IO emit fan-out benchmark")
+    parser.add_argument("--workers", default="1,4,8", help="Comma-separated worker counts")
+    parser.add_argument("--connections", type=int, default=20000)
+    parser.add_argument("--guilds", type=int, default=50)
+    parser.add_argument("--emits", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=200.0, help="Emits per second from the publisher")
+    parser.add_argument("--output", help="Write results JSON to this file")
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {"runs": []}
+    print(f"{'':<10} {'level_up (guild room) ms':^29}   {'xp_gained (user room) ms':^29}")
+    print(f"{'workers':<10} {'p50':>9} {'p99':>9} {'max':>9}   {'p50':>9} {'p99':>9} {'max':>9}   {'missing':>7}")
+
+    baseline = asyncio.run(run_single_process(args.connections, args.guilds, args.emits))
+    results["single_process"] = baseline
+    print_row("no queue", baseline)
+
+    for workers in [int(n) for n in args.workers.split(",")]:
+        row = asyncio.run(run_workers(workers, args.connections, args.guilds, args.emits, args.rate))
+        results["runs"].append(row)
+        print_row(str(workers), row)
+
+    if args.output:
+        write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
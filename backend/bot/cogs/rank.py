@@ -10,7 +10,7 @@ import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from services.leveling_service import leveling_service
+from services.leveling_profiles import leveling_profiles
 
 
 class RankCog(commands.Cog):
@@ -20,21 +20,44 @@ class RankCog(commands.Cog):
         """Initialize rank cog."""
         self.bot = bot
     
+    async def fetch_rank(self, guild: discord.Guild, discord_id: int):
+        """Get a member's rank data through SyncCog, or None if the API is unavailable."""
+        sync_cog = self.bot.get_cog("SyncCog")
+        if sync_cog is None or guild is None:
+            return None
+        return await sync_cog.get_rank(str(guild.id), str(discord_id))
+    
+    @staticmethod
+    def rank_fields(rank_data):
+        """Format (level, xp, rank) embed values from API rank data."""
+        if rank_data is None:
+            return "1", "0 / 100", "#???"
+        
+        level = rank_data["level"]
+        next_level_total = rank_data["xp"] + rank_data["next_level_xp"]
+        return (
+            str(level),
+            f"{rank_data['xp']:,} / {next_level_total:,}",
+            f"#{rank_data['rank']:,} of {rank_data['total_users']:,}"
+        )
+    
     @app_commands.command(name="rank", description="Check your rank and level")
     async def rank_slash(self, interaction: discord.Interaction):
         """Slash command to check rank."""
         await interaction.response.defer()
         
-        # TODO: Fetch user data from API
-        # For now, show placeholder
+        rank_data = await self.fetch_rank(interaction.guild, interaction.user.id)
+        level, xp, rank = self.rank_fields(rank_data)
+        
         embed = discord.Embed(
             title=f"📊 {interaction.user.name}'s Rank",
             color=discord.Color.blue()
         )
-        embed.add_field(name="Level", value="1", inline=True)
-        embed.add_field(name="XP", value="0 / 100", inline=True)
-        embed.add_field(name="Rank", value="#???", inline=True)
-        embed.add_field(name="Tier", value="Basic", inline=True)
+        embed.add_field(name="Level", value=level, inline=True)
+        embed.add_field(name="XP", value=xp, inline=True)
+        embed.add_field(name="Rank", value=rank, inline=True)
+        tier = rank_data["rank_tier"] if rank_data else "Basic"
+        embed.add_field(name="Tier", value=tier, inline=True)
         embed.add_field(name="Streak", value="0 days", inline=True)
         embed.add_field(name="Tools Unlocked", value="4 / 20", inline=True)
         
@@ -46,14 +69,16 @@ class RankCog(commands.Cog):
     @commands.command(name="rank")
     async def rank_prefix(self, ctx):
         """Prefix command to check rank."""
-        # TODO: Fetch user data from API
+        rank_data = await self.fetch_rank(ctx.guild, ctx.author.id)
+        level, xp, rank = self.rank_fields(rank_data)
+        
         embed = discord.Embed(
             title=f"📊 {ctx.author.name}'s Rank",
             color=discord.Color.blue()
         )
-        embed.add_field(name="Level", value="1", inline=True)
-        embed.add_field(name="XP", value="0 / 100", inline=True)
-        embed.add_field(name="Rank", value="#???", inline=True)
+        embed.add_field(name="Level", value=level, inline=True)
+        embed.add_field(name="XP", value=xp, inline=True)
+        embed.add_field(name="Rank", value=rank, inline=True)
         
         embed.set_thumbnail(url=ctx.author.display_avatar.url)
         await ctx.send(embed=embed)
@@ -63,19 +88,29 @@ class RankCog(commands.Cog):
         """Show server leaderboard."""
         await interaction.response.defer()
         
-        # TODO: Fetch leaderboard from API
+        sync_cog = self.bot.get_cog("SyncCog")
+        entries = None
+        if sync_cog is not None and interaction.guild is not None:
+            entries = await sync_cog.get_leaderboard(str(interaction.guild.id), limit=10)
+        
         embed = discord.Embed(
             title="🏆 Server Leaderboard",
             description="Top users by XP",
             color=discord.Color.gold()
         )
         
-        # Placeholder data
-        embed.add_field(
-            name="Top 10",
-            value="Leaderboard coming soon!\nKeep earning XP to climb the ranks!",
-            inline=False
-        )
+        if entries:
+            lines = [
+                f"**#{entry['rank']}** {entry['user']['username']} - Level {entry['level']} ({entry['xp']:,} XP)"
+                for entry in entries
+            ]
+            embed.add_field(name="Top 10", value="\n".join(lines), inline=False)
+        else:
+            embed.add_field(
+                name="Top 10",
+                value="No rankings yet!\nKeep earning XP to climb the ranks!",
+                inline=False
+            )
         
         await interaction.followup.send(embed=embed)
     
@@ -88,11 +123,13 @@ class RankCog(commands.Cog):
             color=discord.Color.purple()
         )
         
-        for tier_name, (min_level, max_level) in leveling_service.TIERS.items():
-            xp_required = leveling_service.calculate_xp_for_level(min_level)
+        profile = leveling_profiles.get(str(interaction.guild_id))
+        for tier_name, (min_level, max_level) in profile.profile.tiers.items():
+            xp_required = profile.level_table.xp_for_level(min_level)
+            unlock = f"{xp_required:,} XP to unlock" if xp_required is not None else "Above the level cap"
             embed.add_field(
                 name=f"{tier_name} Tier",
-                value=f"Levels {min_level}-{max_level}\n{xp_required:,} XP to unlock",
+                value=f"Levels {min_level}-{max_level}\n{unlock}",
                 inline=True
             )
         
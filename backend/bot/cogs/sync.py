@@ -11,6 +11,8 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from config import settings
+from bot.xp_buffer import XPEventBuffer
+from bot.metrics import XP_BUFFER_DEPTH, XP_DROPPED, api_trace_config
 
 
 class SyncCog(commands.Cog):
@@ -21,24 +23,40 @@ class SyncCog(commands.Cog):
         self.bot = bot
         self.api_url = f"http://{settings.api_host}:{settings.api_port}/api"
         self.session: aiohttp.ClientSession = None
+        self.xp_buffer = XPEventBuffer(
+            self.post_xp_batch,
+            flush_interval=settings.xp_flush_interval,
+            flush_size=settings.xp_flush_size,
+            max_entries=settings.xp_buffer_max_entries,
+            max_retry_delay=settings.xp_flush_max_retry_delay,
+            dropped=XP_DROPPED.counts
+        )
     
     async def cog_load(self):
         """Called when cog is loaded."""
-        self.session = aiohttp.ClientSession()
+        self.session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=settings.xp_flush_timeout),
+            trace_configs=[api_trace_config()]
+        )
+        XP_BUFFER_DEPTH.set_function(lambda: len(self.xp_buffer))
+        self.xp_buffer.start()
         # Start background sync task
         # self.sync_users.start()
     
     async def cog_unload(self):
         """Called when cog is unloaded."""
         # self.sync_users.cancel()
+        # Drain buffered XP before the HTTP session goes away
+        await self.xp_buffer.close()
         if self.session:
             await self.session.close()
     
-    async def ensure_user_exists(self, discord_user: discord.User):
-        """Ensure user exists in database."""
+    async def ensure_user_exists(self, discord_user: discord.Member):
+        """Ensure guild member exists in database."""
         try:
             user_data = {
                 "discord_id": str(discord_user.id),
+                "guild_id": str(discord_user.guild.id),
                 "username": discord_user.name,
                 "avatar_url": str(discord_user.display_avatar.url)
             }
@@ -51,23 +69,70 @@ class SyncCog(commands.Cog):
         except Exception as e:
             print(f"[Sync] Error ensuring user exists: {e}")
     
-    async def send_xp_event(self, user_id: str, event_type: str, xp_amount: int, channel_id: str = None):
-        """Send XP event to API."""
+    async def send_xp_event(self, guild_id: str, user_id: str, event_type: str, xp_amount: int, channel_id: str = None):
+        """Queue an XP event; it is merged with others and sent in the next batch."""
+        await self.xp_buffer.add(guild_id, user_id, event_type, xp_amount, channel_id)
+    
+    async def post_xp_batch(self, events: list):
+        """Send a batch of coalesced XP events to the API."""
+        async with self.session.post(
+            f"{self.api_url}/leveling/xp/batch",
+            json={"events": events},
+            trace_request_ctx={"endpoint": "xp_batch"}
+        ) as resp:
+            resp.raise_for_status()
+            result = await resp.json()
+        
+        for user_result in result.get("results", []):
+            if user_result.get("leveled_up"):
+                print(f"[Sync] {user_result['discord_id']} reached level {user_result['new_level']} in guild {user_result['guild_id']}")
+        
+        if result.get("unknown_users"):
+            print(f"[Sync] Skipped XP for {len(result['unknown_users'])} unregistered users")
+    
+    async def get_rank(self, guild_id: str, discord_id: str):
+        """Fetch a member's rank, XP and level from the API. Returns None if unavailable."""
         try:
-            event_data = {
-                "user_id": user_id,
-                "event_type": event_type,
-                "xp_amount": xp_amount,
-                "channel_id": channel_id
-            }
-            
-            # TODO: Implement API call
-            # async with self.session.post(f"{self.api_url}/xp/events", json=event_data) as resp:
-            #     return await resp.json()
-            
-            print(f"[Sync] Would send XP event: {event_type} +{xp_amount} XP")
+            async with self.session.get(
+                f"{self.api_url}/leveling/rank/{discord_id}",
+                params={"guild_id": guild_id},
+                trace_request_ctx={"endpoint": "rank"}
+            ) as resp:
+                if resp.status != 200:
+                    return None
+                return await resp.json()
+        except Exception as e:
+            print(f"[Sync] Error fetching rank: {e}")
+            return None
+    
+    async def get_leaderboard(self, guild_id: str, limit: int = 10):
+        """Fetch a guild's leaderboard from the API. Returns None if unavailable."""
+        try:
+            async with self.session.get(
+                f"{self.api_url}/leveling/leaderboard",
+                params={"guild_id": guild_id, "limit": limit},
+                trace_request_ctx={"endpoint": "leaderboard"}
+            ) as resp:
+                if resp.status != 200:
+                    return None
+                return await resp.json()
+        except Exception as e:
+            print(f"[Sync] Error fetching leaderboard: {e}")
+            return None
+    
+    async def get_leveling_profiles(self):
+        """Fetch every guild's leveling profile from the API. Returns None if unavailable."""
+        try:
+            async with self.session.get(
+                f"{self.api_url}/leveling/profiles",
+                trace_request_ctx={"endpoint": "profiles"}
+            ) as resp:
+                if resp.status != 200:
+                    return None
+                return await resp.json()
         except Exception as e:
-            print(f"[Sync] Error sending XP event: {e}")
+            print(f"[Sync] Error fetching leveling profiles: {e}")
+            return None
     
     @tasks.loop(minutes=5)
     async def sync_users(self):
@@ -2,16 +2,21 @@
 XP Tracking Cog
 Tracks user activity and awards XP based on messages, voice, and commands.
 """
+import asyncio
 import discord
-from discord.ext import commands
-from datetime import datetime, timedelta
-from collections import defaultdict
+from discord.ext import commands, tasks
 import sys
 import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+from config import settings
 from services.leveling_service import leveling_service
+from services.leveling_profiles import compile_profile, leveling_profiles
+from models.profile import LevelingProfile
+from bot.cooldowns import CooldownTracker
+from bot.voice_tracker import VoiceTracker
+from bot.metrics import COOLDOWN_HITS, XP_QUEUED
 
 
 class XPCog(commands.Cog):
@@ -20,8 +25,28 @@ class XPCog(commands.Cog):
     def __init__(self, bot):
         """Initialize XP cog."""
         self.bot = bot
-        self.message_cooldowns = defaultdict(lambda: datetime.min)
-        self.voice_tracking = {}  # user_id: join_time
+        self.cooldowns = CooldownTracker(leveling_service.COOLDOWNS)
+        self.voice_tracker = VoiceTracker()
+        self.voice_accrual.change_interval(seconds=settings.voice_xp_interval)
+        self.refresh_profiles.change_interval(seconds=settings.leveling_profile_refresh_interval)
+    
+    async def cog_load(self):
+        """Called when cog is loaded."""
+        self.voice_accrual.start()
+        self.refresh_profiles.start()
+    
+    async def cog_unload(self):
+        """Called when cog is unloaded."""
+        self.voice_accrual.cancel()
+        self.refresh_profiles.cancel()
+    
+    async def queue_xp(self, guild_id: str, user_id: str, event_type: str, xp_amount: int, channel_id: str = None):
+        """Hand an XP award to SyncCog's buffer without waiting on the API."""
+        sync_cog = self.bot.get_cog("SyncCog")
+        if sync_cog is None:
+            return
+        XP_QUEUED.counts[event_type] += 1
+        await sync_cog.send_xp_event(guild_id, user_id, event_type, xp_amount, channel_id)
     
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
@@ -30,25 +55,61 @@ class XPCog(commands.Cog):
         if message.author.bot or not message.guild:
             return
         
+        guild_id = str(message.guild.id)
         user_id = str(message.author.id)
-        now = datetime.utcnow()
+        profile = leveling_profiles.get(guild_id)
         
-        # Check cooldown
-        last_message = self.message_cooldowns[user_id]
-        cooldown = timedelta(seconds=leveling_service.COOLDOWNS["message"])
+        # Check and start cooldown (XP is tracked per guild)
+        if not self.cooldowns.try_acquire("message", (guild_id, user_id), cooldown=profile.cooldowns.get("message")):
+            COOLDOWN_HITS.counts["message"] += 1
+            return
         
-        if now - last_message < cooldown:
+        # Award XP
+        xp_amount = profile.xp_amount("message")
+        if xp_amount <= 0:
+            return
+        await self.queue_xp(guild_id, user_id, "message", xp_amount, str(message.channel.id))
+    
+    async def award_command_xp(self, guild: discord.Guild, user: discord.abc.User, channel_id: str = None):
+        """Award XP for a completed command, subject to the command cooldown."""
+        if guild is None or user.bot:
             return
         
-        # Update cooldown
-        self.message_cooldowns[user_id] = now
+        guild_id = str(guild.id)
+        user_id = str(user.id)
+        profile = leveling_profiles.get(guild_id)
         
-        # Award XP
-        xp_amount = leveling_service.XP_AMOUNTS["message"]
+        if not self.cooldowns.try_acquire("command", (guild_id, user_id), cooldown=profile.cooldowns.get("command")):
+            COOLDOWN_HITS.counts["command"] += 1
+            return
         
-        # TODO: Send XP to API
-        # For now, just log it
-        print(f"[XP] {message.author.name} earned {xp_amount} XP from message")
+        xp_amount = profile.xp_amount("command")
+        if xp_amount <= 0:
+            return
+        await self.queue_xp(guild_id, user_id, "command", xp_amount, channel_id)
+    
+    @commands.Cog.listener()
+    async def on_command_completion(self, ctx: commands.Context):
+        """Award XP for prefix commands."""
+        await self.award_command_xp(ctx.guild, ctx.author, str(ctx.channel.id))
+    
+    @commands.Cog.listener()
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        """Award XP for slash commands."""
+        channel_id = str(interaction.channel_id) if interaction.channel_id else None
+        await self.award_command_xp(interaction.guild, interaction.user, channel_id)
+    
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Rebuild voice tracking from the gateway's current voice states."""
+        self.voice_tracker.load(
+            (str(guild.id), str(channel.id), str(member.id), self.is_muted(member.voice))
+            for guild in self.bot.guilds
+            for channel in guild.voice_channels + guild.stage_channels
+            for member in channel.members
+            if not member.bot and member.voice is not None
+        )
+        print(f"[Voice] Tracking {len(self.voice_tracker)} members already in voice")
     
     @commands.Cog.listener()
     async def on_voice_state_update(
@@ -57,25 +118,83 @@ class XPCog(commands.Cog):
         before: discord.VoiceState,
         after: discord.VoiceState
     ):
-        """Track voice chat time and award XP."""
-        user_id = str(member.id)
+        """Keep voice tracking in step with joins, leaves, moves and mutes."""
+        if member.bot:
+            return
+        
+        channel_id = str(after.channel.id) if after.channel is not None else None
+        self.voice_tracker.set_state(str(member.guild.id), str(member.id), channel_id, self.is_muted(after))
+    
+    @staticmethod
+    def is_muted(voice: discord.VoiceState) -> bool:
+        """Whether a member has muted or deafened themselves."""
+        return voice.self_mute or voice.self_deaf
+    
+    def excluded_voice_channels(self) -> set:
+        """Channel IDs that never earn voice XP."""
+        excluded = set(settings.voice_xp_excluded_channel_ids)
+        if settings.voice_xp_exclude_afk:
+            excluded.update(str(guild.afk_channel.id) for guild in self.bot.guilds if guild.afk_channel)
+        return excluded
+    
+    @tasks.loop(seconds=60)
+    async def voice_accrual(self):
+        """Credit every eligible voice member for the interval that just passed."""
+        # Snapshot first: voice state events can change tracking while we queue
+        credits = list(self.voice_tracker.eligible(
+            excluded_channels=self.excluded_voice_channels(),
+            exclude_solo=settings.voice_xp_exclude_solo,
+            exclude_muted=settings.voice_xp_exclude_muted
+        ))
+        if not credits:
+            return
         
-        # User joined voice
-        if before.channel is None and after.channel is not None:
-            self.voice_tracking[user_id] = datetime.utcnow()
-            print(f"[Voice] {member.name} joined voice channel")
+        minutes = settings.voice_xp_interval / 60
+        try:
+            for guild_id, channel_id, user_id in credits:
+                xp_amount = round(leveling_profiles.get(guild_id).xp_amount("voice_minute") * minutes)
+                if xp_amount > 0:
+                    await self.queue_xp(guild_id, user_id, "voice_minute", xp_amount, channel_id)
+        except Exception as e:
+            # Keep the loop alive; the next interval credits again
+            print(f"[Voice] Voice XP accrual failed: {e}")
+    
+    @voice_accrual.before_loop
+    async def before_voice_accrual(self):
+        """Start one full interval after ready, once tracking has been rebuilt."""
+        await self.bot.wait_until_ready()
+        await asyncio.sleep(settings.voice_xp_interval)
+    
+    @tasks.loop(seconds=300)
+    async def refresh_profiles(self):
+        """Pick up per-guild leveling profiles changed through the API."""
+        sync_cog = self.bot.get_cog("SyncCog")
+        if sync_cog is None:
+            return
+        rows = await sync_cog.get_leveling_profiles()
+        if rows is None:
+            return
         
-        # User left voice
-        elif before.channel is not None and after.channel is None:
-            if user_id in self.voice_tracking:
-                join_time = self.voice_tracking.pop(user_id)
-                duration = (datetime.utcnow() - join_time).total_seconds()
-                minutes = int(duration / 60)
-                
-                if minutes > 0:
-                    xp_amount = minutes * leveling_service.XP_AMOUNTS["voice_minute"]
-                    print(f"[XP] {member.name} earned {xp_amount} XP from {minutes} minutes in voice")
-                    # TODO: Send XP to API
+        try:
+            compiled_profiles = []
+            for row in rows:
+                guild_id = row.pop("guild_id")
+                row.pop("updated_at", None)
+                profile = LevelingProfile(**row)
+                # Only recompile guilds whose profile actually changed
+                current = leveling_profiles.get(guild_id)
+                if current.guild_id != guild_id or current.profile != profile:
+                    current = compile_profile(guild_id, profile)
+                compiled_profiles.append(current)
+            leveling_profiles.load(compiled_profiles)
+        except Exception as e:
+            # Keep the profiles we have; the next refresh tries again
+            print(f"[XP] Leveling profile refresh failed: {e}")
+    
+    @refresh_profiles.before_loop
+    async def before_refresh_profiles(self):
+        """Wait for SyncCog's HTTP session."""
+        await self.bot.wait_until_ready()
     
     @commands.command(name="xp")
     async def check_xp(self, ctx):
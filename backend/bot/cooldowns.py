@@ -0,0 +1,116 @@
+"""
+Cooldown Tracker
+Per-member XP cooldowns that forget members once their cooldown has passed.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+
+def monotonic_ms() -> int:
+    """Current monotonic clock reading in whole milliseconds."""
+    return time.monotonic_ns() // 1_000_000
+
+
+class CooldownTracker:
+    """
+    Tracks cooldowns per event type with monotonic integer expiry times.
+
+    Entries are grouped by (event type, cooldown length). Within a group
+    every entry has the same cooldown, so entries expire in the order they
+    were recorded; each group keeps them in an OrderedDict in that order,
+    and each check first pops expired entries off the front. Memory
+    therefore stays proportional to the members who triggered an event
+    within the last cooldown window, not to everyone ever seen. Per-guild
+    cooldowns only add one group per distinct cooldown length.
+    """
+
+    def __init__(self, cooldowns: Dict[str, float]):
+        """
+        Initialize the tracker.
+
+        Args:
+            cooldowns: Event type -> cooldown in seconds (e.g. LevelingService.COOLDOWNS)
+        """
+        self._windows: Dict[str, int] = {
+            event_type: int(seconds * 1000) for event_type, seconds in cooldowns.items()
+        }
+        # (event_type, window_ms) -> {key: expires_at_ms}, oldest first
+        self._expiries: Dict[Tuple[str, int], "OrderedDict[Hashable, int]"] = {}
+
+    def __len__(self) -> int:
+        return sum(len(expiries) for expiries in self._expiries.values())
+
+    def try_acquire(
+        self,
+        event_type: str,
+        key: Hashable,
+        now_ms: Optional[int] = None,
+        cooldown: Optional[float] = None
+    ) -> bool:
+        """
+        Start a cooldown for a member unless one is already running.
+
+        Args:
+            event_type: Event type, e.g. "message" or "command"
+            key: Member key, e.g. (guild_id, user_id)
+            now_ms: Monotonic time in milliseconds (defaults to now); must not go backwards
+            cooldown: Cooldown in seconds overriding the default for this event type
+
+        Returns:
+            True if the member was off cooldown (and is now on it), False otherwise.
+            Event types without a cooldown are always allowed.
+        """
+        window = self._window(event_type, cooldown)
+        if not window:
+            return True
+
+        now = monotonic_ms() if now_ms is None else now_ms
+        expiries = self._expiries.get((event_type, window))
+        if expiries is None:
+            expiries = self._expiries[(event_type, window)] = OrderedDict()
+        self._evict(expiries, now)
+
+        # Anything left after eviction is still cooling down
+        if key in expiries:
+            return False
+        expiries[key] = now + window
+        return True
+
+    def remaining(
+        self,
+        event_type: str,
+        key: Hashable,
+        now_ms: Optional[int] = None,
+        cooldown: Optional[float] = None
+    ) -> float:
+        """Seconds left on a member's cooldown (0.0 if none is running)."""
+        window = self._window(event_type, cooldown)
+        expires_at = self._expiries.get((event_type, window), {}).get(key)
+        if expires_at is None:
+            return 0.0
+        now = monotonic_ms() if now_ms is None else now_ms
+        return max(0, expires_at - now) / 1000
+
+    def sweep(self, now_ms: Optional[int] = None):
+        """Drop expired entries for every event type."""
+        now = monotonic_ms() if now_ms is None else now_ms
+        for group in list(self._expiries):
+            self._evict(self._expiries[group], now)
+            if not self._expiries[group]:
+                del self._expiries[group]
+
+    def _window(self, event_type: str, cooldown: Optional[float]) -> int:
+        """Cooldown length in milliseconds, from the override or the default."""
+        if cooldown is not None:
+            return int(cooldown * 1000)
+        return self._windows.get(event_type, 0)
+
+    @staticmethod
+    def _evict(expiries: "OrderedDict[Hashable, int]", now: int):
+        """Pop entries from the front while they have expired."""
+        while expiries:
+            key = next(iter(expiries))
+            if expiries[key] > now:
+                break
+            expiries.popitem(last=False)
@@ -4,6 +4,7 @@ Cog-based architecture inspired by old/discord-bot patterns.
 """
 import discord
 from discord.ext import commands
+from prometheus_client import start_http_server
 import asyncio
 import sys
 import os
@@ -12,6 +13,8 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import settings
+from bot.metrics import GATEWAY_EVENTS
+from services.profiling import SlowCallbackWatchdog
 
 
 class DiscordBotHub(commands.Bot):
@@ -30,9 +33,23 @@ class DiscordBotHub(commands.Bot):
             intents=intents,
             help_command=None  # We'll create custom help
         )
+        self.watchdog = None
+    
+    def dispatch(self, event_name: str, /, *args, **kwargs):
+        """Count every dispatched event before handing it to listeners."""
+        GATEWAY_EVENTS.counts[event_name] += 1
+        super().dispatch(event_name, *args, **kwargs)
     
     async def setup_hook(self):
         """Load cogs and sync commands."""
+        if settings.bot_metrics_port:
+            start_http_server(settings.bot_metrics_port)
+            print(f"✓ Metrics on port {settings.bot_metrics_port}")
+        
+        if settings.slow_callback_threshold_ms:
+            self.watchdog = SlowCallbackWatchdog(settings.slow_callback_threshold_ms / 1000, "Bot")
+            self.watchdog.start()
+        
         print("Loading cogs...")
         
         # List of cogs to load
@@ -57,6 +74,12 @@ class DiscordBotHub(commands.Bot):
         except Exception as e:
             print(f"✗ Failed to sync commands: {e}")
     
+    async def close(self):
+        """Stop the slow-callback watchdog before shutting down."""
+        if self.watchdog is not None:
+            self.watchdog.stop()
+        await super().close()
+    
     async def on_ready(self):
         """Called when bot is ready."""
         print(f"\n{'='*50}")
@@ -0,0 +1,107 @@
+"""
+Prometheus metrics for the bot process.
+Served on their own port by start_http_server from setup_hook. Counters
+on the gateway/XP hot path are plain dict adds read at scrape time: the
+bot runs on one event loop, and prometheus_client's locked inc() costs
+about as much as the cooldown check it would be counting.
+"""
+import time
+from collections import defaultdict
+from typing import Dict, Sequence
+
+import aiohttp
+from prometheus_client import Gauge, Histogram
+from prometheus_client.core import REGISTRY, CounterMetricFamily
+
+
+class LoopCounter:
+    """
+    Counter with one label, incremented from the event loop without locking.
+
+    Increment with `counter.counts[label_value] += 1`; the scrape thread
+    only reads a snapshot of the dict.
+    """
+
+    def __init__(self, name: str, documentation: str, label: str, initial: Sequence[str] = ()):
+        """
+        Create and register the counter.
+
+        Args:
+            name: Metric name without the _total suffix
+            documentation: Help text
+            label: Label name
+            initial: Label values exported as 0 before their first increment
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.counts: Dict[str, int] = defaultdict(int, {value: 0 for value in initial})
+        REGISTRY.register(self)
+
+    def collect(self):
+        family = CounterMetricFamily(self.name, self.documentation, labels=[self.label])
+        for value, count in list(self.counts.items()):
+            family.add_metric([value], count)
+        yield family
+
+
+GATEWAY_EVENTS = LoopCounter(
+    "bot_gateway_events",
+    "Gateway events dispatched, by event name",
+    "event"
+)
+COOLDOWN_HITS = LoopCounter(
+    "bot_cooldown_hits",
+    "XP awards skipped because the member was on cooldown",
+    "action",
+    initial=("message", "command")
+)
+XP_QUEUED = LoopCounter(
+    "bot_xp_queued",
+    "XP awards handed to the batch buffer, by event type",
+    "event_type",
+    initial=("message", "command", "voice_minute")
+)
+XP_DROPPED = LoopCounter(
+    "bot_xp_dropped",
+    "XP entries dropped by the batch buffer, by reason",
+    "reason",
+    initial=("rejected", "buffer_full", "shutdown")
+)
+XP_BUFFER_DEPTH = Gauge(
+    "bot_xp_buffer_entries",
+    "Coalesced XP entries waiting for the next flush"
+)
+API_REQUEST_SECONDS = Histogram(
+    "bot_api_request_duration_seconds",
+    "Latency of calls to the backend API, by endpoint and status",
+    ["endpoint", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+
+def api_trace_config() -> aiohttp.TraceConfig:
+    """
+    Trace hooks that time every request made through a session.
+
+    Requests pass trace_request_ctx={"endpoint": name} to choose the
+    endpoint label; the URL path is not used since it can contain IDs.
+    """
+    async def on_request_start(session, context, params):
+        context.started = time.perf_counter()
+
+    def observe(context, status):
+        endpoint = (context.trace_request_ctx or {}).get("endpoint", "other")
+        API_REQUEST_SECONDS.labels(endpoint, status).observe(time.perf_counter() - context.started)
+
+    async def on_request_end(session, context, params):
+        observe(context, str(params.response.status))
+
+    async def on_request_exception(session, context, params):
+        observe(context, "error")
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
@@ -0,0 +1,95 @@
+"""
+Voice Tracker
+Who is in which voice channel, kept up to date from voice state events so
+the voice XP loop can credit everyone eligible in one pass.
+"""
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+
+
+class VoiceTracker:
+    """
+    Voice channel occupancy per guild.
+
+    Only non-bot members are tracked. Each member is stored with whether
+    they are self-muted or self-deafened, which is all the eligibility
+    rules need.
+    """
+
+    def __init__(self):
+        """Initialize with no tracked members."""
+        # (guild_id, channel_id) -> {user_id: muted}
+        self._channels: Dict[Tuple[str, str], Dict[str, bool]] = {}
+        # (guild_id, user_id) -> channel_id
+        self._member_channel: Dict[Tuple[str, str], str] = {}
+
+    def __len__(self) -> int:
+        return len(self._member_channel)
+
+    def set_state(self, guild_id: str, user_id: str, channel_id: Optional[str], muted: bool = False):
+        """
+        Record a member's current voice state.
+
+        Args:
+            guild_id: Guild the state belongs to
+            user_id: Member whose state changed
+            channel_id: Voice channel they are in, or None if they left voice
+            muted: Whether they are self-muted or self-deafened
+        """
+        member_key = (guild_id, user_id)
+        old_channel_id = self._member_channel.get(member_key)
+
+        if old_channel_id is not None and old_channel_id != channel_id:
+            channel_key = (guild_id, old_channel_id)
+            members = self._channels.get(channel_key)
+            if members is not None:
+                members.pop(user_id, None)
+                if not members:
+                    del self._channels[channel_key]
+            del self._member_channel[member_key]
+
+        if channel_id is not None:
+            self._channels.setdefault((guild_id, channel_id), {})[user_id] = muted
+            self._member_channel[member_key] = channel_id
+
+    def load(self, states: Iterable[Tuple[str, str, str, bool]]):
+        """
+        Replace all tracking, e.g. from the gateway's voice states on ready.
+
+        Args:
+            states: (guild_id, channel_id, user_id, muted) for every member in voice
+        """
+        self.clear()
+        for guild_id, channel_id, user_id, muted in states:
+            self.set_state(guild_id, user_id, channel_id, muted)
+
+    def clear(self):
+        """Forget every tracked member."""
+        self._channels.clear()
+        self._member_channel.clear()
+
+    def eligible(
+        self,
+        excluded_channels: Set[str] = frozenset(),
+        exclude_solo: bool = True,
+        exclude_muted: bool = True
+    ) -> Iterator[Tuple[str, str, str]]:
+        """
+        Members who should be credited for the current interval.
+
+        Args:
+            excluded_channels: Channel IDs that never earn XP (e.g. AFK channels)
+            exclude_solo: Skip channels with fewer than two tracked members
+            exclude_muted: Skip self-muted or self-deafened members
+
+        Yields:
+            (guild_id, channel_id, user_id)
+        """
+        for (guild_id, channel_id), members in self._channels.items():
+            if channel_id in excluded_channels:
+                continue
+            if exclude_solo and len(members) < 2:
+                continue
+            for user_id, muted in members.items():
+                if exclude_muted and muted:
+                    continue
+                yield guild_id, channel_id, user_id
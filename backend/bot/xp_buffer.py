@@ -0,0 +1,209 @@
+"""
+XP Event Buffer
+Coalesces XP awards on the bot side and ships them to the API in batches.
+"""
+import asyncio
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from models.xp import MAX_BATCH_EVENTS
+
+
+# (guild_id, discord_id, event_type) -> [xp_amount, channel_id]
+BufferKey = Tuple[str, str, str]
+FlushCallback = Callable[[List[dict]], Awaitable[None]]
+
+
+class XPEventBuffer:
+    """
+    Merges XP awards per guild member and event type and flushes them periodically.
+
+    A flush happens every `flush_interval` seconds or as soon as
+    `flush_size` distinct entries are buffered. Only one flush is in flight
+    at a time; while it runs new awards keep coalescing. Entries are sent in
+    batches of at most `flush_size` (and never more than the API accepts)
+    and stay buffered until their batch is delivered.
+
+    A batch that fails in transit or with a 5xx stops the flush; the loop
+    then backs off exponentially (up to `max_retry_delay`) before trying
+    again, ignoring early flush requests meanwhile. Batches the API rejects
+    with a 4xx would fail again and are dropped. Once `max_entries` are
+    buffered `add` waits for room (backpressure), but for one flush cycle at
+    most; awards still without room after that are dropped.
+    """
+
+    def __init__(
+        self,
+        flush_callback: FlushCallback,
+        flush_interval: float = 2.0,
+        flush_size: int = 500,
+        max_entries: int = 5000,
+        max_retry_delay: float = 60.0,
+        dropped: Optional[Dict[str, int]] = None
+    ):
+        """
+        Initialize the buffer.
+
+        Args:
+            flush_callback: Coroutine that sends a list of batch events to the API
+            flush_interval: Seconds between time-based flushes
+            flush_size: Buffered entries that trigger an early flush
+            max_entries: Buffered entries at which add() starts waiting (at most MAX_BATCH_EVENTS)
+            max_retry_delay: Longest wait between flush attempts while the API is failing
+            dropped: Counts to increment by reason ("rejected", "buffer_full", "shutdown") for dropped entries
+        """
+        if max(max_entries, flush_size) > MAX_BATCH_EVENTS:
+            raise ValueError(f"XP buffer max_entries and flush_size must not exceed {MAX_BATCH_EVENTS}")
+        self.flush_callback = flush_callback
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.max_entries = max(max_entries, flush_size)
+        self.max_retry_delay = max_retry_delay
+        self.dropped = dropped if dropped is not None else defaultdict(int)
+
+        self._pending: Dict[BufferKey, list] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_requested = asyncio.Event()
+        self._space_available = asyncio.Event()
+        self._space_available.set()
+        self._stopping = asyncio.Event()
+        self._retry_delay = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        """Start the background flush loop."""
+        if self._task is None:
+            self._closed = False
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        """Stop the flush loop and try once more to send everything still buffered."""
+        self._closed = True
+        # Wake the loop rather than cancelling it so an in-flight batch is not lost
+        self._stopping.set()
+        self._flush_requested.set()
+        self._space_available.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
+        if self._pending:
+            print(f"[XPBuffer] Dropped {len(self._pending)} unsent XP entries on shutdown")
+            self.dropped["shutdown"] += len(self._pending)
+            self._pending.clear()
+
+    async def add(self, guild_id: str, discord_id: str, event_type: str, xp_amount: int, channel_id: str = None):
+        """
+        Buffer an XP award, merging it with earlier awards for the same member and event type.
+
+        Returns immediately unless the buffer is full, in which case it waits
+        up to one flush cycle for room and drops the award if there is none.
+        """
+        key = (guild_id, discord_id, event_type)
+
+        if self._is_full(key):
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.flush_interval + self._retry_delay
+            while self._is_full(key):
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    self.dropped["buffer_full"] += 1
+                    return
+                self._space_available.clear()
+                if not self._retry_delay:
+                    self._flush_requested.set()
+                try:
+                    await asyncio.wait_for(self._space_available.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+        entry = self._pending.get(key)
+        if entry is None:
+            self._pending[key] = [xp_amount, channel_id]
+            if len(self._pending) >= self.flush_size:
+                self._flush_requested.set()
+        else:
+            entry[0] += xp_amount
+            if channel_id is not None:
+                entry[1] = channel_id
+
+    def _is_full(self, key: BufferKey) -> bool:
+        """Whether an award for this key has to wait for room."""
+        return key not in self._pending and len(self._pending) >= self.max_entries and not self._closed
+
+    async def flush(self) -> bool:
+        """
+        Send buffered entries in batches of at most flush_size.
+
+        Returns:
+            False if a batch failed in transit or with a 5xx (it and later batches stay buffered)
+        """
+        async with self._flush_lock:
+            # Snapshot amounts; awards added while a batch is in flight keep accumulating in place
+            items = [(key, entry[0], entry[1]) for key, entry in self._pending.items()]
+
+            chunk_size = min(self.flush_size, MAX_BATCH_EVENTS)
+            for start in range(0, len(items), chunk_size):
+                chunk = items[start:start + chunk_size]
+                events = [
+                    {
+                        "guild_id": guild_id,
+                        "discord_id": discord_id,
+                        "event_type": event_type,
+                        "xp_amount": xp_amount,
+                        "channel_id": channel_id
+                    }
+                    for (guild_id, discord_id, event_type), xp_amount, channel_id in chunk
+                ]
+
+                try:
+                    await self.flush_callback(events)
+                except Exception as e:
+                    status = getattr(e, "status", None)
+                    if status is None or status >= 500:
+                        print(f"[XPBuffer] Flush of {len(events)} entries failed, will retry: {e}")
+                        return False
+                    print(f"[XPBuffer] API rejected {len(events)} entries ({status}), dropping them: {e}")
+                    self.dropped["rejected"] += len(events)
+
+                self._remove_sent(chunk)
+            return True
+
+    def _remove_sent(self, chunk: List[Tuple[BufferKey, int, Optional[str]]]):
+        """Take delivered (or dropped) amounts out of the buffer and wake waiting awards."""
+        for key, xp_amount, _ in chunk:
+            entry = self._pending.get(key)
+            if entry is None:
+                continue
+            entry[0] -= xp_amount
+            if entry[0] <= 0:
+                del self._pending[key]
+        if len(self._pending) < self.max_entries:
+            self._space_available.set()
+
+    async def _flush_loop(self):
+        """Flush on the interval or early when the size threshold is hit; back off while flushes fail."""
+        while not self._closed:
+            if self._retry_delay:
+                # Flush requests from waiting awards are ignored until the delay is over
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self._retry_delay)
+                except asyncio.TimeoutError:
+                    pass
+                if self._closed:
+                    break
+            else:
+                try:
+                    await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._flush_requested.clear()
+            if await self.flush():
+                self._retry_delay = 0.0
+            else:
+                self._retry_delay = min(max(2 * self._retry_delay, self.flush_interval), self.max_retry_delay)
@@ -21,19 +21,79 @@ class Settings(BaseSettings):
     supabase_url: str
     supabase_key: str
     
+    # Database backend: "postgres", or "memory" for the in-process MockDatabase (local load tests)
+    database_backend: str = "postgres"
+    mock_db_latency_ms: float = 0.0  # Simulated round trip per call with the memory backend
+    
+    # Database connection pool
+    db_pool_min_size: int = 5
+    db_pool_max_size: int = 20
+    db_statement_cache_size: int = 100  # Set to 0 behind PgBouncer in transaction mode
+    db_command_timeout: float = 5.0  # Per-query timeout in seconds
+    
     # Discord
     discord_token: str
     discord_client_id: str
     discord_client_secret: str
     discord_redirect_uri: str = "http://localhost:3000/auth/callback"
     
+    # Bot XP batching
+    xp_flush_interval: float = 2.0  # Seconds between batch flushes
+    xp_flush_size: int = 500  # Buffered entries that trigger an early flush
+    xp_buffer_max_entries: int = 5000  # Buffered entries before awards wait on the API (at most 5000, the batch limit)
+    xp_flush_timeout: float = 10.0  # HTTP timeout for a batch request
+    xp_flush_max_retry_delay: float = 60.0  # Longest back-off between flushes while the API is failing
+    
+    # Bot voice XP
+    voice_xp_interval: float = 60.0  # Seconds between voice XP credits
+    voice_xp_exclude_afk: bool = True  # No XP in guild AFK channels
+    voice_xp_exclude_solo: bool = True  # No XP when alone in a channel
+    voice_xp_exclude_muted: bool = True  # No XP while self-muted or self-deafened
+    voice_xp_excluded_channels: str = ""  # Comma-separated channel IDs that never earn XP
+    
+    # Bot leveling profiles
+    leveling_profile_refresh_interval: float = 300.0  # Seconds between per-guild profile refreshes
+    
+    # Bot metrics
+    bot_metrics_port: int = 9100  # Prometheus scrape port for the bot process (0 disables)
+    
     # API
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     api_secret_key: str
+    api_workers: int = 1  # uvicorn worker processes; more than 1 needs SOCKETIO_MESSAGE_QUEUE
+    
+    # Leaderboard cache
+    leaderboard_cache_ttl: float = 5.0  # Max staleness of a cached page in seconds
+    leaderboard_cache_max_pages: int = 10000
+    
+    # XP event retention
+    xp_events_retention_days: int = 90  # Raw xp_events kept for this many days; daily totals are kept forever
+    xp_daily_totals_max_days: int = 366  # Longest range the daily XP endpoints return
+    
+    # Tools catalog cache
+    tools_catalog_refresh_interval: float = 30.0  # Seconds between checks for tool changes made by other workers
     
     # Socket.IO
     socket_io_secret: str
+    socket_token_ttl: float = 86400.0  # Seconds a Socket.IO auth token stays valid
+    socketio_message_queue: str = ""  # redis://... or local://host:port shared by all API workers; empty for one worker
+    socketio_channel: str = "hub-socketio"  # Pub/sub channel on the message queue
+    leaderboard_stream_interval: float = 1.0  # Seconds between leaderboard_delta ticks
+    leaderboard_stream_size: int = 25  # Top entries streamed per guild
+    
+    # Health probes
+    health_db_timeout: float = 1.0  # Seconds before the readiness DB ping counts as failed
+    health_max_db_latency_ms: float = 250.0  # Not ready above this DB round trip
+    health_max_loop_lag_ms: float = 200.0  # Not ready above this average event-loop lag
+    loop_lag_sample_interval: float = 0.5  # Seconds between event-loop lag samples
+    loop_lag_window: int = 20  # Samples averaged for readiness
+    
+    # Profiling (API and bot; everything here is off by default)
+    profile_sample_every: int = 0  # Profile 1 in N HTTP requests (0 disables)
+    profile_sample_interval: float = 0.005  # Seconds between stack samples
+    profile_output_dir: str = "profiles"  # Where folded-stack profiles are written
+    slow_callback_threshold_ms: float = 0.0  # Log the stack of callbacks blocking the loop longer than this (0 disables)
     
     # AI (Optional)
     lm_studio_url: Optional[str] = "http://localhost:1234"
@@ -49,6 +109,15 @@ class Settings(BaseSettings):
         """Check if running in production."""
         return self.environment == "production"
     
+    @property
+    def voice_xp_excluded_channel_ids(self) -> set[str]:
+        """Get configured voice channel IDs excluded from voice XP."""
+        return {
+            channel_id.strip()
+            for channel_id in self.voice_xp_excluded_channels.split(",")
+            if channel_id.strip()
+        }
+    
     @property
     def cors_origins(self) -> list[str]:
         """Get CORS allowed origins based on environment."""
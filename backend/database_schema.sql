@@ -10,16 +10,19 @@ CREATE EXTENSION IF NOT EXISTS vector;
 -- Users table
 CREATE TABLE users (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-    discord_id TEXT UNIQUE NOT NULL,
+    guild_id TEXT NOT NULL DEFAULT 'global',
+    discord_id TEXT NOT NULL,
     username TEXT NOT NULL,
     avatar_url TEXT,
     xp INTEGER DEFAULT 0 CHECK (xp >= 0),
     level INTEGER DEFAULT 1 CHECK (level >= 1),
     rank_tier TEXT DEFAULT 'Basic' CHECK (rank_tier IN ('Basic', 'Member', 'Advanced', 'Elite', 'Master')),
     streak_days INTEGER DEFAULT 0 CHECK (streak_days >= 0),
+    unlocked_tools_count INTEGER NOT NULL DEFAULT 0 CHECK (unlocked_tools_count >= 0),
     last_active TIMESTAMP WITH TIME ZONE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE (guild_id, discord_id)
 );
 
 -- Tools table
@@ -48,6 +51,7 @@ CREATE TABLE user_tool_access (
 -- XP events table
 CREATE TABLE xp_events (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    guild_id TEXT NOT NULL DEFAULT 'global',
     user_id UUID REFERENCES users(id) ON DELETE CASCADE,
     event_type TEXT NOT NULL,
     xp_amount INTEGER NOT NULL,
@@ -56,6 +60,29 @@ CREATE TABLE xp_events (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Per member, UTC day and event type XP totals, kept by a trigger on xp_events.
+-- Raw events past the retention window are deleted; these totals are kept.
+CREATE TABLE xp_daily_totals (
+    guild_id TEXT NOT NULL,
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    event_type TEXT NOT NULL,
+    events INTEGER NOT NULL,
+    xp BIGINT NOT NULL,
+    PRIMARY KEY (guild_id, user_id, day, event_type)
+);
+
+-- Per-guild leveling profiles, compiled to level thresholds and tier bands by the API
+CREATE TABLE guild_leveling_profiles (
+    guild_id TEXT PRIMARY KEY,
+    profile JSONB NOT NULL,
+    level_thresholds BIGINT[] NOT NULL,
+    tier_starts INTEGER[] NOT NULL,
+    tier_names TEXT[] NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
 -- Achievements table (future feature)
 CREATE TABLE achievements (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -78,10 +105,12 @@ CREATE TABLE user_achievements (
 
 -- Indexes for performance
 CREATE INDEX idx_users_discord_id ON users(discord_id);
-CREATE INDEX idx_users_xp ON users(xp DESC);
-CREATE INDEX idx_users_level ON users(level DESC);
-CREATE INDEX idx_xp_events_user_id ON xp_events(user_id);
-CREATE INDEX idx_xp_events_created_at ON xp_events(created_at DESC);
+CREATE INDEX idx_users_guild_xp ON users(guild_id, xp DESC, discord_id);
+CREATE INDEX idx_users_guild_level ON users(guild_id, level DESC);
+CREATE INDEX idx_xp_events_guild_user_created ON xp_events(guild_id, user_id, created_at DESC);
+CREATE INDEX idx_xp_events_guild_created ON xp_events(guild_id, created_at DESC);
+CREATE INDEX idx_xp_events_created_brin ON xp_events USING BRIN (created_at);
+CREATE INDEX idx_xp_daily_totals_guild_day ON xp_daily_totals(guild_id, day);
 CREATE INDEX idx_tools_tier ON tools(tier);
 CREATE INDEX idx_tools_required_level ON tools(required_level);
 CREATE INDEX idx_user_tool_access_user_id ON user_tool_access(user_id);
@@ -102,11 +131,280 @@ CREATE TRIGGER update_users_updated_at BEFORE UPDATE ON users
 CREATE TRIGGER update_tools_updated_at BEFORE UPDATE ON tools
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER update_guild_leveling_profiles_updated_at BEFORE UPDATE ON guild_leveling_profiles
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Unlocked tool counts: statement-level triggers keep users.unlocked_tools_count
+-- in step with user_tool_access, one UPDATE per INSERT/DELETE statement
+
+-- Add newly granted tools to their users' counts.
+-- Users are locked in id order first so concurrent bulk grants cannot deadlock.
+CREATE OR REPLACE FUNCTION count_granted_tools()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM 1 FROM users
+    WHERE id IN (SELECT user_id FROM granted)
+    ORDER BY id
+    FOR UPDATE;
+
+    UPDATE users u
+    SET unlocked_tools_count = u.unlocked_tools_count + g.tool_count
+    FROM (
+        SELECT user_id, COUNT(*)::INTEGER AS tool_count
+        FROM granted
+        GROUP BY user_id
+    ) g
+    WHERE u.id = g.user_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Subtract revoked tools (including cascades from deleted tools) from their users' counts
+CREATE OR REPLACE FUNCTION count_revoked_tools()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM 1 FROM users
+    WHERE id IN (SELECT user_id FROM revoked)
+    ORDER BY id
+    FOR UPDATE;
+
+    UPDATE users u
+    SET unlocked_tools_count = GREATEST(0, u.unlocked_tools_count - r.tool_count)
+    FROM (
+        SELECT user_id, COUNT(*)::INTEGER AS tool_count
+        FROM revoked
+        GROUP BY user_id
+    ) r
+    WHERE u.id = r.user_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER count_user_tool_access_insert AFTER INSERT ON user_tool_access
+    REFERENCING NEW TABLE AS granted
+    FOR EACH STATEMENT EXECUTE FUNCTION count_granted_tools();
+
+CREATE TRIGGER count_user_tool_access_delete AFTER DELETE ON user_tool_access
+    REFERENCING OLD TABLE AS revoked
+    FOR EACH STATEMENT EXECUTE FUNCTION count_revoked_tools();
+
+-- Daily XP rollups: one upsert per INSERT statement on xp_events folds the
+-- logged events into xp_daily_totals. award_xp() and award_xp_batch() hold
+-- the members' users rows locked, so concurrent upserts cannot deadlock.
+CREATE OR REPLACE FUNCTION roll_up_xp_events()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO xp_daily_totals AS t (guild_id, user_id, day, event_type, events, xp)
+    SELECT guild_id, user_id, (created_at AT TIME ZONE 'UTC')::date, event_type, COUNT(*), SUM(xp_amount)
+    FROM logged
+    WHERE user_id IS NOT NULL
+    GROUP BY 1, 2, 3, 4
+    ORDER BY 1, 2, 3, 4
+    ON CONFLICT (guild_id, user_id, day, event_type) DO UPDATE
+    SET events = t.events + EXCLUDED.events,
+        xp = t.xp + EXCLUDED.xp;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER roll_up_xp_events_insert AFTER INSERT ON xp_events
+    REFERENCING NEW TABLE AS logged
+    FOR EACH STATEMENT EXECUTE FUNCTION roll_up_xp_events();
+
+-- XP award functions (level/tier math mirrors LevelingService)
+
+-- Total XP required to reach a level: BASE_XP * level^2 + COEFFICIENT * level + CONSTANT
+CREATE OR REPLACE FUNCTION xp_for_level(p_level INTEGER)
+RETURNS BIGINT AS $$
+    SELECT 100::BIGINT * p_level * p_level + 50::BIGINT * p_level + 0;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Level for a total XP value, corrected to be exact at level thresholds
+CREATE OR REPLACE FUNCTION level_for_xp(p_xp INTEGER)
+RETURNS INTEGER AS $$
+DECLARE
+    lvl INTEGER;
+BEGIN
+    lvl := floor((-50 + sqrt(2500 + 400.0 * p_xp)) / 200)::INTEGER;
+    WHILE xp_for_level(lvl + 1) <= p_xp LOOP
+        lvl := lvl + 1;
+    END LOOP;
+    WHILE lvl > 0 AND xp_for_level(lvl) > p_xp LOOP
+        lvl := lvl - 1;
+    END LOOP;
+    RETURN GREATEST(1, lvl);
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- Rank tier for a level (LevelingService.TIERS)
+CREATE OR REPLACE FUNCTION tier_for_level(p_level INTEGER)
+RETURNS TEXT AS $$
+    SELECT CASE
+        WHEN p_level <= 10 THEN 'Basic'
+        WHEN p_level <= 25 THEN 'Member'
+        WHEN p_level <= 50 THEN 'Advanced'
+        WHEN p_level <= 75 THEN 'Elite'
+        ELSE 'Master'
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Level for XP from compiled thresholds (level N needs p_thresholds[N]); NULL thresholds use the default curve
+CREATE OR REPLACE FUNCTION profile_level_for_xp(p_thresholds BIGINT[], p_xp INTEGER)
+RETURNS INTEGER AS $$
+    SELECT CASE
+        WHEN p_thresholds IS NULL THEN level_for_xp(p_xp)
+        ELSE GREATEST(1, width_bucket(p_xp::BIGINT, p_thresholds))
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Tier for a level from compiled tier bands; NULL bands use the default tiers
+CREATE OR REPLACE FUNCTION profile_tier_for_level(p_tier_starts INTEGER[], p_tier_names TEXT[], p_level INTEGER)
+RETURNS TEXT AS $$
+    SELECT CASE
+        WHEN p_tier_names IS NULL THEN tier_for_level(p_level)
+        ELSE p_tier_names[GREATEST(1, width_bucket(p_level, p_tier_starts))]
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Add XP to a guild member, recompute level/tier and log the event in one transaction.
+-- The row lock serializes concurrent awards for the same user so none are lost.
+-- Returns no row if the user does not exist in the guild.
+CREATE OR REPLACE FUNCTION award_xp(
+    p_guild_id TEXT,
+    p_discord_id TEXT,
+    p_event_type TEXT,
+    p_xp_amount INTEGER,
+    p_channel_id TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+    user_id UUID,
+    old_xp INTEGER,
+    new_xp INTEGER,
+    old_level INTEGER,
+    new_level INTEGER,
+    rank_tier TEXT
+) AS $$
+#variable_conflict use_column
+DECLARE
+    v_user_id UUID;
+    v_old_xp INTEGER;
+    v_old_level INTEGER;
+    v_new_xp INTEGER;
+    v_new_level INTEGER;
+    v_tier TEXT;
+    v_thresholds BIGINT[];
+    v_tier_starts INTEGER[];
+    v_tier_names TEXT[];
+BEGIN
+    SELECT id, xp, level INTO v_user_id, v_old_xp, v_old_level
+    FROM users
+    WHERE guild_id = p_guild_id AND discord_id = p_discord_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+
+    SELECT level_thresholds, tier_starts, tier_names INTO v_thresholds, v_tier_starts, v_tier_names
+    FROM guild_leveling_profiles
+    WHERE guild_id = p_guild_id;
+
+    v_new_xp := v_old_xp + p_xp_amount;
+    v_new_level := profile_level_for_xp(v_thresholds, v_new_xp);
+    v_tier := profile_tier_for_level(v_tier_starts, v_tier_names, v_new_level);
+
+    UPDATE users
+    SET xp = v_new_xp,
+        level = v_new_level,
+        rank_tier = v_tier,
+        last_active = NOW()
+    WHERE id = v_user_id;
+
+    INSERT INTO xp_events (guild_id, user_id, event_type, xp_amount, channel_id)
+    VALUES (p_guild_id, v_user_id, p_event_type, p_xp_amount, p_channel_id);
+
+    RETURN QUERY SELECT v_user_id, v_old_xp, v_new_xp, v_old_level, v_new_level, v_tier;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Apply many XP events at once: totals are grouped per guild member, every
+-- affected user is updated by one UPDATE and all events are logged by one INSERT.
+-- Users are locked in id order so concurrent batches cannot deadlock.
+-- Events for unknown members are skipped.
+CREATE OR REPLACE FUNCTION award_xp_batch(
+    p_guild_ids TEXT[],
+    p_discord_ids TEXT[],
+    p_event_types TEXT[],
+    p_xp_amounts INTEGER[],
+    p_channel_ids TEXT[]
+)
+RETURNS TABLE (
+    guild_id TEXT,
+    discord_id TEXT,
+    user_id UUID,
+    xp_gained INTEGER,
+    old_xp INTEGER,
+    new_xp INTEGER,
+    old_level INTEGER,
+    new_level INTEGER,
+    rank_tier TEXT
+) AS $$
+#variable_conflict use_column
+BEGIN
+    RETURN QUERY
+    WITH events AS (
+        SELECT *
+        FROM unnest(p_guild_ids, p_discord_ids, p_event_types, p_xp_amounts, p_channel_ids)
+            AS e(guild_id, discord_id, event_type, xp_amount, channel_id)
+    ),
+    totals AS (
+        SELECT e.guild_id, e.discord_id, SUM(e.xp_amount)::INTEGER AS xp_gained
+        FROM events e
+        GROUP BY e.guild_id, e.discord_id
+    ),
+    locked AS (
+        SELECT u.id, u.guild_id, u.discord_id, u.xp, u.level
+        FROM users u
+        JOIN totals t ON t.guild_id = u.guild_id AND t.discord_id = u.discord_id
+        ORDER BY u.id
+        FOR UPDATE OF u
+    ),
+    leveled AS (
+        SELECT l.id, t.xp_gained, l.xp + t.xp_gained AS new_xp,
+               profile_level_for_xp(p.level_thresholds, l.xp + t.xp_gained) AS new_level,
+               p.tier_starts, p.tier_names
+        FROM locked l
+        JOIN totals t ON t.guild_id = l.guild_id AND t.discord_id = l.discord_id
+        LEFT JOIN guild_leveling_profiles p ON p.guild_id = l.guild_id
+    ),
+    updated AS (
+        UPDATE users u
+        SET xp = lv.new_xp,
+            level = lv.new_level,
+            rank_tier = profile_tier_for_level(lv.tier_starts, lv.tier_names, lv.new_level),
+            last_active = NOW()
+        FROM locked l
+        JOIN leveled lv ON lv.id = l.id
+        WHERE u.id = l.id
+        RETURNING u.guild_id, u.discord_id, u.id, lv.xp_gained, l.xp, u.xp, l.level, u.level, u.rank_tier
+    ),
+    logged AS (
+        INSERT INTO xp_events (guild_id, user_id, event_type, xp_amount, channel_id)
+        SELECT up.guild_id, up.id, e.event_type, e.xp_amount, e.channel_id
+        FROM events e
+        JOIN updated up ON up.guild_id = e.guild_id AND up.discord_id = e.discord_id
+    )
+    SELECT * FROM updated;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Row Level Security (RLS) policies
 ALTER TABLE users ENABLE ROW LEVEL SECURITY;
 ALTER TABLE tools ENABLE ROW LEVEL SECURITY;
 ALTER TABLE user_tool_access ENABLE ROW LEVEL SECURITY;
 ALTER TABLE xp_events ENABLE ROW LEVEL SECURITY;
+ALTER TABLE guild_leveling_profiles ENABLE ROW LEVEL SECURITY;
+ALTER TABLE xp_daily_totals ENABLE ROW LEVEL SECURITY;
 
 -- Allow service role full access (for backend API)
 CREATE POLICY "Service role has full access to users" ON users
@@ -121,6 +419,12 @@ CREATE POLICY "Service role has full access to user_tool_access" ON user_tool_ac
 CREATE POLICY "Service role has full access to xp_events" ON xp_events
     FOR ALL USING (auth.role() = 'service_role');
 
+CREATE POLICY "Service role has full access to guild_leveling_profiles" ON guild_leveling_profiles
+    FOR ALL USING (auth.role() = 'service_role');
+
+CREATE POLICY "Service role has full access to xp_daily_totals" ON xp_daily_totals
+    FOR ALL USING (auth.role() = 'service_role');
+
 -- Public read access to tools
 CREATE POLICY "Anyone can view enabled tools" ON tools
     FOR SELECT USING (enabled = TRUE);
@@ -0,0 +1,4 @@
+"""
+Maintenance jobs that run against the database outside the API process.
+Run from the backend directory, e.g. ``python -m jobs.recalculate_levels``.
+"""
@@ -0,0 +1,101 @@
+"""
+XP event compaction job.
+
+Deletes raw xp_events rows older than the retention window
+(XP_EVENTS_RETENTION_DAYS). Their XP is already counted in xp_daily_totals
+by the roll_up_xp_events trigger, so daily history and guild analytics keep
+every day; only /xp-history loses events past the window. Rows are deleted
+in small batches, each its own short statement that skips rows locked by
+other transactions, with a pause in between so the job never holds long
+locks or saturates the database while awards keep coming in. The cutoff is
+a UTC day boundary, so a day is either fully kept or fully compacted.
+
+Usage (from the backend directory):
+    python -m jobs.compact_xp_events
+    python -m jobs.compact_xp_events --retention-days 30 --batch-size 2000 --pause 0.5
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, time as day_start, timedelta, timezone
+from typing import Callable, Optional
+
+from config import settings
+from services.database import db
+
+
+def retention_cutoff(retention_days: int, now: Optional[datetime] = None) -> datetime:
+    """
+    Start of the oldest UTC day still kept in raw form.
+
+    Args:
+        retention_days: Whole days of raw events to keep, today included
+        now: Current time (defaults to the wall clock)
+
+    Returns:
+        Aware UTC datetime; events logged before it are compacted
+    """
+    today = (now or datetime.now(timezone.utc)).astimezone(timezone.utc).date()
+    return datetime.combine(today - timedelta(days=retention_days - 1), day_start(), tzinfo=timezone.utc)
+
+
+async def compact_xp_events(
+    cutoff: datetime,
+    batch_size: int = 5000,
+    pause: float = 0.1,
+    on_batch: Optional[Callable[[int], None]] = None
+) -> int:
+    """
+    Delete raw XP events logged before a cutoff.
+
+    Args:
+        cutoff: Events logged before this time are deleted
+        batch_size: Rows deleted per statement
+        pause: Seconds to wait between batches
+        on_batch: Called with the running total after every batch
+
+    Returns:
+        Rows deleted
+    """
+    deleted = 0
+    while True:
+        count = await db.delete_xp_events_before(cutoff, batch_size)
+        deleted += count
+        if on_batch and count:
+            on_batch(deleted)
+        if count < batch_size:
+            return deleted
+        await asyncio.sleep(pause)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Delete raw XP events past the retention window")
+    parser.add_argument("--retention-days", type=int, default=settings.xp_events_retention_days,
+                        help="Days of raw events to keep, today included")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows deleted per statement")
+    parser.add_argument("--pause", type=float, default=0.1, help="Seconds between batches")
+    args = parser.parse_args()
+
+    if args.retention_days < 1:
+        parser.error("--retention-days must be at least 1")
+
+    cutoff = retention_cutoff(args.retention_days)
+    print(f"[Compact] Deleting xp_events logged before {cutoff.isoformat()}")
+
+    await db.connect()
+    try:
+        started = time.perf_counter()
+
+        def report(deleted: int) -> None:
+            elapsed = time.perf_counter() - started
+            rate = deleted / elapsed if elapsed > 0 else 0.0
+            print(f"[Compact] deleted {deleted}, {rate:,.0f} rows/s")
+
+        deleted = await compact_xp_events(cutoff, args.batch_size, args.pause, on_batch=report)
+        print(f"[Compact] Done in {time.perf_counter() - started:.1f}s: {deleted} deleted")
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,216 @@
+"""
+Level recalculation job.
+
+Recomputes users.level and users.rank_tier after the XP curve or tiers
+change. Each guild is recalculated with its own leveling profile from
+guild_leveling_profiles, or with the default curve (LevelingService.BASE_XP /
+COEFFICIENT / CONSTANT / TIERS) if it has none. Users are read in
+keyset-paginated pages, levels and tiers are computed per guild with the
+NumPy level tables, and only rows whose values changed are written back, in
+one bulk UPDATE per page. Every page is its own short
+statement, so the table is never locked as a whole and memory stays at one
+page. A checkpoint file records the last key processed so an interrupted
+run can resume where it stopped.
+
+After changing the default curve, remember to update
+xp_for_level()/level_for_xp()/tier_for_level() in the database as well, or
+award_xp() will keep writing levels from the old curve for guilds without a
+profile. Setting a guild's profile through the API recalculates that guild
+by itself.
+
+Usage (from the backend directory):
+    python -m jobs.recalculate_levels
+    python -m jobs.recalculate_levels --guild-id 123456789 --batch-size 10000
+    python -m jobs.recalculate_levels --checkpoint recalc.json --resume
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+from services.database import db
+from services.level_table import LevelTable
+from services.leveling_profiles import LevelingProfileRegistry, leveling_profiles, load_compiled_profile
+
+
+class RecalculationProgress:
+    """Counters and keyset cursor for a recalculation run."""
+
+    __slots__ = ("guild_id", "after_guild_id", "after_discord_id", "scanned", "updated", "skipped", "done")
+
+    def __init__(
+        self,
+        guild_id: Optional[str] = None,
+        after_guild_id: str = "",
+        after_discord_id: str = "",
+        scanned: int = 0,
+        updated: int = 0,
+        skipped: int = 0,
+        done: bool = False
+    ):
+        self.guild_id = guild_id
+        self.after_guild_id = after_guild_id
+        self.after_discord_id = after_discord_id
+        self.scanned = scanned
+        self.updated = updated
+        self.skipped = skipped
+        self.done = done
+
+    def to_dict(self) -> dict:
+        """Serialize for the checkpoint file."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RecalculationProgress":
+        """Restore from a checkpoint file."""
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+
+def save_checkpoint(path: str, progress: RecalculationProgress) -> None:
+    """Write the checkpoint atomically so a crash never leaves a torn file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(progress.to_dict(), f)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str) -> Optional[RecalculationProgress]:
+    """Load a checkpoint written by save_checkpoint, or None if there is none."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return RecalculationProgress.from_dict(json.load(f))
+
+
+async def recalculate_levels(
+    table: Optional[LevelTable] = None,
+    guild_id: Optional[str] = None,
+    batch_size: int = 5000,
+    progress: Optional[RecalculationProgress] = None,
+    on_page: Optional[Callable[[RecalculationProgress], None]] = None,
+    profiles: LevelingProfileRegistry = leveling_profiles
+) -> RecalculationProgress:
+    """
+    Bring stored levels and tiers in line with each guild's level table.
+
+    Args:
+        table: Level table to apply to every row (each guild's profile table if None)
+        guild_id: Only recalculate this guild's members (all guilds if None)
+        batch_size: Users read and written per page
+        progress: Progress to resume from (e.g. a loaded checkpoint)
+        on_page: Called after every page, e.g. to report progress or save a checkpoint
+        profiles: Loaded guild profiles used when no table is given
+
+    Returns:
+        Final progress
+    """
+    if progress is None:
+        progress = RecalculationProgress(guild_id=guild_id)
+
+    while not progress.done:
+        rows = await db.get_user_levels_page(
+            progress.after_guild_id,
+            progress.after_discord_id,
+            batch_size,
+            guild_id=progress.guild_id
+        )
+        if not rows:
+            progress.done = True
+            if on_page:
+                on_page(progress)
+            break
+
+        xp_values = np.fromiter((row['xp'] for row in rows), dtype=np.int64, count=len(rows))
+        levels = np.empty(len(rows), dtype=np.int64)
+        tiers = np.empty(len(rows), dtype=object)
+        # Pages are ordered by guild, so each guild's rows are one contiguous slice
+        start = 0
+        while start < len(rows):
+            page_guild_id = rows[start]['guild_id']
+            end = start + 1
+            while end < len(rows) and rows[end]['guild_id'] == page_guild_id:
+                end += 1
+            guild_table = table or profiles.get(page_guild_id).level_table
+            levels[start:end] = guild_table.levels_for(xp_values[start:end])
+            tiers[start:end] = guild_table.tiers_for(levels[start:end])
+            start = end
+
+        stored_levels = np.fromiter((row['level'] for row in rows), dtype=np.int64, count=len(rows))
+        stored_tiers = np.array([row['rank_tier'] for row in rows], dtype=object)
+        changed = np.flatnonzero((levels != stored_levels) | (tiers != stored_tiers))
+
+        if changed.size:
+            updated = await db.update_user_levels(
+                [rows[i]['guild_id'] for i in changed],
+                [rows[i]['discord_id'] for i in changed],
+                xp_values[changed].tolist(),
+                levels[changed].tolist(),
+                tiers[changed].tolist()
+            )
+            progress.updated += updated
+            progress.skipped += int(changed.size) - updated
+
+        progress.scanned += len(rows)
+        progress.after_guild_id = rows[-1]['guild_id']
+        progress.after_discord_id = rows[-1]['discord_id']
+        if on_page:
+            on_page(progress)
+
+    return progress
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Recalculate stored user levels and tiers")
+    parser.add_argument("--guild-id", help="Only recalculate this guild")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Users per page")
+    parser.add_argument("--checkpoint", default="recalculate_levels.checkpoint.json", help="Checkpoint file path")
+    parser.add_argument("--resume", action="store_true", help="Continue from the checkpoint file")
+    args = parser.parse_args()
+
+    progress = None
+    if args.resume:
+        progress = load_checkpoint(args.checkpoint)
+        if progress is None:
+            print(f"No checkpoint at {args.checkpoint}, starting from the beginning")
+        elif progress.done:
+            print(f"Checkpoint {args.checkpoint} is already complete, nothing to do")
+            return
+        else:
+            args.guild_id = progress.guild_id
+            print(f"Resuming after ({progress.after_guild_id}, {progress.after_discord_id}), "
+                  f"{progress.scanned} already scanned")
+
+    await db.connect()
+    try:
+        leveling_profiles.load(load_compiled_profile(row) for row in await db.get_leveling_profiles())
+        print(f"[Recalc] Loaded {len(leveling_profiles)} guild leveling profiles")
+        total = await db.estimate_user_count(args.guild_id)
+        started = time.perf_counter()
+        scanned_at_start = progress.scanned if progress else 0
+
+        def report(current: RecalculationProgress) -> None:
+            save_checkpoint(args.checkpoint, current)
+            elapsed = time.perf_counter() - started
+            rate = (current.scanned - scanned_at_start) / elapsed if elapsed > 0 else 0.0
+            percent = f" ({min(100.0, current.scanned / total * 100):.1f}%)" if total else ""
+            print(f"[Recalc] scanned {current.scanned}{percent}, updated {current.updated}, "
+                  f"skipped {current.skipped}, {rate:,.0f} users/s")
+
+        result = await recalculate_levels(
+            guild_id=args.guild_id,
+            batch_size=args.batch_size,
+            progress=progress,
+            on_page=report
+        )
+        print(f"[Recalc] Done in {time.perf_counter() - started:.1f}s: "
+              f"{result.scanned} scanned, {result.updated} updated, {result.skipped} changed concurrently")
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
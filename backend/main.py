@@ -2,28 +2,61 @@
 Discord Bot Hub - FastAPI Backend
 Main application entry point with FastAPI server and Socket.IO integration.
 """
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 import socketio
 import uvicorn
 
 from config import settings
+from services.database import db
+from services.rank_index import rank_indexes
+from services.leveling_profiles import leveling_profiles, load_compiled_profile
+from services.tool_catalog import keep_tool_catalog_fresh, refresh_tool_catalog
+from services.metrics import MetricsMiddleware, SOCKETIO_CLIENTS
+from services.health import check_event_loop, loop_lag_monitor, readiness
+from services.profiling import ProfilingMiddleware, SlowCallbackWatchdog
+from services.realtime import guild_room, release_peer_messages, sio, start_message_queue, user_room
+from services.socket_auth import verify_socket_token
+from services.leaderboard_stream import leaderboard_room, leaderboard_stream
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the database pool, then build the rank indexes and load leveling profiles and the tools catalog on startup."""
+    await db.connect()
+    # Subscribe before loading so writes from other workers during the load are replayed after it
+    start_message_queue()
+    rank_indexes.load(await db.get_all_user_xp())
+    leveling_profiles.load(load_compiled_profile(row) for row in await db.get_leveling_profiles())
+    await refresh_tool_catalog(force=True)
+    await release_peer_messages()
+    catalog_refresher = asyncio.create_task(keep_tool_catalog_fresh(settings.tools_catalog_refresh_interval))
+    lag_monitor = asyncio.create_task(loop_lag_monitor.run())
+    leaderboard_ticker = asyncio.create_task(leaderboard_stream.run())
+    watchdog = None
+    if settings.slow_callback_threshold_ms:
+        watchdog = SlowCallbackWatchdog(settings.slow_callback_threshold_ms / 1000, "API")
+        watchdog.start()
+    yield
+    if watchdog is not None:
+        watchdog.stop()
+    leaderboard_ticker.cancel()
+    lag_monitor.cancel()
+    catalog_refresher.cancel()
+    await db.disconnect()
 
-# Create Socket.IO server
-sio = socketio.AsyncServer(
-    async_mode='asgi',
-    cors_allowed_origins=settings.cors_origins,
-    logger=settings.debug,
-    engineio_logger=settings.debug
-)
 
 # Create FastAPI app
 app = FastAPI(
     title="Discord Bot Hub API",
     description="Backend API for Discord bot with leveling and tool unlock system",
     version="1.0.0",
-    debug=settings.debug
+    debug=settings.debug,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -35,6 +68,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency histograms per route (outermost, so CORS is included)
+app.add_middleware(MetricsMiddleware)
+
 # Combine FastAPI with Socket.IO
 socket_app = socketio.ASGIApp(
     sio,
@@ -42,6 +78,16 @@ socket_app = socketio.ASGIApp(
     socketio_path='/socket.io'
 )
 
+# Sample 1 in N requests, Socket.IO polling included (not installed at all when disabled)
+if settings.profile_sample_every:
+    socket_app = ProfilingMiddleware(
+        socket_app,
+        sample_every=settings.profile_sample_every,
+        output_dir=settings.profile_output_dir,
+        interval=settings.profile_sample_interval,
+        exclude_prefixes=("/api/debug/",)
+    )
+
 
 @app.get("/")
 async def root():
@@ -54,50 +100,127 @@ async def root():
     }
 
 
-@app.get("/health")
-async def health_check():
-    """Health check endpoint for monitoring."""
+def socketio_state() -> dict:
+    """Socket.IO server mode and connected client count."""
     return {
-        "status": "healthy",
-        "database": "connected",  # TODO: Add actual DB check
-        "socketio": "running"
+        "async_mode": sio.async_mode,
+        "connected_clients": len(sio.eio.sockets)
     }
 
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and its event loop is turning."""
+    return {
+        "status": "alive",
+        "event_loop": check_event_loop()
+    }
+
+
+@app.get("/health/ready")
+@app.get("/health")
+async def health_check():
+    """Readiness probe: 503 while the database is unreachable or slow, or the event loop is lagging."""
+    report = await readiness()
+    report["status"] = "healthy" if report["ready"] else "unavailable"
+    report["socketio"] = socketio_state()
+    return JSONResponse(
+        report,
+        status_code=status.HTTP_200_OK if report["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics in the text exposition format."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 # Socket.IO event handlers
 @sio.event
-async def connect(sid, environ):
-    """Handle client connection."""
+async def connect(sid, environ, auth=None):
+    """
+    Handle client connection.
+    
+    Clients passing auth={"token": ...} join their user room and their guild
+    rooms; clients without a token connect anonymously and join none. A bad
+    or expired token refuses the connection.
+    """
+    token = auth.get("token") if isinstance(auth, dict) else None
+    claims = None
+    if token:
+        claims = verify_socket_token(token)
+        if claims is None:
+            raise socketio.exceptions.ConnectionRefusedError("Invalid or expired token")
+        await sio.save_session(sid, {"discord_id": claims["sub"], "guilds": claims["guilds"]})
+        await sio.enter_room(sid, user_room(claims["sub"]))
+        for guild_id in claims["guilds"]:
+            await sio.enter_room(sid, guild_room(guild_id))
+    
     print(f"Client connected: {sid}")
-    await sio.emit('connection_established', {'sid': sid}, room=sid)
+    SOCKETIO_CLIENTS.inc()
+    await sio.emit('connection_established', {
+        'sid': sid,
+        'discord_id': claims["sub"] if claims else None,
+        'guilds': claims["guilds"] if claims else []
+    }, room=sid, ignore_queue=True)
 
 
 @sio.event
 async def disconnect(sid):
     """Handle client disconnection."""
     print(f"Client disconnected: {sid}")
+    SOCKETIO_CLIENTS.dec()
 
 
 @sio.event
 async def ping(sid, data):
     """Handle ping from client."""
-    await sio.emit('pong', {'timestamp': data.get('timestamp')}, room=sid)
+    await sio.emit('pong', {'timestamp': data.get('timestamp')}, room=sid, ignore_queue=True)
+
+
+@sio.event
+async def subscribe_leaderboard(sid, data):
+    """
+    Follow a guild's leaderboard.
+    
+    The client gets a leaderboard_snapshot right away, then a
+    leaderboard_delta each tick in which its top N changed. A request
+    without a guild_id is acknowledged with an error instead.
+    """
+    guild_id = data.get('guild_id') if isinstance(data, dict) else None
+    if not isinstance(guild_id, str) or not guild_id:
+        return {'error': 'guild_id is required'}
+    await sio.enter_room(sid, leaderboard_room(guild_id))
+    await sio.emit('leaderboard_snapshot', leaderboard_stream.snapshot(guild_id), room=sid, ignore_queue=True)
+
+
+@sio.event
+async def unsubscribe_leaderboard(sid, data):
+    """Stop following a guild's leaderboard."""
+    guild_id = data.get('guild_id') if isinstance(data, dict) else None
+    if isinstance(guild_id, str):
+        await sio.leave_room(sid, leaderboard_room(guild_id))
 
 
 # Import and include routers
-from api_routes import users, leveling, tools
+from api_routes import users, leveling, tools, debug
 
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(leveling.router, prefix="/api/leveling", tags=["leveling"])
 app.include_router(tools.router, prefix="/api/tools", tags=["tools"])
+app.include_router(debug.router, prefix="/api/debug", tags=["debug"])
 
 
 if __name__ == "__main__":
+    if settings.api_workers > 1 and not settings.socketio_message_queue:
+        raise SystemExit("API_WORKERS > 1 needs SOCKETIO_MESSAGE_QUEUE so emits and state reach every worker")
     uvicorn.run(
         "main:socket_app",
         host=settings.api_host,
         port=settings.api_port,
-        reload=settings.debug,
+        workers=settings.api_workers,
+        reload=settings.debug and settings.api_workers == 1,
         log_level="debug" if settings.debug else "info"
     )
 
@@ -0,0 +1,90 @@
+-- Atomic single-round-trip XP award.
+-- Level and tier math mirrors LevelingService (services/leveling_service.py).
+
+-- Total XP required to reach a level: BASE_XP * level^2 + COEFFICIENT * level + CONSTANT
+CREATE OR REPLACE FUNCTION xp_for_level(p_level INTEGER)
+RETURNS BIGINT AS $$
+    SELECT 100::BIGINT * p_level * p_level + 50::BIGINT * p_level + 0;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Level for a total XP value, corrected to be exact at level thresholds
+CREATE OR REPLACE FUNCTION level_for_xp(p_xp INTEGER)
+RETURNS INTEGER AS $$
+DECLARE
+    lvl INTEGER;
+BEGIN
+    lvl := floor((-50 + sqrt(2500 + 400.0 * p_xp)) / 200)::INTEGER;
+    WHILE xp_for_level(lvl + 1) <= p_xp LOOP
+        lvl := lvl + 1;
+    END LOOP;
+    WHILE lvl > 0 AND xp_for_level(lvl) > p_xp LOOP
+        lvl := lvl - 1;
+    END LOOP;
+    RETURN GREATEST(1, lvl);
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- Rank tier for a level (LevelingService.TIERS)
+CREATE OR REPLACE FUNCTION tier_for_level(p_level INTEGER)
+RETURNS TEXT AS $$
+    SELECT CASE
+        WHEN p_level <= 10 THEN 'Basic'
+        WHEN p_level <= 25 THEN 'Member'
+        WHEN p_level <= 50 THEN 'Advanced'
+        WHEN p_level <= 75 THEN 'Elite'
+        ELSE 'Master'
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Add XP to a user, recompute level/tier and log the event in one transaction.
+-- The row lock serializes concurrent awards for the same user so none are lost.
+-- Returns no row if the user does not exist.
+CREATE OR REPLACE FUNCTION award_xp(
+    p_discord_id TEXT,
+    p_event_type TEXT,
+    p_xp_amount INTEGER,
+    p_channel_id TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+    user_id UUID,
+    old_xp INTEGER,
+    new_xp INTEGER,
+    old_level INTEGER,
+    new_level INTEGER,
+    rank_tier TEXT
+) AS $$
+#variable_conflict use_column
+DECLARE
+    v_user_id UUID;
+    v_old_xp INTEGER;
+    v_old_level INTEGER;
+    v_new_xp INTEGER;
+    v_new_level INTEGER;
+    v_tier TEXT;
+BEGIN
+    SELECT id, xp, level INTO v_user_id, v_old_xp, v_old_level
+    FROM users
+    WHERE discord_id = p_discord_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+
+    v_new_xp := v_old_xp + p_xp_amount;
+    v_new_level := level_for_xp(v_new_xp);
+    v_tier := tier_for_level(v_new_level);
+
+    UPDATE users
+    SET xp = v_new_xp,
+        level = v_new_level,
+        rank_tier = v_tier,
+        last_active = NOW()
+    WHERE id = v_user_id;
+
+    INSERT INTO xp_events (user_id, event_type, xp_amount, channel_id)
+    VALUES (v_user_id, p_event_type, p_xp_amount, p_channel_id);
+
+    RETURN QUERY SELECT v_user_id, v_old_xp, v_new_xp, v_old_level, v_new_level, v_tier;
+END;
+$$ LANGUAGE plpgsql;
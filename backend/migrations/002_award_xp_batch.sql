@@ -0,0 +1,62 @@
+-- Set-based XP award for batches of events.
+
+-- Apply many XP events at once: totals are grouped per user, every affected
+-- user is updated by one UPDATE and all events are logged by one INSERT.
+-- Users are locked in id order so concurrent batches cannot deadlock.
+-- Events for unknown Discord IDs are skipped.
+CREATE OR REPLACE FUNCTION award_xp_batch(
+    p_discord_ids TEXT[],
+    p_event_types TEXT[],
+    p_xp_amounts INTEGER[],
+    p_channel_ids TEXT[]
+)
+RETURNS TABLE (
+    discord_id TEXT,
+    user_id UUID,
+    xp_gained INTEGER,
+    old_xp INTEGER,
+    new_xp INTEGER,
+    old_level INTEGER,
+    new_level INTEGER,
+    rank_tier TEXT
+) AS $$
+#variable_conflict use_column
+BEGIN
+    RETURN QUERY
+    WITH events AS (
+        SELECT *
+        FROM unnest(p_discord_ids, p_event_types, p_xp_amounts, p_channel_ids)
+            AS e(discord_id, event_type, xp_amount, channel_id)
+    ),
+    totals AS (
+        SELECT e.discord_id, SUM(e.xp_amount)::INTEGER AS xp_gained
+        FROM events e
+        GROUP BY e.discord_id
+    ),
+    locked AS (
+        SELECT u.id, u.discord_id, u.xp, u.level
+        FROM users u
+        JOIN totals t ON t.discord_id = u.discord_id
+        ORDER BY u.id
+        FOR UPDATE OF u
+    ),
+    updated AS (
+        UPDATE users u
+        SET xp = u.xp + t.xp_gained,
+            level = level_for_xp(u.xp + t.xp_gained),
+            rank_tier = tier_for_level(level_for_xp(u.xp + t.xp_gained)),
+            last_active = NOW()
+        FROM locked l
+        JOIN totals t ON t.discord_id = l.discord_id
+        WHERE u.id = l.id
+        RETURNING u.discord_id, u.id, t.xp_gained, l.xp, u.xp, l.level, u.level, u.rank_tier
+    ),
+    logged AS (
+        INSERT INTO xp_events (user_id, event_type, xp_amount, channel_id)
+        SELECT up.id, e.event_type, e.xp_amount, e.channel_id
+        FROM events e
+        JOIN updated up ON up.discord_id = e.discord_id
+    )
+    SELECT * FROM updated;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,139 @@
+-- Guild-scoped users, XP and leaderboards.
+-- A users row is now one member of one guild; 'global' holds rows that
+-- predate guild scoping and requests that do not name a guild.
+
+ALTER TABLE users ADD COLUMN guild_id TEXT NOT NULL DEFAULT 'global';
+ALTER TABLE users DROP CONSTRAINT users_discord_id_key;
+ALTER TABLE users ADD CONSTRAINT users_guild_id_discord_id_key UNIQUE (guild_id, discord_id);
+
+ALTER TABLE xp_events ADD COLUMN guild_id TEXT NOT NULL DEFAULT 'global';
+
+-- Guild-leading indexes so leaderboard, rank and history queries stay inside one guild
+DROP INDEX IF EXISTS idx_users_xp;
+DROP INDEX IF EXISTS idx_users_level;
+DROP INDEX IF EXISTS idx_xp_events_user_id;
+DROP INDEX IF EXISTS idx_xp_events_created_at;
+CREATE INDEX idx_users_guild_xp ON users(guild_id, xp DESC, discord_id);
+CREATE INDEX idx_users_guild_level ON users(guild_id, level DESC);
+CREATE INDEX idx_xp_events_guild_user_created ON xp_events(guild_id, user_id, created_at DESC);
+CREATE INDEX idx_xp_events_guild_created ON xp_events(guild_id, created_at DESC);
+
+DROP FUNCTION IF EXISTS award_xp(TEXT, TEXT, INTEGER, TEXT);
+DROP FUNCTION IF EXISTS award_xp_batch(TEXT[], TEXT[], INTEGER[], TEXT[]);
+
+-- Add XP to a guild member, recompute level/tier and log the event in one transaction.
+-- The row lock serializes concurrent awards for the same user so none are lost.
+-- Returns no row if the user does not exist in the guild.
+CREATE OR REPLACE FUNCTION award_xp(
+    p_guild_id TEXT,
+    p_discord_id TEXT,
+    p_event_type TEXT,
+    p_xp_amount INTEGER,
+    p_channel_id TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+    user_id UUID,
+    old_xp INTEGER,
+    new_xp INTEGER,
+    old_level INTEGER,
+    new_level INTEGER,
+    rank_tier TEXT
+) AS $$
+#variable_conflict use_column
+DECLARE
+    v_user_id UUID;
+    v_old_xp INTEGER;
+    v_old_level INTEGER;
+    v_new_xp INTEGER;
+    v_new_level INTEGER;
+    v_tier TEXT;
+BEGIN
+    SELECT id, xp, level INTO v_user_id, v_old_xp, v_old_level
+    FROM users
+    WHERE guild_id = p_guild_id AND discord_id = p_discord_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+
+    v_new_xp := v_old_xp + p_xp_amount;
+    v_new_level := level_for_xp(v_new_xp);
+    v_tier := tier_for_level(v_new_level);
+
+    UPDATE users
+    SET xp = v_new_xp,
+        level = v_new_level,
+        rank_tier = v_tier,
+        last_active = NOW()
+    WHERE id = v_user_id;
+
+    INSERT INTO xp_events (guild_id, user_id, event_type, xp_amount, channel_id)
+    VALUES (p_guild_id, v_user_id, p_event_type, p_xp_amount, p_channel_id);
+
+    RETURN QUERY SELECT v_user_id, v_old_xp, v_new_xp, v_old_level, v_new_level, v_tier;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Apply many XP events at once: totals are grouped per guild member, every
+-- affected user is updated by one UPDATE and all events are logged by one INSERT.
+-- Users are locked in id order so concurrent batches cannot deadlock.
+-- Events for unknown members are skipped.
+CREATE OR REPLACE FUNCTION award_xp_batch(
+    p_guild_ids TEXT[],
+    p_discord_ids TEXT[],
+    p_event_types TEXT[],
+    p_xp_amounts INTEGER[],
+    p_channel_ids TEXT[]
+)
+RETURNS TABLE (
+    guild_id TEXT,
+    discord_id TEXT,
+    user_id UUID,
+    xp_gained INTEGER,
+    old_xp INTEGER,
+    new_xp INTEGER,
+    old_level INTEGER,
+    new_level INTEGER,
+    rank_tier TEXT
+) AS $$
+#variable_conflict use_column
+BEGIN
+    RETURN QUERY
+    WITH events AS (
+        SELECT *
+        FROM unnest(p_guild_ids, p_discord_ids, p_event_types, p_xp_amounts, p_channel_ids)
+            AS e(guild_id, discord_id, event_type, xp_amount, channel_id)
+    ),
+    totals AS (
+        SELECT e.guild_id, e.discord_id, SUM(e.xp_amount)::INTEGER AS xp_gained
+        FROM events e
+        GROUP BY e.guild_id, e.discord_id
+    ),
+    locked AS (
+        SELECT u.id, u.guild_id, u.discord_id, u.xp, u.level
+        FROM users u
+        JOIN totals t ON t.guild_id = u.guild_id AND t.discord_id = u.discord_id
+        ORDER BY u.id
+        FOR UPDATE OF u
+    ),
+    updated AS (
+        UPDATE users u
+        SET xp = u.xp + t.xp_gained,
+            level = level_for_xp(u.xp + t.xp_gained),
+            rank_tier = tier_for_level(level_for_xp(u.xp + t.xp_gained)),
+            last_active = NOW()
+        FROM locked l
+        JOIN totals t ON t.guild_id = l.guild_id AND t.discord_id = l.discord_id
+        WHERE u.id = l.id
+        RETURNING u.guild_id, u.discord_id, u.id, t.xp_gained, l.xp, u.xp, l.level, u.level, u.rank_tier
+    ),
+    logged AS (
+        INSERT INTO xp_events (guild_id, user_id, event_type, xp_amount, channel_id)
+        SELECT up.guild_id, up.id, e.event_type, e.xp_amount, e.channel_id
+        FROM events e
+        JOIN updated up ON up.guild_id = e.guild_id AND up.discord_id = e.discord_id
+    )
+    SELECT * FROM updated;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,173 @@
+-- Per-guild leveling profiles.
+-- A profile is compiled by the API into level thresholds and tier bands;
+-- awards look levels up in those arrays (width_bucket is a binary search)
+-- instead of evaluating the curve. Guilds without a profile keep using
+-- level_for_xp()/tier_for_level().
+
+CREATE TABLE guild_leveling_profiles (
+    guild_id TEXT PRIMARY KEY,
+    profile JSONB NOT NULL,
+    level_thresholds BIGINT[] NOT NULL,
+    tier_starts INTEGER[] NOT NULL,
+    tier_names TEXT[] NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TRIGGER update_guild_leveling_profiles_updated_at BEFORE UPDATE ON guild_leveling_profiles
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+ALTER TABLE guild_leveling_profiles ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role has full access to guild_leveling_profiles" ON guild_leveling_profiles
+    FOR ALL USING (auth.role() = 'service_role');
+
+-- Level for XP from compiled thresholds (level N needs p_thresholds[N]); NULL thresholds use the default curve
+CREATE OR REPLACE FUNCTION profile_level_for_xp(p_thresholds BIGINT[], p_xp INTEGER)
+RETURNS INTEGER AS $$
+    SELECT CASE
+        WHEN p_thresholds IS NULL THEN level_for_xp(p_xp)
+        ELSE GREATEST(1, width_bucket(p_xp::BIGINT, p_thresholds))
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Tier for a level from compiled tier bands; NULL bands use the default tiers
+CREATE OR REPLACE FUNCTION profile_tier_for_level(p_tier_starts INTEGER[], p_tier_names TEXT[], p_level INTEGER)
+RETURNS TEXT AS $$
+    SELECT CASE
+        WHEN p_tier_names IS NULL THEN tier_for_level(p_level)
+        ELSE p_tier_names[GREATEST(1, width_bucket(p_level, p_tier_starts))]
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Add XP to a guild member, recompute level/tier and log the event in one transaction.
+-- The row lock serializes concurrent awards for the same user so none are lost.
+-- Returns no row if the user does not exist in the guild.
+CREATE OR REPLACE FUNCTION award_xp(
+    p_guild_id TEXT,
+    p_discord_id TEXT,
+    p_event_type TEXT,
+    p_xp_amount INTEGER,
+    p_channel_id TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+    user_id UUID,
+    old_xp INTEGER,
+    new_xp INTEGER,
+    old_level INTEGER,
+    new_level INTEGER,
+    rank_tier TEXT
+) AS $$
+#variable_conflict use_column
+DECLARE
+    v_user_id UUID;
+    v_old_xp INTEGER;
+    v_old_level INTEGER;
+    v_new_xp INTEGER;
+    v_new_level INTEGER;
+    v_tier TEXT;
+    v_thresholds BIGINT[];
+    v_tier_starts INTEGER[];
+    v_tier_names TEXT[];
+BEGIN
+    SELECT id, xp, level INTO v_user_id, v_old_xp, v_old_level
+    FROM users
+    WHERE guild_id = p_guild_id AND discord_id = p_discord_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+
+    SELECT level_thresholds, tier_starts, tier_names INTO v_thresholds, v_tier_starts, v_tier_names
+    FROM guild_leveling_profiles
+    WHERE guild_id = p_guild_id;
+
+    v_new_xp := v_old_xp + p_xp_amount;
+    v_new_level := profile_level_for_xp(v_thresholds, v_new_xp);
+    v_tier := profile_tier_for_level(v_tier_starts, v_tier_names, v_new_level);
+
+    UPDATE users
+    SET xp = v_new_xp,
+        level = v_new_level,
+        rank_tier = v_tier,
+        last_active = NOW()
+    WHERE id = v_user_id;
+
+    INSERT INTO xp_events (guild_id, user_id, event_type, xp_amount, channel_id)
+    VALUES (p_guild_id, v_user_id, p_event_type, p_xp_amount, p_channel_id);
+
+    RETURN QUERY SELECT v_user_id, v_old_xp, v_new_xp, v_old_level, v_new_level, v_tier;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Apply many XP events at once: totals are grouped per guild member, every
+-- affected user is updated by one UPDATE and all events are logged by one INSERT.
+-- Users are locked in id order so concurrent batches cannot deadlock.
+-- Events for unknown members are skipped.
+CREATE OR REPLACE FUNCTION award_xp_batch(
+    p_guild_ids TEXT[],
+    p_discord_ids TEXT[],
+    p_event_types TEXT[],
+    p_xp_amounts INTEGER[],
+    p_channel_ids TEXT[]
+)
+RETURNS TABLE (
+    guild_id TEXT,
+    discord_id TEXT,
+    user_id UUID,
+    xp_gained INTEGER,
+    old_xp INTEGER,
+    new_xp INTEGER,
+    old_level INTEGER,
+    new_level INTEGER,
+    rank_tier TEXT
+) AS $$
+#variable_conflict use_column
+BEGIN
+    RETURN QUERY
+    WITH events AS (
+        SELECT *
+        FROM unnest(p_guild_ids, p_discord_ids, p_event_types, p_xp_amounts, p_channel_ids)
+            AS e(guild_id, discord_id, event_type, xp_amount, channel_id)
+    ),
+    totals AS (
+        SELECT e.guild_id, e.discord_id, SUM(e.xp_amount)::INTEGER AS xp_gained
+        FROM events e
+        GROUP BY e.guild_id, e.discord_id
+    ),
+    locked AS (
+        SELECT u.id, u.guild_id, u.discord_id, u.xp, u.level
+        FROM users u
+        JOIN totals t ON t.guild_id = u.guild_id AND t.discord_id = u.discord_id
+        ORDER BY u.id
+        FOR UPDATE OF u
+    ),
+    leveled AS (
+        SELECT l.id, t.xp_gained, l.xp + t.xp_gained AS new_xp,
+               profile_level_for_xp(p.level_thresholds, l.xp + t.xp_gained) AS new_level,
+               p.tier_starts, p.tier_names
+        FROM locked l
+        JOIN totals t ON t.guild_id = l.guild_id AND t.discord_id = l.discord_id
+        LEFT JOIN guild_leveling_profiles p ON p.guild_id = l.guild_id
+    ),
+    updated AS (
+        UPDATE users u
+        SET xp = lv.new_xp,
+            level = lv.new_level,
+            rank_tier = profile_tier_for_level(lv.tier_starts, lv.tier_names, lv.new_level),
+            last_active = NOW()
+        FROM locked l
+        JOIN leveled lv ON lv.id = l.id
+        WHERE u.id = l.id
+        RETURNING u.guild_id, u.discord_id, u.id, lv.xp_gained, l.xp, u.xp, l.level, u.level, u.rank_tier
+    ),
+    logged AS (
+        INSERT INTO xp_events (guild_id, user_id, event_type, xp_amount, channel_id)
+        SELECT up.guild_id, up.id, e.event_type, e.xp_amount, e.channel_id
+        FROM events e
+        JOIN updated up ON up.guild_id = e.guild_id AND up.discord_id = e.discord_id
+    )
+    SELECT * FROM updated;
+END;
+$$ LANGUAGE plpgsql;
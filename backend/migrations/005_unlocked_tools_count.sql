@@ -0,0 +1,67 @@
+-- Unlocked tool count kept on the users row.
+-- Statement-level triggers on user_tool_access add or subtract the rows each
+-- INSERT/DELETE touched, so a bulk grant costs one UPDATE however many rows
+-- it inserts, and list endpoints read the count with the user instead of
+-- counting access rows per user.
+
+ALTER TABLE users ADD COLUMN unlocked_tools_count INTEGER NOT NULL DEFAULT 0 CHECK (unlocked_tools_count >= 0);
+
+UPDATE users u
+SET unlocked_tools_count = a.tool_count
+FROM (
+    SELECT user_id, COUNT(*)::INTEGER AS tool_count
+    FROM user_tool_access
+    GROUP BY user_id
+) a
+WHERE a.user_id = u.id;
+
+-- Add newly granted tools to their users' counts.
+-- Users are locked in id order first so concurrent bulk grants cannot deadlock.
+CREATE OR REPLACE FUNCTION count_granted_tools()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM 1 FROM users
+    WHERE id IN (SELECT user_id FROM granted)
+    ORDER BY id
+    FOR UPDATE;
+
+    UPDATE users u
+    SET unlocked_tools_count = u.unlocked_tools_count + g.tool_count
+    FROM (
+        SELECT user_id, COUNT(*)::INTEGER AS tool_count
+        FROM granted
+        GROUP BY user_id
+    ) g
+    WHERE u.id = g.user_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Subtract revoked tools (including cascades from deleted tools) from their users' counts
+CREATE OR REPLACE FUNCTION count_revoked_tools()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM 1 FROM users
+    WHERE id IN (SELECT user_id FROM revoked)
+    ORDER BY id
+    FOR UPDATE;
+
+    UPDATE users u
+    SET unlocked_tools_count = GREATEST(0, u.unlocked_tools_count - r.tool_count)
+    FROM (
+        SELECT user_id, COUNT(*)::INTEGER AS tool_count
+        FROM revoked
+        GROUP BY user_id
+    ) r
+    WHERE u.id = r.user_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER count_user_tool_access_insert AFTER INSERT ON user_tool_access
+    REFERENCING NEW TABLE AS granted
+    FOR EACH STATEMENT EXECUTE FUNCTION count_granted_tools();
+
+CREATE TRIGGER count_user_tool_access_delete AFTER DELETE ON user_tool_access
+    REFERENCING OLD TABLE AS revoked
+    FOR EACH STATEMENT EXECUTE FUNCTION count_revoked_tools();
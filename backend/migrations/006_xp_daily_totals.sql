@@ -0,0 +1,64 @@
+-- Daily XP rollups and raw event retention.
+-- xp_daily_totals holds one row per guild member, UTC day and event type.
+-- A statement-level trigger on xp_events folds every INSERT into it, so a
+-- batch award costs one upsert however many events it logs, and the totals
+-- stay exact after jobs/compact_xp_events.py deletes raw rows older than the
+-- retention window. Events are only logged by award_xp() and award_xp_batch(),
+-- which already hold the members' users rows locked, so concurrent upserts
+-- on the same totals rows queue behind that lock instead of deadlocking.
+--
+-- Inserts into xp_events wait while this migration backfills, so the
+-- trigger and the backfill never count the same event.
+
+BEGIN;
+
+LOCK TABLE xp_events IN SHARE MODE;
+
+CREATE TABLE xp_daily_totals (
+    guild_id TEXT NOT NULL,
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    event_type TEXT NOT NULL,
+    events INTEGER NOT NULL,
+    xp BIGINT NOT NULL,
+    PRIMARY KEY (guild_id, user_id, day, event_type)
+);
+
+CREATE INDEX idx_xp_daily_totals_guild_day ON xp_daily_totals(guild_id, day);
+
+-- created_at follows insert order, so a BRIN index finds rows past retention
+-- for a fraction of a B-tree's size and write cost
+CREATE INDEX idx_xp_events_created_brin ON xp_events USING BRIN (created_at);
+
+CREATE OR REPLACE FUNCTION roll_up_xp_events()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO xp_daily_totals AS t (guild_id, user_id, day, event_type, events, xp)
+    SELECT guild_id, user_id, (created_at AT TIME ZONE 'UTC')::date, event_type, COUNT(*), SUM(xp_amount)
+    FROM logged
+    WHERE user_id IS NOT NULL
+    GROUP BY 1, 2, 3, 4
+    ORDER BY 1, 2, 3, 4
+    ON CONFLICT (guild_id, user_id, day, event_type) DO UPDATE
+    SET events = t.events + EXCLUDED.events,
+        xp = t.xp + EXCLUDED.xp;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER roll_up_xp_events_insert AFTER INSERT ON xp_events
+    REFERENCING NEW TABLE AS logged
+    FOR EACH STATEMENT EXECUTE FUNCTION roll_up_xp_events();
+
+INSERT INTO xp_daily_totals (guild_id, user_id, day, event_type, events, xp)
+SELECT guild_id, user_id, (created_at AT TIME ZONE 'UTC')::date, event_type, COUNT(*), SUM(xp_amount)
+FROM xp_events
+WHERE user_id IS NOT NULL
+GROUP BY 1, 2, 3, 4;
+
+ALTER TABLE xp_daily_totals ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role has full access to xp_daily_totals" ON xp_daily_totals
+    FOR ALL USING (auth.role() = 'service_role');
+
+COMMIT;
@@ -1,19 +1,31 @@
 """
 Pydantic models for request/response validation.
 """
-from .user import User, UserCreate, UserUpdate, UserResponse
-from .tool import Tool, ToolCreate, ToolAccess
-from .xp import XPEvent, LevelUpEvent
+from .user import User, UserCreate, UserUpdate, UserResponse, RankResponse, SocketTokenResponse, GLOBAL_GUILD_ID
+from .tool import Tool, ToolCreate, ToolUpdate, ToolAccess
+from .xp import (
+    XPEvent, LevelUpEvent, XPEventCreate, XPBatchRequest, XPBatchResponse,
+    XPDailyTotal, GuildXPDailyTotal
+)
 
 __all__ = [
+    "GLOBAL_GUILD_ID",
     "User",
     "UserCreate", 
     "UserUpdate",
     "UserResponse",
+    "RankResponse",
+    "SocketTokenResponse",
     "Tool",
     "ToolCreate",
+    "ToolUpdate",
     "ToolAccess",
     "XPEvent",
-    "LevelUpEvent"
+    "LevelUpEvent",
+    "XPEventCreate",
+    "XPBatchRequest",
+    "XPBatchResponse",
+    "XPDailyTotal",
+    "GuildXPDailyTotal"
 ]
 
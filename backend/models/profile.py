@@ -0,0 +1,92 @@
+"""
+Leveling profile models for Discord Bot Hub.
+"""
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import Dict, Literal, Optional, Tuple
+from datetime import datetime
+
+from services.leveling_service import LevelingService
+
+
+# Tier names accepted by users.rank_tier
+RANK_TIERS = ("Basic", "Member", "Advanced", "Elite", "Master")
+
+# Highest XP a users.xp INTEGER column can hold
+MAX_XP = 2**31 - 1
+
+
+class LevelingProfile(BaseModel):
+    """
+    A guild's leveling rules. Defaults match LevelingService.
+
+    Curves (XP required to reach a level):
+    - quadratic: base_xp * level^2 + coefficient * level + constant
+    - linear: base_xp * level + constant
+    - exponential: base_xp * growth^(level - 1) + constant
+    """
+    curve_type: Literal["quadratic", "linear", "exponential"] = Field(default="quadratic", description="XP curve shape")
+    base_xp: int = Field(default=LevelingService.BASE_XP, ge=1, description="Main curve factor")
+    coefficient: int = Field(default=LevelingService.COEFFICIENT, ge=0, description="Linear term (quadratic curve)")
+    constant: int = Field(default=LevelingService.CONSTANT, ge=0, description="Constant term")
+    growth: float = Field(default=1.1, gt=1.0, le=10.0, description="Growth per level (exponential curve)")
+    max_level: int = Field(default=1000, ge=1, le=10000, description="Highest reachable level")
+    xp_amounts: Dict[str, int] = Field(default_factory=lambda: dict(LevelingService.XP_AMOUNTS))
+    cooldowns: Dict[str, float] = Field(default_factory=lambda: dict(LevelingService.COOLDOWNS))
+    tiers: Dict[str, Tuple[int, int]] = Field(default_factory=lambda: dict(LevelingService.TIERS))
+
+    @field_validator("xp_amounts")
+    @classmethod
+    def check_xp_amounts(cls, value: Dict[str, int]) -> Dict[str, int]:
+        """XP amounts must not be negative."""
+        if any(amount < 0 for amount in value.values()):
+            raise ValueError("XP amounts must be >= 0")
+        return value
+
+    @field_validator("cooldowns")
+    @classmethod
+    def check_cooldowns(cls, value: Dict[str, float]) -> Dict[str, float]:
+        """Cooldowns must not be negative."""
+        if any(seconds < 0 for seconds in value.values()):
+            raise ValueError("Cooldowns must be >= 0")
+        return value
+
+    @field_validator("tiers")
+    @classmethod
+    def check_tiers(cls, value: Dict[str, Tuple[int, int]]) -> Dict[str, Tuple[int, int]]:
+        """Tier bands must use known names, start at level 1 and not overlap."""
+        if not value:
+            raise ValueError("At least one tier is required")
+        unknown = set(value) - set(RANK_TIERS)
+        if unknown:
+            raise ValueError(f"Unknown tiers {sorted(unknown)}; allowed: {', '.join(RANK_TIERS)}")
+
+        bands = sorted(value.values())
+        if bands[0][0] != 1:
+            raise ValueError("The lowest tier must start at level 1")
+        for (min_level, max_level), (next_min, _) in zip(bands, bands[1:] + [(None, None)]):
+            if max_level < min_level:
+                raise ValueError(f"Tier band {min_level}-{max_level} is empty")
+            if next_min is not None and next_min <= max_level:
+                raise ValueError(f"Tier bands overlap at level {next_min}")
+        return value
+
+    @model_validator(mode="after")
+    def check_curve(self) -> "LevelingProfile":
+        """Level 1 must be reachable within the XP column range."""
+        if self.xp_for_level(1) > MAX_XP:
+            raise ValueError("Level 1 requires more XP than can be stored")
+        return self
+
+    def xp_for_level(self, level: int) -> int:
+        """Total XP required to reach a level on this profile's curve."""
+        if self.curve_type == "quadratic":
+            return self.base_xp * level * level + self.coefficient * level + self.constant
+        if self.curve_type == "linear":
+            return self.base_xp * level + self.constant
+        return round(self.base_xp * self.growth ** (level - 1)) + self.constant
+
+
+class LevelingProfileResponse(LevelingProfile):
+    """A guild's stored leveling profile."""
+    guild_id: str
+    updated_at: Optional[datetime] = None
@@ -22,6 +22,17 @@ class ToolCreate(ToolBase):
     enabled: bool = Field(default=True, description="Whether tool is enabled")
 
 
+class ToolUpdate(BaseModel):
+    """Model for updating a tool."""
+    name: Optional[str] = None
+    description: Optional[str] = None
+    icon: Optional[str] = None
+    required_level: Optional[int] = None
+    tier: Optional[str] = None
+    config: Optional[Dict[str, Any]] = None
+    enabled: Optional[bool] = None
+
+
 class Tool(ToolBase):
     """Complete tool model from database."""
     id: UUID
@@ -2,14 +2,19 @@
 User models for Discord Bot Hub.
 """
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from uuid import UUID
 
 
+# Guild scope used when a request does not name a guild
+GLOBAL_GUILD_ID = "global"
+
+
 class UserBase(BaseModel):
     """Base user model with common fields."""
     discord_id: str = Field(..., description="Discord user ID")
+    guild_id: str = Field(default=GLOBAL_GUILD_ID, description="Discord guild (server) ID")
     username: str = Field(..., description="Discord username")
     avatar_url: Optional[str] = Field(None, description="Discord avatar URL")
 
@@ -34,6 +39,7 @@ class User(UserBase):
     level: int = Field(default=1, description="Current level")
     rank_tier: str = Field(default="Basic", description="Current rank tier")
     streak_days: int = Field(default=0, description="Consecutive active days")
+    unlocked_tools_count: int = Field(default=0, description="Number of tools unlocked")
     last_active: Optional[datetime] = Field(None, description="Last activity timestamp")
     created_at: datetime
     updated_at: datetime
@@ -46,6 +52,7 @@ class UserResponse(BaseModel):
     """User response model for API endpoints."""
     id: UUID
     discord_id: str
+    guild_id: str
     username: str
     avatar_url: Optional[str]
     xp: int
@@ -66,3 +73,23 @@ class LeaderboardEntry(BaseModel):
     xp: int
     level: int
 
+
+
+class RankResponse(BaseModel):
+    """User leaderboard position model."""
+    discord_id: str
+    guild_id: str
+    rank: int
+    total_users: int
+    xp: int
+    level: int
+    rank_tier: str = "Basic"
+    next_level_xp: int = 0
+
+
+class SocketTokenResponse(BaseModel):
+    """Signed token a client passes as Socket.IO auth to join its rooms."""
+    token: str
+    discord_id: str
+    guilds: List[str]
+    expires_at: int = Field(..., description="Unix seconds")
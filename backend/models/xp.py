@@ -2,14 +2,21 @@
 XP and leveling event models.
 """
 from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from typing import Optional, List
+from datetime import date, datetime
 from uuid import UUID
 
+from .user import GLOBAL_GUILD_ID
+
+
+# Upper bound on events accepted by one batch request
+MAX_BATCH_EVENTS = 5000
+
 
 class XPEvent(BaseModel):
     """XP gain event model."""
     user_id: UUID
+    guild_id: str = Field(default=GLOBAL_GUILD_ID, description="Discord guild (server) ID")
     event_type: str = Field(..., description="Type of event (message, voice, command, daily)")
     xp_amount: int = Field(..., description="Amount of XP gained")
     channel_id: Optional[str] = Field(None, description="Discord channel ID")
@@ -42,3 +49,56 @@ class XPGainResponse(BaseModel):
     new_level: Optional[int] = None
     unlocked_tools: list[str] = Field(default_factory=list)
 
+
+
+class XPEventCreate(BaseModel):
+    """Single XP event submitted to the batch endpoint."""
+    discord_id: str = Field(..., description="Discord user ID")
+    guild_id: str = Field(default=GLOBAL_GUILD_ID, description="Discord guild (server) ID")
+    event_type: str = Field(..., description="Type of event (message, voice_minute, command, ...)")
+    xp_amount: Optional[int] = Field(None, description="XP to award; defaults to the event type's amount")
+    channel_id: Optional[str] = Field(None, description="Discord channel ID")
+
+
+class XPBatchRequest(BaseModel):
+    """Batch of XP events to apply in one request."""
+    events: List[XPEventCreate] = Field(..., max_length=MAX_BATCH_EVENTS)
+
+
+class XPBatchResult(BaseModel):
+    """Per-user outcome of a batch XP award."""
+    discord_id: str
+    guild_id: str
+    xp_gained: int
+    total_xp: int
+    current_level: int
+    leveled_up: bool = False
+    new_level: Optional[int] = None
+    unlocked_tools: list[str] = Field(default_factory=list)
+
+
+class XPBatchUnknownUser(BaseModel):
+    """Batch event target with no user record in its guild."""
+    guild_id: str
+    discord_id: str
+
+
+class XPBatchResponse(BaseModel):
+    """Response model for batch XP ingestion."""
+    success: bool
+    processed_events: int = 0
+    results: List[XPBatchResult] = Field(default_factory=list)
+    unknown_users: List[XPBatchUnknownUser] = Field(default_factory=list)
+
+
+class XPDailyTotal(BaseModel):
+    """XP a user earned on one UTC day from one event type."""
+    day: date
+    event_type: str
+    events: int
+    xp: int
+
+
+class GuildXPDailyTotal(XPDailyTotal):
+    """XP a guild earned on one UTC day from one event type."""
+    active_members: int = Field(..., description="Members who earned XP from this event type that day")
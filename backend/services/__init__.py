@@ -1,13 +1,34 @@
 """
 Services package - Business logic layer.
+
+Exports are imported on first access, so importing one submodule (e.g.
+services.leveling_service from the bot or from models) does not build the
+Socket.IO server, the database pool or the API metrics along with it.
 """
-from .database import db, DatabaseService
-from .leveling_service import leveling_service, LevelingService
+from importlib import import_module
+
+# Exported name -> submodule defining it
+_EXPORTS = {
+    "db": "database",
+    "DatabaseService": "database",
+    "leveling_service": "leveling_service",
+    "LevelingService": "leveling_service",
+    "LevelTable": "level_table",
+    "rank_indexes": "rank_index",
+    "RankIndex": "rank_index",
+    "RankIndexRegistry": "rank_index",
+    "LeaderboardCache": "leaderboard_cache",
+    "leaderboard_cache": "standings",
+    "update_standing": "standings",
+    "tool_catalog": "tool_catalog",
+    "ToolCatalog": "tool_catalog"
+}
+
+__all__ = list(_EXPORTS)
 
-__all__ = [
-    "db",
-    "DatabaseService",
-    "leveling_service",
-    "LevelingService"
-]
 
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(f".{module}", __name__), name)
@@ -0,0 +1,81 @@
+"""
+Cluster sync - keeps each API worker's in-memory state in step with writes
+handled by the other workers.
+Rank indexes, leaderboard caches, leveling profiles and the tool catalog
+live in every worker. A worker that changes one of them publishes a peer
+message on the Socket.IO queue and the others apply it. With a single
+worker (no SOCKETIO_MESSAGE_QUEUE) publishing is a no-op.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from services.realtime import PEER_NAMESPACE, is_shared, sio
+
+
+def on_peer(event: str):
+    """
+    Register the handler for a peer message.
+
+    The handler is a coroutine taking the message data. It must only
+    update local state; republishing would bounce between workers.
+    """
+    def decorator(handler: Callable[[Any], Awaitable[None]]):
+        manager = sio.manager
+        if hasattr(manager, 'peer_handlers'):
+            manager.peer_handlers[event] = handler
+        return handler
+    return decorator
+
+
+async def publish_to_peers(event: str, data: Any):
+    """
+    Send a message to every other worker.
+
+    Args:
+        event: Name a handler was registered under with on_peer
+        data: Picklable payload
+    """
+    if not is_shared():
+        return
+    try:
+        await sio.manager.emit(event, data, namespace=PEER_NAMESPACE)
+    except Exception as e:
+        print(f"[Cluster] Failed to publish {event}: {e}")
+
+
+class CoalescingPublisher:
+    """
+    Batches keyed updates into one peer message.
+
+    Updates added during the same event-loop turn, or while the previous
+    batch is still being published, go out together, with only the last
+    value kept per key. Batches are published in order, one at a time.
+    """
+
+    def __init__(self, event: str):
+        """
+        Initialize the publisher.
+
+        Args:
+            event: Peer message name; its data is a list of (key, value) pairs
+        """
+        self.event = event
+        self._pending: Dict[Hashable, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, key: Hashable, value: Any):
+        """Queue an update (no-op with a single worker)."""
+        if not is_shared():
+            return
+        self._pending[key] = value
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._publish())
+
+    async def _publish(self):
+        try:
+            await asyncio.sleep(0)
+            while self._pending:
+                batch, self._pending = list(self._pending.items()), {}
+                await publish_to_peers(self.event, batch)
+        finally:
+            self._task = None
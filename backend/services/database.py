@@ -1,49 +1,556 @@
 """
-Database service using Supabase client.
+Database service using a pooled asyncpg connection.
 """
-from supabase import create_client, Client
+import asyncio
+import json
+import time
+from datetime import date, datetime
+from typing import Optional, List, Dict, Any, Tuple
+from uuid import UUID
+
+import asyncpg
+
 from config import settings
-from typing import Optional
+from services.metrics import observe_query
+
+
+# Columns that may be written through update_user
+USER_UPDATE_COLUMNS = {"username", "avatar_url", "xp", "level", "rank_tier", "streak_days"}
+
+# Columns a tool update may change
+TOOL_UPDATE_COLUMNS = {"name", "description", "icon", "required_level", "tier", "config", "enabled"}
 
 
 class DatabaseService:
-    """Supabase database service."""
-    
+    """Async PostgreSQL database service backed by an asyncpg pool."""
+
     _instance: Optional['DatabaseService'] = None
-    _client: Optional[Client] = None
-    
+    _pool: Optional[asyncpg.Pool] = None
+
     def __new__(cls):
         """Singleton pattern for database service."""
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
-    
-    def __init__(self):
-        """Initialize Supabase client."""
-        if self._client is None:
-            self._client = create_client(
-                settings.supabase_url,
-                settings.supabase_key
+
+    async def connect(self) -> None:
+        """Create the connection pool. Called once on application startup."""
+        if self._pool is None:
+            self._pool = await asyncpg.create_pool(
+                dsn=settings.database_url,
+                min_size=settings.db_pool_min_size,
+                max_size=settings.db_pool_max_size,
+                statement_cache_size=settings.db_statement_cache_size,
+                command_timeout=settings.db_command_timeout,
+                init=self._init_connection
             )
-    
+
+    async def disconnect(self) -> None:
+        """Close the connection pool. Called on application shutdown."""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    @staticmethod
+    async def _init_connection(conn: asyncpg.Connection) -> None:
+        """Decode JSON/JSONB columns into Python objects."""
+        for type_name in ("json", "jsonb"):
+            await conn.set_type_codec(
+                type_name,
+                encoder=json.dumps,
+                decoder=json.loads,
+                schema="pg_catalog"
+            )
+
     @property
-    def client(self) -> Client:
-        """Get Supabase client instance."""
-        if self._client is None:
-            raise RuntimeError("Database client not initialized")
-        return self._client
-    
+    def pool(self) -> asyncpg.Pool:
+        """Get connection pool instance."""
+        if self._pool is None:
+            raise RuntimeError("Database pool not initialized")
+        return self._pool
+
+    # Query helpers
+
+    async def fetch(self, query: str, *args, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Run a query and return all rows as dicts."""
+        rows = await self.pool.fetch(query, *args, timeout=timeout)
+        return [dict(row) for row in rows]
+
+    async def fetchrow(self, query: str, *args, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Run a query and return the first row as a dict, or None."""
+        row = await self.pool.fetchrow(query, *args, timeout=timeout)
+        return dict(row) if row is not None else None
+
+    async def fetchval(self, query: str, *args, timeout: Optional[float] = None) -> Any:
+        """Run a query and return a single value."""
+        return await self.pool.fetchval(query, *args, timeout=timeout)
+
+    async def execute(self, query: str, *args, timeout: Optional[float] = None) -> str:
+        """Run a statement and return its status string."""
+        return await self.pool.execute(query, *args, timeout=timeout)
+
+    # Users
+
+    @observe_query("users")
+    async def get_user(self, discord_id: str, guild_id: str) -> Optional[Dict[str, Any]]:
+        """Get a guild member by Discord ID."""
+        return await self.fetchrow(
+            "SELECT * FROM users WHERE guild_id = $1 AND discord_id = $2",
+            guild_id, discord_id
+        )
+
+    @observe_query("users")
+    async def upsert_user(
+        self,
+        discord_id: str,
+        guild_id: str,
+        username: str,
+        avatar_url: Optional[str]
+    ) -> Dict[str, Any]:
+        """Create a guild member, or refresh username/avatar if they already exist."""
+        return await self.fetchrow(
+            """
+            INSERT INTO users (guild_id, discord_id, username, avatar_url)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT (guild_id, discord_id) DO UPDATE
+                SET username = EXCLUDED.username,
+                    avatar_url = EXCLUDED.avatar_url
+            RETURNING *
+            """,
+            guild_id, discord_id, username, avatar_url
+        )
+
+    @observe_query("users")
+    async def update_user(self, discord_id: str, guild_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update selected columns of a guild member. Returns the updated row or None."""
+        columns = [name for name in fields if name in USER_UPDATE_COLUMNS]
+        if not columns:
+            raise ValueError("No updatable fields provided")
+
+        assignments = ", ".join(f"{name} = ${i}" for i, name in enumerate(columns, start=3))
+        return await self.fetchrow(
+            f"UPDATE users SET {assignments} WHERE guild_id = $1 AND discord_id = $2 RETURNING *",
+            guild_id, discord_id, *(fields[name] for name in columns)
+        )
+
+    @observe_query("users")
+    async def list_users(self, guild_id: str, limit: int, offset: int) -> List[Dict[str, Any]]:
+        """List a guild's members with offset pagination."""
+        return await self.fetch(
+            "SELECT * FROM users WHERE guild_id = $1 ORDER BY created_at LIMIT $2 OFFSET $3",
+            guild_id, limit, offset
+        )
+
+    @observe_query("users")
+    async def get_leaderboard(self, guild_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Get a guild's top members by XP."""
+        return await self.fetch(
+            "SELECT * FROM users WHERE guild_id = $1 ORDER BY xp DESC, discord_id LIMIT $2",
+            guild_id, limit
+        )
+
+    @observe_query("users")
+    async def get_users_by_discord_ids(self, guild_id: str, discord_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get several guild members by Discord ID in one query (order not preserved)."""
+        return await self.fetch(
+            "SELECT * FROM users WHERE guild_id = $1 AND discord_id = ANY($2::text[])",
+            guild_id, discord_ids
+        )
+
+    @observe_query("users")
+    async def get_all_user_xp(self) -> List[Tuple[str, str, int]]:
+        """Get (guild_id, discord_id, xp) for every user, used to build the rank indexes."""
+        rows = await self.pool.fetch("SELECT guild_id, discord_id, xp FROM users")
+        return [(row['guild_id'], row['discord_id'], row['xp']) for row in rows]
+
+    @observe_query("users")
+    async def get_user_levels_page(
+        self,
+        after_guild_id: str,
+        after_discord_id: str,
+        limit: int,
+        guild_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the next page of (guild_id, discord_id, xp, level, rank_tier) rows.
+        
+        Keyset pagination on the (guild_id, discord_id) unique index: pass the
+        last row of the previous page (empty strings for the first page).
+        With guild_id set, only that guild's members are returned.
+        """
+        if guild_id is not None:
+            return await self.fetch(
+                """
+                SELECT guild_id, discord_id, xp, level, rank_tier FROM users
+                WHERE guild_id = $1 AND discord_id > $2
+                ORDER BY guild_id, discord_id
+                LIMIT $3
+                """,
+                guild_id, after_discord_id, limit
+            )
+        return await self.fetch(
+            """
+            SELECT guild_id, discord_id, xp, level, rank_tier FROM users
+            WHERE (guild_id, discord_id) > ($1, $2)
+            ORDER BY guild_id, discord_id
+            LIMIT $3
+            """,
+            after_guild_id, after_discord_id, limit
+        )
+
+    @observe_query("users")
+    async def update_user_levels(
+        self,
+        guild_ids: List[str],
+        discord_ids: List[str],
+        xp_values: List[int],
+        levels: List[int],
+        rank_tiers: List[str]
+    ) -> int:
+        """
+        Write recalculated levels and tiers for many members in one statement.
+        
+        The lists are parallel. A row is only updated if its XP still matches,
+        so members awarded XP since they were read (and therefore already
+        recalculated by award_xp) are left alone. Returns the rows updated.
+        """
+        status = await self.execute(
+            """
+            UPDATE users AS u
+            SET level = v.level, rank_tier = v.rank_tier
+            FROM unnest($1::text[], $2::text[], $3::int[], $4::int[], $5::text[])
+                AS v(guild_id, discord_id, xp, level, rank_tier)
+            WHERE u.guild_id = v.guild_id AND u.discord_id = v.discord_id AND u.xp = v.xp
+            """,
+            guild_ids, discord_ids, xp_values, levels, rank_tiers
+        )
+        return int(status.split()[-1])
+
+    @observe_query("users")
+    async def estimate_user_count(self, guild_id: Optional[str] = None) -> int:
+        """Exact member count for a guild, or the planner's estimate for the whole table."""
+        if guild_id is not None:
+            return await self.fetchval("SELECT COUNT(*) FROM users WHERE guild_id = $1", guild_id)
+        return max(0, await self.fetchval("SELECT reltuples::bigint FROM pg_class WHERE relname = 'users'"))
+
+    # XP events
+
+    @observe_query("xp_events")
+    async def award_xp(
+        self,
+        discord_id: str,
+        guild_id: str,
+        event_type: str,
+        xp_amount: int,
+        channel_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Atomically add XP, recompute level/tier and log the event.
+        
+        Runs the award_xp() database function in a single round trip. Returns
+        user_id, old_xp, new_xp, old_level, new_level and rank_tier, or None if
+        the user is not a member of the guild.
+        """
+        return await self.fetchrow(
+            "SELECT * FROM award_xp($1, $2, $3, $4, $5)",
+            guild_id, discord_id, event_type, xp_amount, channel_id
+        )
+
+    @observe_query("xp_events")
+    async def award_xp_batch(
+        self,
+        guild_ids: List[str],
+        discord_ids: List[str],
+        event_types: List[str],
+        xp_amounts: List[int],
+        channel_ids: List[Optional[str]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Apply a batch of XP events with set-based SQL.
+        
+        The lists are parallel, one entry per event. Runs the award_xp_batch()
+        database function, which groups the events per guild member, updates
+        each member once and bulk-inserts every xp_events row. Returns one row
+        per known member with xp_gained, old/new XP and old/new level.
+        """
+        return await self.fetch(
+            "SELECT * FROM award_xp_batch($1::text[], $2::text[], $3::text[], $4::int[], $5::text[])",
+            guild_ids, discord_ids, event_types, xp_amounts, channel_ids
+        )
+
+    @observe_query("xp_events")
+    async def get_xp_history(self, guild_id: str, user_id: UUID, limit: int) -> List[Dict[str, Any]]:
+        """Get the most recent XP events for a guild member."""
+        return await self.fetch(
+            """
+            SELECT * FROM xp_events
+            WHERE guild_id = $1 AND user_id = $2
+            ORDER BY created_at DESC
+            LIMIT $3
+            """,
+            guild_id, user_id, limit
+        )
+
+    @observe_query("xp_events")
+    async def delete_xp_events_before(self, cutoff: datetime, limit: int) -> int:
+        """
+        Delete up to `limit` raw XP events logged before a cutoff.
+        
+        Each call is one short statement found through the created_at BRIN
+        index; rows another transaction has locked are skipped rather than
+        waited for. Daily totals are kept. Returns the rows deleted.
+        """
+        status = await self.execute(
+            """
+            DELETE FROM xp_events
+            WHERE id IN (
+                SELECT id FROM xp_events
+                WHERE created_at < $1
+                LIMIT $2
+                FOR UPDATE SKIP LOCKED
+            )
+            """,
+            cutoff, limit
+        )
+        return int(status.split()[-1])
+
+    # XP daily totals
+
+    @observe_query("xp_daily_totals")
+    async def get_xp_daily_totals(
+        self,
+        guild_id: str,
+        user_id: UUID,
+        start_day: date,
+        end_day: date
+    ) -> List[Dict[str, Any]]:
+        """Get a guild member's XP per UTC day and event type between two days (inclusive), newest first."""
+        return await self.fetch(
+            """
+            SELECT day, event_type, events, xp FROM xp_daily_totals
+            WHERE guild_id = $1 AND user_id = $2 AND day BETWEEN $3 AND $4
+            ORDER BY day DESC, event_type
+            """,
+            guild_id, user_id, start_day, end_day
+        )
+
+    @observe_query("xp_daily_totals")
+    async def get_guild_xp_daily_totals(self, guild_id: str, start_day: date, end_day: date) -> List[Dict[str, Any]]:
+        """Get a guild's XP and active members per UTC day and event type between two days (inclusive), newest first."""
+        return await self.fetch(
+            """
+            SELECT day, event_type, SUM(events)::bigint AS events, SUM(xp)::bigint AS xp,
+                   COUNT(*) AS active_members
+            FROM xp_daily_totals
+            WHERE guild_id = $1 AND day BETWEEN $2 AND $3
+            GROUP BY day, event_type
+            ORDER BY day DESC, event_type
+            """,
+            guild_id, start_day, end_day
+        )
+
+    # Leveling profiles
+
+    @observe_query("guild_leveling_profiles")
+    async def get_leveling_profiles(self) -> List[Dict[str, Any]]:
+        """Get every guild's stored leveling profile with its compiled tables."""
+        return await self.fetch("SELECT * FROM guild_leveling_profiles")
+
+    @observe_query("guild_leveling_profiles")
+    async def get_leveling_profile(self, guild_id: str) -> Optional[Dict[str, Any]]:
+        """Get one guild's stored leveling profile."""
+        return await self.fetchrow("SELECT * FROM guild_leveling_profiles WHERE guild_id = $1", guild_id)
+
+    @observe_query("guild_leveling_profiles")
+    async def upsert_leveling_profile(
+        self,
+        guild_id: str,
+        profile: Dict[str, Any],
+        level_thresholds: List[int],
+        tier_starts: List[int],
+        tier_names: List[str]
+    ) -> Dict[str, Any]:
+        """Store a guild's profile together with its compiled thresholds and tier bands."""
+        return await self.fetchrow(
+            """
+            INSERT INTO guild_leveling_profiles (guild_id, profile, level_thresholds, tier_starts, tier_names)
+            VALUES ($1, $2, $3, $4, $5)
+            ON CONFLICT (guild_id) DO UPDATE
+            SET profile = EXCLUDED.profile,
+                level_thresholds = EXCLUDED.level_thresholds,
+                tier_starts = EXCLUDED.tier_starts,
+                tier_names = EXCLUDED.tier_names
+            RETURNING *
+            """,
+            guild_id, profile, level_thresholds, tier_starts, tier_names
+        )
+
+    @observe_query("guild_leveling_profiles")
+    async def delete_leveling_profile(self, guild_id: str) -> bool:
+        """Delete a guild's profile. Returns True if one existed."""
+        status = await self.execute("DELETE FROM guild_leveling_profiles WHERE guild_id = $1", guild_id)
+        return status.endswith(" 1")
+
+    # Tools
+
+    @observe_query("tools")
+    async def list_tools(self, tier: Optional[str] = None, enabled_only: bool = True) -> List[Dict[str, Any]]:
+        """List tools ordered by required level."""
+        return await self.fetch(
+            """
+            SELECT * FROM tools
+            WHERE ($1::text IS NULL OR tier = $1)
+              AND (NOT $2 OR enabled)
+            ORDER BY required_level
+            """,
+            tier, enabled_only
+        )
+
+    @observe_query("tools")
+    async def get_tool(self, tool_id: UUID) -> Optional[Dict[str, Any]]:
+        """Get a tool by ID."""
+        return await self.fetchrow("SELECT * FROM tools WHERE id = $1", tool_id)
+
+    @observe_query("tools")
+    async def create_tool(self, tool_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert a new tool."""
+        return await self.fetchrow(
+            """
+            INSERT INTO tools (name, description, icon, required_level, tier, config, enabled)
+            VALUES ($1, $2, $3, $4, $5, $6, $7)
+            RETURNING *
+            """,
+            tool_data['name'],
+            tool_data['description'],
+            tool_data['icon'],
+            tool_data['required_level'],
+            tool_data['tier'],
+            tool_data.get('config') or {},
+            tool_data.get('enabled', True)
+        )
+
+    @observe_query("tools")
+    async def update_tool(self, tool_id: UUID, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update selected columns of a tool. Returns the updated row or None."""
+        columns = [name for name in fields if name in TOOL_UPDATE_COLUMNS]
+        if not columns:
+            raise ValueError("No updatable fields provided")
+
+        assignments = ", ".join(f"{name} = ${i}" for i, name in enumerate(columns, start=2))
+        return await self.fetchrow(
+            f"UPDATE tools SET {assignments} WHERE id = $1 RETURNING *",
+            tool_id, *(fields[name] for name in columns)
+        )
+
+    @observe_query("tools")
+    async def get_tools_watermark(self) -> Tuple[int, Optional[datetime]]:
+        """
+        Cheap version of the tools table: (row count, latest updated_at).
+
+        Inserts and updates move updated_at forward (via the update trigger)
+        and deletes change the count, so an unchanged watermark means an
+        unchanged table.
+        """
+        row = await self.fetchrow("SELECT COUNT(*) AS tool_count, MAX(updated_at) AS updated_at FROM tools")
+        return row['tool_count'], row['updated_at']
+
+    @observe_query("users")
+    async def get_user_with_tool_access(self, discord_id: str, guild_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a guild member and their tool access rows in one round trip.
+
+        Returns:
+            The users row plus parallel arrays access_tool_ids, access_unlocked_at
+            and access_usage_counts (empty if nothing is unlocked), or None
+        """
+        return await self.fetchrow(
+            """
+            SELECT u.*,
+                   COALESCE(a.tool_ids, '{}') AS access_tool_ids,
+                   COALESCE(a.unlocked_at, '{}') AS access_unlocked_at,
+                   COALESCE(a.usage_counts, '{}') AS access_usage_counts
+            FROM users u
+            LEFT JOIN LATERAL (
+                SELECT array_agg(t.tool_id) AS tool_ids,
+                       array_agg(t.unlocked_at) AS unlocked_at,
+                       array_agg(t.usage_count) AS usage_counts
+                FROM user_tool_access t
+                WHERE t.user_id = u.id
+            ) a ON TRUE
+            WHERE u.guild_id = $1 AND u.discord_id = $2
+            """,
+            guild_id, discord_id
+        )
+
+    @observe_query("user_tool_access")
+    async def get_user_tool_access(self, user_id: UUID) -> List[Dict[str, Any]]:
+        """Get all tool access rows for a user."""
+        return await self.fetch("SELECT * FROM user_tool_access WHERE user_id = $1", user_id)
+
+    @observe_query("user_tool_access")
+    async def grant_tool_access(self, user_id: UUID, tool_id: UUID) -> bool:
+        """Grant a tool to a user. Returns False if it was already unlocked."""
+        status = await self.execute(
+            """
+            INSERT INTO user_tool_access (user_id, tool_id)
+            VALUES ($1, $2)
+            ON CONFLICT (user_id, tool_id) DO NOTHING
+            """,
+            user_id, tool_id
+        )
+        return status.endswith(" 1")
+
+    @observe_query("user_tool_access")
+    async def grant_tools_bulk(self, user_ids: List[UUID], tool_ids: List[UUID]) -> List[Dict[str, Any]]:
+        """
+        Grant many (user, tool) pairs in one INSERT.
+
+        Args:
+            user_ids: User ID for each grant
+            tool_ids: Tool ID for each grant (parallel to user_ids)
+
+        Returns:
+            The (user_id, tool_id) pairs that were newly granted; pairs the user already had are skipped
+        """
+        return await self.fetch(
+            """
+            INSERT INTO user_tool_access (user_id, tool_id)
+            SELECT * FROM unnest($1::uuid[], $2::uuid[])
+            ON CONFLICT (user_id, tool_id) DO NOTHING
+            RETURNING user_id, tool_id
+            """,
+            user_ids, tool_ids
+        )
+
+    async def ping(self, timeout: float) -> float:
+        """
+        Round-trip a trivial query, including waiting for a pooled connection.
+
+        Args:
+            timeout: Seconds before giving up
+
+        Returns:
+            Round-trip time in seconds
+
+        Raises:
+            asyncio.TimeoutError: If the pool or the server did not answer in time
+        """
+        started = time.perf_counter()
+        await asyncio.wait_for(self.fetchval("SELECT 1"), timeout)
+        return time.perf_counter() - started
+
     async def health_check(self) -> bool:
         """Check database connection health."""
         try:
-            # Simple query to test connection
-            result = self.client.table('users').select('id').limit(1).execute()
+            await self.ping(settings.health_db_timeout)
             return True
         except Exception as e:
-            print(f"Database health check failed: {e}")
+            print(f"Database health check failed: {e!r}")
             return False
 
 
-# Global database service instance
-db = DatabaseService()
-
+# Global database service instance (the in-memory backend with DATABASE_BACKEND=memory)
+if settings.database_backend == "memory":
+    from services.mock_database import mock_db as db
+else:
+    db = DatabaseService()
@@ -0,0 +1,119 @@
+"""
+Health probes - event-loop lag sampling and readiness checks.
+A saturated worker shows up as a loop that wakes late and as slow database
+round trips; readiness turns false on either so the load balancer drains
+the worker until it recovers.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from config import settings
+from services.database import db
+from services.metrics import DB_PING_SECONDS, EVENT_LOOP_LAG
+
+
+class LoopLagMonitor:
+    """
+    Samples how late the event loop runs a periodic wake-up.
+
+    Keeps the most recent samples so readiness can look at sustained lag
+    rather than a single slow callback.
+    """
+
+    def __init__(self, interval: float, window: int):
+        """
+        Initialize the monitor.
+
+        Args:
+            interval: Seconds between samples
+            window: Number of recent samples kept
+        """
+        self.interval = interval
+        self.samples: deque = deque(maxlen=window)
+
+    @property
+    def last(self) -> float:
+        """Most recent lag sample in seconds."""
+        return self.samples[-1] if self.samples else 0.0
+
+    @property
+    def average(self) -> float:
+        """Average lag over the window in seconds."""
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
+    @property
+    def max(self) -> float:
+        """Worst lag over the window in seconds."""
+        return max(self.samples, default=0.0)
+
+    async def run(self):
+        """Sample until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.samples.append(lag)
+            EVENT_LOOP_LAG.observe(lag)
+
+
+# Global loop lag monitor, started from the app lifespan
+loop_lag_monitor = LoopLagMonitor(settings.loop_lag_sample_interval, settings.loop_lag_window)
+
+
+async def check_database() -> Dict[str, Any]:
+    """
+    Ping the database within the configured timeout.
+
+    Returns:
+        reachable, latency_ms (None when unreachable) and error
+    """
+    error: Optional[str] = None
+    latency_ms: Optional[float] = None
+    try:
+        latency = await db.ping(settings.health_db_timeout)
+        DB_PING_SECONDS.set(latency)
+        latency_ms = round(latency * 1000, 2)
+    except asyncio.TimeoutError:
+        error = f"no answer within {settings.health_db_timeout}s"
+    except Exception as e:
+        error = str(e) or type(e).__name__
+    return {"reachable": error is None, "latency_ms": latency_ms, "error": error}
+
+
+def check_event_loop() -> Dict[str, Any]:
+    """Current lag figures from the monitor, in milliseconds."""
+    return {
+        "lag_ms": round(loop_lag_monitor.last * 1000, 2),
+        "avg_lag_ms": round(loop_lag_monitor.average * 1000, 2),
+        "max_lag_ms": round(loop_lag_monitor.max * 1000, 2),
+        "samples": len(loop_lag_monitor.samples)
+    }
+
+
+async def readiness() -> Dict[str, Any]:
+    """
+    Run the readiness checks.
+
+    Returns:
+        ready plus the reasons it is not, and the database and event loop reports
+    """
+    database = await check_database()
+    event_loop = check_event_loop()
+
+    reasons = []
+    if not database["reachable"]:
+        reasons.append(f"database unreachable: {database['error']}")
+    elif database["latency_ms"] > settings.health_max_db_latency_ms:
+        reasons.append(f"database latency {database['latency_ms']}ms > {settings.health_max_db_latency_ms}ms")
+    if event_loop["avg_lag_ms"] > settings.health_max_loop_lag_ms:
+        reasons.append(f"event loop lag {event_loop['avg_lag_ms']}ms > {settings.health_max_loop_lag_ms}ms")
+
+    return {
+        "ready": not reasons,
+        "reasons": reasons,
+        "database": database,
+        "event_loop": event_loop
+    }
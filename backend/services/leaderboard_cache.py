@@ -0,0 +1,134 @@
+"""
+Leaderboard cache - rendered leaderboard pages kept in process.
+Pages are dropped when an XP change could alter what they show, with a
+short max-staleness as a safety net for writes made outside this process.
+Every change also bumps the guild's generation; a page rendered from a read
+that started before a change is not stored.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Optional, Set, Tuple
+
+
+class CachedPage:
+    """A rendered top-N page plus what is needed to decide if a change affects it."""
+
+    __slots__ = ("body", "members", "cutoff_xp", "full", "expires_at")
+
+    def __init__(self, body: bytes, members: FrozenSet[str], cutoff_xp: int, full: bool, expires_at: float):
+        self.body = body
+        self.members = members
+        self.cutoff_xp = cutoff_xp
+        self.full = full
+        self.expires_at = expires_at
+
+
+class LeaderboardCache:
+    """Rendered leaderboard pages keyed by (guild_id, limit), least recently used evicted first."""
+
+    def __init__(self, max_staleness: float = 5.0, max_pages: int = 10000):
+        """
+        Initialize the cache.
+
+        Args:
+            max_staleness: Seconds a page may be served without revalidation
+            max_pages: Maximum number of cached pages across all guilds
+        """
+        self.max_staleness = max_staleness
+        self.max_pages = max_pages
+        self._pages: "OrderedDict[Tuple[str, int], CachedPage]" = OrderedDict()
+        self._limits_by_guild: Dict[str, Set[int]] = {}
+        self._generations: Dict[str, int] = {}
+        self._cleared = 0  # Added to every guild's generation, so clear() moves them all on
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def get(self, guild_id: str, limit: int) -> Optional[bytes]:
+        """Get a rendered page, or None if missing or stale."""
+        key = (guild_id, limit)
+        page = self._pages.get(key)
+        if page is None:
+            return None
+        if page.expires_at <= time.monotonic():
+            self._discard(key)
+            return None
+        self._pages.move_to_end(key)
+        return page.body
+
+    def generation(self, guild_id: str) -> int:
+        """Current change count for a guild; read it before the query a page is built from."""
+        return self._cleared + self._generations.get(guild_id, 0)
+
+    def put(self, guild_id: str, limit: int, body: bytes, members: Dict[str, int], generation: int):
+        """
+        Store a rendered page, unless the guild changed since it was read.
+
+        Args:
+            guild_id: Guild scope of the page
+            limit: Page size requested
+            body: Serialized response body
+            members: discord_id -> xp for every entry on the page
+            generation: generation(guild_id) from before the page's rows were read
+        """
+        if generation != self.generation(guild_id):
+            return
+        key = (guild_id, limit)
+        self._pages[key] = CachedPage(
+            body=body,
+            members=frozenset(members),
+            cutoff_xp=min(members.values()) if members else 0,
+            full=len(members) >= limit,
+            expires_at=time.monotonic() + self.max_staleness
+        )
+        self._pages.move_to_end(key)
+        self._limits_by_guild.setdefault(guild_id, set()).add(limit)
+
+        while len(self._pages) > self.max_pages:
+            oldest_key = next(iter(self._pages))
+            self._discard(oldest_key)
+
+    def on_member_change(self, guild_id: str, discord_id: str, xp: int):
+        """
+        Drop pages in a guild whose contents a member change could affect.
+
+        A page is affected if the member is on it, if their XP reaches the
+        page's lowest entry, or if the page is not full yet.
+        """
+        self._bump(guild_id)
+        limits = self._limits_by_guild.get(guild_id)
+        if not limits:
+            return
+        for limit in list(limits):
+            key = (guild_id, limit)
+            page = self._pages.get(key)
+            if page is None:
+                continue
+            if discord_id in page.members or xp >= page.cutoff_xp or not page.full:
+                self._discard(key)
+
+    def invalidate_guild(self, guild_id: str):
+        """Drop every cached page for a guild."""
+        self._bump(guild_id)
+        for limit in list(self._limits_by_guild.get(guild_id, ())):
+            self._discard((guild_id, limit))
+
+    def clear(self):
+        """Drop every cached page."""
+        self._cleared += 1
+        self._pages.clear()
+        self._limits_by_guild.clear()
+
+    def _bump(self, guild_id: str):
+        """Mark a guild as changed so reads already in flight are not cached."""
+        self._generations[guild_id] = self._generations.get(guild_id, 0) + 1
+
+    def _discard(self, key: Tuple[str, int]):
+        """Remove one page and its guild bookkeeping."""
+        self._pages.pop(key, None)
+        guild_id, limit = key
+        limits = self._limits_by_guild.get(guild_id)
+        if limits is not None:
+            limits.discard(limit)
+            if not limits:
+                del self._limits_by_guild[guild_id]
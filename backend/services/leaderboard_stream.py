@@ -0,0 +1,161 @@
+"""
+Leaderboard stream - coalesced top-N leaderboard deltas over Socket.IO.
+XP writes only mark a followed guild as changed. Once per tick each changed
+guild's top N is read from its rank index, compared with what was last sent,
+and one leaderboard_delta carrying only the entries whose rank or XP moved
+goes to the guild's leaderboard room, however many awards landed in between.
+
+With several API workers each one streams to its own subscribers from its
+own rank index (kept current by services.cluster), so deltas are emitted
+locally rather than through the shared queue.
+"""
+import asyncio
+from typing import Any, Dict, List, Tuple
+
+from config import settings
+from services.leveling_profiles import leveling_profiles
+from services.rank_index import rank_indexes
+from services.realtime import has_local_listeners, sio
+
+
+def leaderboard_room(guild_id: str) -> str:
+    """Room of every connection following a guild's leaderboard."""
+    return f"leaderboard:{guild_id}"
+
+
+class LeaderboardStream:
+    """
+    Tracks the last top N sent for each followed guild and emits deltas.
+
+    Only guilds with a leaderboard room are tracked; a guild whose room
+    empties is dropped on the next tick.
+    """
+
+    def __init__(self, size: int, interval: float):
+        """
+        Initialize the stream.
+
+        Args:
+            size: Leaderboard entries streamed per guild
+            interval: Seconds between ticks
+        """
+        self.size = size
+        self.interval = interval
+        self._sent: Dict[str, Dict[str, Tuple[int, int]]] = {}  # guild -> discord_id -> (rank, xp)
+        self._seq: Dict[str, int] = {}
+        self._floor: Dict[str, int] = {}  # guild -> lowest XP in a full sent top N
+        self._dirty: set = set()
+
+    def __len__(self) -> int:
+        return len(self._sent)
+
+    def on_member_change(self, guild_id: str, discord_id: str, xp: int):
+        """
+        Mark a guild changed if a member's new XP can alter its streamed top N.
+
+        A member outside the last sent top N who is still below its lowest
+        XP changes nothing visible and is ignored.
+        """
+        sent = self._sent.get(guild_id)
+        if sent is None or guild_id in self._dirty:
+            return
+        floor = self._floor.get(guild_id)
+        if floor is None or xp >= floor or discord_id in sent:
+            self._dirty.add(guild_id)
+
+    def _entries(self, guild_id: str) -> List[Tuple[int, str, int]]:
+        index = rank_indexes.get(guild_id)
+        return index.top(self.size) if index else []
+
+    def _record(self, guild_id: str, entries: List[Tuple[int, str, int]]):
+        self._sent[guild_id] = {discord_id: (rank, xp) for rank, discord_id, xp in entries}
+        if len(entries) < self.size:
+            self._floor.pop(guild_id, None)
+        else:
+            self._floor[guild_id] = entries[-1][2]
+
+    def _encode(self, guild_id: str, entries) -> List[list]:
+        level_for = leveling_profiles.get(guild_id).level_table.level_for
+        return [[rank, discord_id, xp, level_for(xp)] for rank, discord_id, xp in entries]
+
+    def snapshot(self, guild_id: str) -> Dict[str, Any]:
+        """
+        The state deltas for a guild currently apply to, starting to track it if needed.
+
+        A late joiner gets the last sent top N rather than the live one, so
+        the next delta brings it exactly up to date.
+
+        Returns:
+            guild_id, seq, size (entries streamed per guild) and entries as [rank, discord_id, xp, level]
+        """
+        if guild_id not in self._sent:
+            self._record(guild_id, self._entries(guild_id))
+            self._seq[guild_id] = 0
+        sent = self._sent[guild_id]
+        entries = sorted((rank, discord_id, xp) for discord_id, (rank, xp) in sent.items())
+        return {
+            "guild_id": guild_id,
+            "seq": self._seq[guild_id],
+            "size": self.size,
+            "entries": self._encode(guild_id, entries)
+        }
+
+    def diff(self, guild_id: str) -> Dict[str, Any]:
+        """
+        Compare a guild's top N with the last sent one and record it as sent.
+
+        Returns:
+            guild_id, seq, changes ([rank, discord_id, xp, level] for new or
+            moved entries) and removed (Discord IDs that left the top N);
+            seq only advances when something changed
+        """
+        old = self._sent.get(guild_id, {})
+        entries = self._entries(guild_id)
+        changes = [(rank, discord_id, xp) for rank, discord_id, xp in entries if old.get(discord_id) != (rank, xp)]
+        self._record(guild_id, entries)
+        new = self._sent[guild_id]
+        removed = [discord_id for discord_id in old if discord_id not in new]
+        if changes or removed:
+            self._seq[guild_id] = self._seq.get(guild_id, 0) + 1
+        return {
+            "guild_id": guild_id,
+            "seq": self._seq.get(guild_id, 0),
+            "changes": self._encode(guild_id, changes),
+            "removed": removed
+        }
+
+    async def tick(self) -> int:
+        """
+        Emit one delta per changed, still-followed guild.
+
+        Returns:
+            Number of deltas sent
+        """
+        unfollowed = [guild_id for guild_id in self._sent if not has_local_listeners(leaderboard_room(guild_id))]
+        for guild_id in unfollowed:
+            del self._sent[guild_id]
+            self._seq.pop(guild_id, None)
+            self._floor.pop(guild_id, None)
+            self._dirty.discard(guild_id)
+
+        dirty, self._dirty = self._dirty, set()
+        sent = 0
+        for guild_id in dirty:
+            delta = self.diff(guild_id)
+            if delta["changes"] or delta["removed"]:
+                await sio.emit('leaderboard_delta', delta, room=leaderboard_room(guild_id), ignore_queue=True)
+                sent += 1
+        return sent
+
+    async def run(self):
+        """Tick until cancelled."""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.tick()
+            except Exception as e:
+                print(f"[LeaderboardStream] Tick failed: {e}")
+
+
+# Global leaderboard stream, ticked from the app lifespan
+leaderboard_stream = LeaderboardStream(settings.leaderboard_stream_size, settings.leaderboard_stream_interval)
@@ -0,0 +1,205 @@
+"""
+Level table - precomputed, integer-exact XP thresholds for a leveling curve.
+Single lookups use bisect; bulk lookups use NumPy searchsorted over the same table.
+"""
+from bisect import bisect_right
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+XPCurve = Callable[[int], int]
+
+
+def tier_bands(tiers: Dict[str, Tuple[int, int]]) -> Tuple[List[int], List[str]]:
+    """
+    Split a TIERS-style mapping into parallel, ordered lists.
+
+    Args:
+        tiers: Tier name -> (min_level, max_level)
+
+    Returns:
+        (tier_starts, tier_names) ordered by min_level
+    """
+    ordered = sorted(tiers.items(), key=lambda item: item[1][0])
+    return [min_level for _, (min_level, _) in ordered], [name for name, _ in ordered]
+
+
+class LevelTable:
+    """
+    Cumulative XP thresholds and tier boundaries for one leveling curve.
+
+    A user's level is the highest level whose threshold they have reached
+    (minimum 1). Levels up to `max_level` come from the table. If the
+    table was built with its curve, XP beyond the last threshold keeps
+    levelling by searching the curve with integer math; otherwise the
+    level is capped at `max_level`. Nothing depends on floating point.
+    """
+
+    __slots__ = (
+        "max_level", "_thresholds", "_threshold_array",
+        "_tier_starts", "_tier_names", "_tier_name_array", "_xp_curve"
+    )
+
+    def __init__(
+        self,
+        thresholds: Sequence[int],
+        tier_starts: Sequence[int],
+        tier_names: Sequence[str],
+        xp_curve: Optional[XPCurve] = None
+    ):
+        """
+        Build the table from precomputed thresholds.
+
+        Args:
+            thresholds: XP required for levels 1..N, non-decreasing
+            tier_starts: First level of each tier, ascending
+            tier_names: Tier name for each entry of tier_starts
+            xp_curve: Curve used past level N; None caps levels at N
+        """
+        # _thresholds[i] is the XP needed for level i + 1
+        self._thresholds = list(thresholds)
+        self._threshold_array = np.array(self._thresholds, dtype=np.int64)
+        self.max_level = len(self._thresholds)
+
+        self._tier_starts = list(tier_starts)
+        self._tier_names = list(tier_names)
+        self._tier_name_array = np.array(self._tier_names, dtype=object)
+        self._xp_curve = xp_curve
+
+    @classmethod
+    def from_curve(
+        cls,
+        xp_curve: XPCurve,
+        tiers: Dict[str, Tuple[int, int]],
+        max_level: int = 10000,
+        capped: bool = False,
+        max_xp: Optional[int] = None
+    ) -> "LevelTable":
+        """
+        Evaluate a curve once for every level and build the table.
+
+        Args:
+            xp_curve: Total XP required to reach a level
+            tiers: Tier name -> (min_level, max_level); levels past the last tier use the last tier
+            max_level: Highest level precomputed in the table
+            capped: Cap levels at the table instead of following the curve further
+            max_xp: Stop the table at the last level whose threshold fits under this XP
+
+        Returns:
+            LevelTable
+        """
+        thresholds = []
+        for level in range(1, max_level + 1):
+            threshold = xp_curve(level)
+            if max_xp is not None and threshold > max_xp:
+                break
+            thresholds.append(threshold)
+
+        tier_starts, tier_names = tier_bands(tiers)
+        return cls(thresholds, tier_starts, tier_names, xp_curve=None if capped else xp_curve)
+
+    @property
+    def thresholds(self) -> List[int]:
+        """XP required for levels 1..max_level."""
+        return list(self._thresholds)
+
+    @property
+    def tier_starts(self) -> List[int]:
+        """First level of each tier, ascending."""
+        return list(self._tier_starts)
+
+    @property
+    def tier_names(self) -> List[str]:
+        """Tier names matching tier_starts."""
+        return list(self._tier_names)
+
+    def xp_for_level(self, level: int) -> Optional[int]:
+        """
+        Total XP required to reach a level.
+
+        Returns:
+            Threshold, or None for a level past the cap of a capped table
+        """
+        if level < 1:
+            return 0
+        if level <= self.max_level:
+            return self._thresholds[level - 1]
+        if self._xp_curve is not None:
+            return self._xp_curve(level)
+        return None
+
+    def level_for(self, xp: int) -> int:
+        """
+        Level for a total XP amount.
+
+        Args:
+            xp: Total experience points
+
+        Returns:
+            Current level (at least 1)
+        """
+        reached = bisect_right(self._thresholds, xp)
+        if reached == self.max_level and self._xp_curve is not None:
+            return self._level_beyond_table(xp)
+        return max(1, reached)
+
+    def tier_for(self, level: int) -> str:
+        """
+        Rank tier for a level.
+
+        Args:
+            level: User level
+
+        Returns:
+            Tier name
+        """
+        return self._tier_names[max(0, bisect_right(self._tier_starts, level) - 1)]
+
+    def levels_for(self, xp: Sequence[int]) -> np.ndarray:
+        """
+        Levels for many XP totals at once.
+
+        Args:
+            xp: Array-like of total experience points
+
+        Returns:
+            int64 array of levels, same shape as the input
+        """
+        xp_array = np.asarray(xp, dtype=np.int64)
+        levels = np.searchsorted(self._threshold_array, xp_array, side="right")
+
+        if self._xp_curve is not None:
+            beyond = levels == self.max_level
+            if beyond.any():
+                levels[beyond] = [self._level_beyond_table(int(value)) for value in xp_array[beyond]]
+
+        return np.maximum(levels, 1)
+
+    def tiers_for(self, levels: Sequence[int]) -> np.ndarray:
+        """
+        Rank tiers for many levels at once.
+
+        Args:
+            levels: Array-like of levels
+
+        Returns:
+            Object array of tier names, same shape as the input
+        """
+        positions = np.searchsorted(self._tier_starts, np.asarray(levels, dtype=np.int64), side="right") - 1
+        return self._tier_name_array[np.maximum(positions, 0)]
+
+    def _level_beyond_table(self, xp: int) -> int:
+        """Exact level for XP past the last precomputed threshold (exponential then binary search on the curve)."""
+        low = self.max_level  # reached
+        high = max(2 * low, 2)
+        while self._xp_curve(high) <= xp:
+            low, high = high, 2 * high
+        # Invariant: curve(low) <= xp < curve(high)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if self._xp_curve(middle) <= xp:
+                low = middle
+            else:
+                high = middle
+        return low
@@ -0,0 +1,116 @@
+"""
+Leveling profiles - per-guild leveling rules compiled to lookup tables.
+A profile is compiled once (thresholds, tier bands, XP amounts, cooldowns)
+and cached by guild; awards only do dictionary lookups and table searches.
+"""
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+from models.profile import LevelingProfile, MAX_XP
+from services.level_table import LevelTable
+from services.leveling_service import LevelingService
+
+
+class CompiledProfile:
+    """Immutable, ready-to-use form of a guild's leveling profile."""
+
+    __slots__ = ("guild_id", "profile", "level_table", "xp_amounts", "cooldowns")
+
+    def __init__(self, guild_id: Optional[str], profile: LevelingProfile, level_table: LevelTable):
+        """
+        Initialize a compiled profile.
+
+        Args:
+            guild_id: Guild the profile belongs to (None for the default profile)
+            profile: Source profile
+            level_table: Precomputed level table for the profile's curve and tiers
+        """
+        set_attribute = super().__setattr__
+        set_attribute("guild_id", guild_id)
+        set_attribute("profile", profile)
+        set_attribute("level_table", level_table)
+        set_attribute("xp_amounts", MappingProxyType(dict(profile.xp_amounts)))
+        set_attribute("cooldowns", MappingProxyType(dict(profile.cooldowns)))
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("CompiledProfile is immutable; compile a new one instead")
+
+    def xp_amount(self, event_type: str) -> int:
+        """XP awarded for an event type (0 if the profile does not award it)."""
+        return self.xp_amounts.get(event_type, 0)
+
+    def next_level_xp(self, xp: int, level: int) -> int:
+        """XP still needed to reach the next level (0 at the level cap)."""
+        threshold = self.level_table.xp_for_level(level + 1)
+        if threshold is None:
+            return 0
+        return max(0, threshold - xp)
+
+
+def compile_profile(guild_id: Optional[str], profile: LevelingProfile) -> CompiledProfile:
+    """
+    Compile a profile into lookup tables.
+
+    The curve is evaluated once per level up to max_level (or until it no
+    longer fits in the XP column) and levels are capped there, matching
+    the stored thresholds the database uses for awards.
+    """
+    level_table = LevelTable.from_curve(
+        profile.xp_for_level,
+        profile.tiers,
+        max_level=profile.max_level,
+        capped=True,
+        max_xp=MAX_XP
+    )
+    return CompiledProfile(guild_id, profile, level_table)
+
+
+def load_compiled_profile(row: Mapping[str, Any]) -> CompiledProfile:
+    """
+    Rebuild a compiled profile from its stored row without re-evaluating the curve.
+
+    Args:
+        row: guild_leveling_profiles row (guild_id, profile, level_thresholds, tier_starts, tier_names)
+    """
+    level_table = LevelTable(row['level_thresholds'], row['tier_starts'], row['tier_names'])
+    return CompiledProfile(row['guild_id'], LevelingProfile(**row['profile']), level_table)
+
+
+# Profile for guilds that have not configured one: the LevelingService
+# constants, with levels following the curve past the table like level_for_xp() in SQL.
+DEFAULT_PROFILE = CompiledProfile(None, LevelingProfile(), LevelingService.LEVEL_TABLE)
+
+
+class LevelingProfileRegistry:
+    """Compiled profiles by guild, falling back to DEFAULT_PROFILE."""
+
+    def __init__(self):
+        """Initialize with no guild profiles."""
+        self._profiles: Dict[str, CompiledProfile] = {}
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def get(self, guild_id: str) -> CompiledProfile:
+        """Get a guild's compiled profile (the default if it has none)."""
+        return self._profiles.get(guild_id, DEFAULT_PROFILE)
+
+    def has_profile(self, guild_id: str) -> bool:
+        """Whether a guild has its own profile."""
+        return guild_id in self._profiles
+
+    def load(self, compiled_profiles: Iterable[CompiledProfile]):
+        """Replace every guild profile at once."""
+        self._profiles = {compiled.guild_id: compiled for compiled in compiled_profiles}
+
+    def set(self, compiled: CompiledProfile):
+        """Install or hot-swap one guild's profile."""
+        self._profiles[compiled.guild_id] = compiled
+
+    def remove(self, guild_id: str):
+        """Drop a guild's profile so it uses the default again."""
+        self._profiles.pop(guild_id, None)
+
+
+# Global per-guild leveling profiles
+leveling_profiles = LevelingProfileRegistry()
@@ -2,15 +2,19 @@
 Leveling service - XP calculations and level progression.
 Based on patterns from pem/archon service architecture.
 """
-from typing import Tuple, List
+from typing import Tuple, List, Sequence
 from uuid import UUID
-import math
+
+import numpy as np
+
+from services.level_table import LevelTable
 
 
 class LevelingService:
     """Service for XP and leveling calculations."""
     
     # XP formula constants
+    # Mirrored by xp_for_level()/level_for_xp()/tier_for_level() in database_schema.sql
     BASE_XP = 100
     COEFFICIENT = 50
     CONSTANT = 0
@@ -39,6 +43,9 @@ class LevelingService:
         "Master": (76, 100)
     }
     
+    # Precomputed thresholds for the constants above (built below the class)
+    LEVEL_TABLE: LevelTable
+    
     @staticmethod
     def calculate_xp_for_level(level: int) -> int:
         """
@@ -60,7 +67,7 @@ class LevelingService:
     @staticmethod
     def calculate_level_from_xp(xp: int) -> int:
         """
-        Calculate level from total XP using quadratic formula.
+        Calculate level from total XP using the precomputed level table.
         
         Args:
             xp: Total experience points
@@ -68,17 +75,7 @@ class LevelingService:
         Returns:
             Current level
         """
-        # Solve quadratic equation: BASE*level^2 + COEF*level + (CONST - xp) = 0
-        a = LevelingService.BASE_XP
-        b = LevelingService.COEFFICIENT
-        c = LevelingService.CONSTANT - xp
-        
-        discriminant = b**2 - 4*a*c
-        if discriminant < 0:
-            return 1
-        
-        level = (-b + math.sqrt(discriminant)) / (2 * a)
-        return max(1, int(level))
+        return LevelingService.LEVEL_TABLE.level_for(xp)
     
     @staticmethod
     def get_tier_from_level(level: int) -> str:
@@ -91,10 +88,33 @@ class LevelingService:
         Returns:
             Tier name
         """
-        for tier_name, (min_level, max_level) in LevelingService.TIERS.items():
-            if min_level <= level <= max_level:
-                return tier_name
-        return "Master"  # Default for levels > 100
+        return LevelingService.LEVEL_TABLE.tier_for(level)
+    
+    @staticmethod
+    def levels_for(xp_values: Sequence[int]) -> np.ndarray:
+        """
+        Calculate levels for many XP totals at once (leaderboards, recalculation, analytics).
+        
+        Args:
+            xp_values: Array-like of total XP
+            
+        Returns:
+            Array of levels
+        """
+        return LevelingService.LEVEL_TABLE.levels_for(xp_values)
+    
+    @staticmethod
+    def tiers_for(levels: Sequence[int]) -> np.ndarray:
+        """
+        Get rank tiers for many levels at once.
+        
+        Args:
+            levels: Array-like of levels
+            
+        Returns:
+            Array of tier names
+        """
+        return LevelingService.LEVEL_TABLE.tiers_for(levels)
     
     @staticmethod
     def get_xp_for_next_level(current_xp: int, current_level: int) -> int:
@@ -145,6 +165,12 @@ class LevelingService:
         return (new_level > old_level, old_level, new_level)
 
 
+# Precomputed thresholds for the default curve and tiers
+LevelingService.LEVEL_TABLE = LevelTable.from_curve(
+    LevelingService.calculate_xp_for_level,
+    LevelingService.TIERS
+)
+
 # Global leveling service instance
 leveling_service = LevelingService()
 
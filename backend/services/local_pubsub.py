@@ -0,0 +1,173 @@
+"""
+Local pub/sub - a stand-in for Redis when running several API workers on
+one machine without one, and in tests and benchmarks.
+LocalBroker relays every length-prefixed frame it receives to every
+connected client, sender included, which is all a Socket.IO pub/sub
+manager needs from its queue. One broker carries one channel.
+
+Frames are pickled and there is no authentication, so anyone who can reach
+the broker can run code in every worker. It only binds loopback addresses.
+
+Run a broker (from the backend directory):
+    python -m services.local_pubsub --port 6390
+then start the workers with SOCKETIO_MESSAGE_QUEUE=local://127.0.0.1:6390
+"""
+import argparse
+import asyncio
+import ipaddress
+import pickle
+from typing import Optional, Set
+from urllib.parse import urlparse
+
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+
+HEADER_SIZE = 4
+
+
+def is_loopback(host: str) -> bool:
+    """Whether a bind address only accepts connections from this machine."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class LocalBroker:
+    """Fans every frame out to all connected clients."""
+
+    def __init__(self):
+        """Initialize with no clients."""
+        self.clients: Set[asyncio.StreamWriter] = set()
+        self.frames = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """
+        Start listening.
+
+        Args:
+            host: Loopback interface to bind
+            port: Port to bind (0 picks a free one)
+
+        Returns:
+            Bound port
+
+        Raises:
+            ValueError: If host is not a loopback address
+        """
+        if not is_loopback(host):
+            raise ValueError(f"Local broker must bind a loopback address, not {host}")
+        self._server = await asyncio.start_server(self._serve_client, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Stop listening and drop every client."""
+        self._server.close()
+        for writer in list(self.clients):
+            writer.close()
+        await self._server.wait_closed()
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.clients.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(HEADER_SIZE)
+                frame = header + await reader.readexactly(int.from_bytes(header, "big"))
+                self.frames += 1
+                clients = list(self.clients)
+                for client in clients:
+                    client.write(frame)
+                for client in clients:
+                    try:
+                        await client.drain()
+                    except ConnectionError:
+                        self.clients.discard(client)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+
+class LocalPubSubManager(AsyncPubSubManager):
+    """
+    Socket.IO pub/sub manager backed by a LocalBroker.
+
+    Publishes and listens on one connection; messages echoed back from the
+    broker are dropped by the base class through their host_id.
+    """
+
+    name = 'localpubsub'
+
+    def __init__(self, url: str = 'local://127.0.0.1:6390', channel: str = 'socketio', logger=None):
+        """
+        Initialize the manager.
+
+        Args:
+            url: Broker address as local://host:port
+            channel: Kept for parity with the other managers; a broker carries one channel
+            logger: Logger for the base class
+        """
+        super().__init__(channel=channel, logger=logger)
+        parsed = urlparse(url)
+        self.broker_host = parsed.hostname or '127.0.0.1'
+        self.broker_port = parsed.port or 6390
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connect_lock = asyncio.Lock()
+
+    async def _connect(self):
+        async with self._connect_lock:
+            if self._writer is None or self._writer.is_closing():
+                self._reader, self._writer = await asyncio.open_connection(self.broker_host, self.broker_port)
+
+    async def _publish(self, data):
+        payload = pickle.dumps(data)
+        try:
+            await self._connect()
+            self._writer.write(len(payload).to_bytes(HEADER_SIZE, "big") + payload)
+            await self._writer.drain()
+        except OSError as e:
+            self._writer = None
+            self._get_logger().error(f'Cannot publish to local broker: {e}')
+
+    async def _listen(self):
+        while True:
+            try:
+                await self._connect()
+                reader = self._reader
+                while True:
+                    header = await reader.readexactly(HEADER_SIZE)
+                    yield await reader.readexactly(int.from_bytes(header, "big"))
+            except (asyncio.IncompleteReadError, OSError) as e:
+                self._writer = None
+                self._get_logger().error(f'Local broker connection lost ({e}), retrying in 1 second')
+                await asyncio.sleep(1)
+
+
+async def serve(host: str, port: int):
+    """Run a broker until interrupted."""
+    broker = LocalBroker()
+    port = await broker.start(host, port)
+    print(f"[PubSub] Local broker listening on local://{host}:{port}")
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Socket.IO pub/sub broker")
+    parser.add_argument("--host", default="127.0.0.1", help="Loopback address to bind")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+    if not is_loopback(args.host):
+        parser.error("--host must be a loopback address; the broker has no authentication")
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
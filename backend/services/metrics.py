@@ -0,0 +1,146 @@
+"""
+Prometheus metrics for the API process.
+Collectors live in the default registry and are served by GET /metrics.
+Label values are bounded (route templates, query names, known event
+types) and hot paths bind label children once, so recording a sample is a
+dict lookup and a locked add.
+"""
+import time
+from functools import wraps
+from typing import Dict, Iterable, Tuple
+
+import socketio
+from prometheus_client import Counter, Gauge, Histogram
+
+from services.leveling_service import leveling_service
+
+
+HTTP_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "hub_http_request_duration_seconds",
+    "HTTP request latency by route template, method and status",
+    ["method", "route", "status"],
+    buckets=HTTP_BUCKETS
+)
+DB_QUERY_SECONDS = Histogram(
+    "hub_db_query_duration_seconds",
+    "Database call latency by table and query",
+    ["table", "operation"],
+    buckets=DB_BUCKETS
+)
+DB_QUERY_ERRORS = Counter(
+    "hub_db_query_errors_total",
+    "Database calls that raised, by table and query",
+    ["table", "operation"]
+)
+SOCKETIO_CLIENTS = Gauge(
+    "hub_socketio_connected_clients",
+    "Currently connected Socket.IO clients"
+)
+SOCKETIO_EMITS = Counter(
+    "hub_socketio_emits_total",
+    "Socket.IO emits by event",
+    ["event"]
+)
+XP_EVENTS_INGESTED = Counter(
+    "hub_xp_events_ingested_total",
+    "XP events received by the API, by event type",
+    ["event_type"]
+)
+EVENT_LOOP_LAG = Histogram(
+    "hub_event_loop_lag_seconds",
+    "How late the event loop ran a periodic wake-up",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+DB_PING_SECONDS = Gauge(
+    "hub_db_ping_seconds",
+    "Round-trip time of the last readiness database ping"
+)
+
+# Pre-bound children for the XP hot path; anything unknown is counted as "other"
+_xp_ingested = {event_type: XP_EVENTS_INGESTED.labels(event_type) for event_type in leveling_service.XP_AMOUNTS}
+_xp_ingested_other = XP_EVENTS_INGESTED.labels("other")
+
+
+def count_xp_events(event_types: Iterable[str]):
+    """Count ingested XP events by type."""
+    counts: Dict[str, int] = {}
+    for event_type in event_types:
+        counts[event_type] = counts.get(event_type, 0) + 1
+    for event_type, count in counts.items():
+        _xp_ingested.get(event_type, _xp_ingested_other).inc(count)
+
+
+def observe_query(table: str):
+    """
+    Decorate a database method to record its latency and errors.
+
+    Args:
+        table: Table the query is mainly about; the method name is the operation
+    """
+    def decorator(func):
+        histogram = DB_QUERY_SECONDS.labels(table, func.__name__)
+        errors = DB_QUERY_ERRORS.labels(table, func.__name__)
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route template.
+
+    Written against raw ASGI rather than BaseHTTPMiddleware so it adds no
+    extra task or body buffering per request. Unmatched paths share one
+    "unmatched" route label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._children: Dict[Tuple[str, str, int], Histogram] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            # The router stores the matched route in the shared scope dict
+            route = scope.get("route")
+            key = (scope["method"], route.path if route is not None else "unmatched", status_code)
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = HTTP_REQUEST_SECONDS.labels(*key)
+            child.observe(elapsed)
+
+
+class MeteredAsyncServer(socketio.AsyncServer):
+    """Socket.IO server that counts every emit by event name."""
+
+    async def emit(self, event, *args, **kwargs):
+        SOCKETIO_EMITS.labels(event).inc()
+        await super().emit(event, *args, **kwargs)
@@ -1,42 +1,123 @@
 """
-Mock database service for testing without Supabase.
+In-memory database backend for local development and load testing.
+MockDatabase implements the same async interface as DatabaseService over
+indexed in-process tables, so the whole API can run on one machine without
+PostgreSQL/Supabase (DATABASE_BACKEND=memory). An optional per-call latency
+stands in for the network round trip.
 """
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+import asyncio
+import time
 import uuid
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from itertools import islice
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple, Union
+from uuid import UUID
+
+from sortedcontainers import SortedDict, SortedList
+
+from config import settings
+from services.level_table import LevelTable
+from services.leveling_service import LevelingService
+
+
+# Columns that may be written through update_user / update_tool (as in DatabaseService)
+USER_UPDATE_COLUMNS = {"username", "avatar_url", "xp", "level", "rank_tier", "streak_days"}
+TOOL_UPDATE_COLUMNS = {"name", "description", "icon", "required_level", "tier", "config", "enabled"}
+
+# Primary key columns per table
+PRIMARY_KEYS = {
+    'users': ('id',),
+    'tools': ('id',),
+    'user_tool_access': ('user_id', 'tool_id'),
+    'xp_events': ('id',),
+    'xp_daily_totals': ('guild_id', 'user_id', 'day', 'event_type'),
+    'guild_leveling_profiles': ('guild_id',),
+}
+
+# Columns stored as UUIDs; string values are converted on write and in filters
+UUID_COLUMNS = {'id', 'user_id', 'tool_id'}
+
+# Highest value an INTEGER column can hold
+MAX_INTEGER = 2**31 - 1
+
+
+def utc_now() -> datetime:
+    """Current time as an aware UTC datetime, like TIMESTAMP WITH TIME ZONE columns."""
+    return datetime.now(timezone.utc)
+
+
+def _coerce(column: str, value: Any) -> Any:
+    """Convert string IDs to UUIDs for UUID columns."""
+    if column in UUID_COLUMNS and isinstance(value, str):
+        return UUID(value)
+    return value
 
 
 class MockDatabase:
-    """Mock database for testing."""
-    
-    def __init__(self):
-        self.users: Dict[str, Dict] = {}
-        self.tools: Dict[str, Dict] = {}
-        self.user_tool_access: List[Dict] = []
-        self.xp_events: List[Dict] = []
-        
-        # Initialize with sample data
-        self._init_sample_data()
-    
+    """
+    In-memory tables with the indexes the API's queries rely on.
+
+    - users: primary key `id`, unique (guild_id, discord_id) kept in a
+      SortedDict (hash lookup plus ordered keyset scans), a hash index on
+      `discord_id`, and a per-guild SortedList on xp for leaderboards
+    - tools: primary key `id`
+    - user_tool_access: primary key (user_id, tool_id) and a hash index on `user_id`
+    - xp_events: primary key `id` and a hash index on `user_id`
+    - xp_daily_totals: primary key (guild_id, user_id, day, event_type) and
+      hash indexes on `user_id` and `guild_id`
+    - guild_leveling_profiles: primary key `guild_id`, plus the compiled level table
+
+    Writes go through _insert/_update/_delete, which keep every index in
+    step and emulate the schema's defaults, constraints and triggers
+    (updated_at, users.unlocked_tools_count, xp_daily_totals). Rows are
+    returned as copies.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, seed: bool = True):
+        """
+        Initialize empty tables.
+
+        Args:
+            latency_ms: Simulated round-trip time added to every async call
+            seed: Insert a sample user and tools
+        """
+        self.latency = latency_ms / 1000
+        self._rows: Dict[str, Dict[Tuple, Dict[str, Any]]] = {table: {} for table in PRIMARY_KEYS}
+
+        # users indexes
+        self._members: SortedDict = SortedDict()  # (guild_id, discord_id) -> id
+        self._users_by_discord_id: Dict[str, set] = defaultdict(set)
+        self._users_by_xp: Dict[str, SortedList] = defaultdict(SortedList)  # guild_id -> (-xp, discord_id, id)
+        self._users_by_created: Dict[str, Dict[UUID, None]] = defaultdict(dict)  # guild_id -> ids in insert order
+
+        # user_tool_access / xp_events indexes
+        self._access_by_user: Dict[UUID, Dict[UUID, Dict[str, Any]]] = defaultdict(dict)
+        self._events_by_user: Dict[UUID, List[Dict[str, Any]]] = defaultdict(list)
+
+        # xp_daily_totals indexes
+        self._totals_by_user: Dict[UUID, Dict[Tuple, Dict[str, Any]]] = defaultdict(dict)
+        self._totals_by_guild: Dict[str, Dict[Tuple, Dict[str, Any]]] = defaultdict(dict)
+
+        # guild_id -> compiled level table of the guild's stored profile
+        self._profile_tables: Dict[str, LevelTable] = {}
+
+        if seed:
+            self._init_sample_data()
+
     def _init_sample_data(self):
         """Initialize with sample users and tools."""
-        # Sample user
-        user_id = str(uuid.uuid4())
-        self.users['123456789'] = {
-            'id': user_id,
+        user = self._insert('users', {
             'discord_id': '123456789',
             'username': 'TestUser',
             'avatar_url': 'https://cdn.discordapp.com/embed/avatars/0.png',
             'xp': 250,
-            'level': 3,
+            'level': 1,
             'rank_tier': 'Basic',
             'streak_days': 5,
-            'last_active': datetime.utcnow().isoformat(),
-            'created_at': datetime.utcnow().isoformat(),
-            'updated_at': datetime.utcnow().isoformat()
-        }
-        
-        # Sample tools
+            'last_active': utc_now()
+        })
+
         tools_data = [
             {'name': 'Basic Chat', 'tier': 'Basic', 'required_level': 1, 'icon': '💬'},
             {'name': 'Profile Customization', 'tier': 'Basic', 'required_level': 1, 'icon': '🎨'},
@@ -44,117 +125,757 @@ class MockDatabase:
             {'name': 'Voice Channels', 'tier': 'Member', 'required_level': 11, 'icon': '🎤'},
             {'name': 'AI Chat Assistant', 'tier': 'Advanced', 'required_level': 26, 'icon': '🤖'},
         ]
-        
-        for tool_data in tools_data:
-            tool_id = str(uuid.uuid4())
-            self.tools[tool_id] = {
-                'id': tool_id,
-                'name': tool_data['name'],
-                'description': f"Access to {tool_data['name']}",
-                'icon': tool_data['icon'],
-                'required_level': tool_data['required_level'],
-                'tier': tool_data['tier'],
-                'enabled': True,
-                'config': {},
-                'created_at': datetime.utcnow().isoformat(),
-                'updated_at': datetime.utcnow().isoformat()
-            }
-        
+        tools = [
+            self._insert('tools', {**tool_data, 'description': f"Access to {tool_data['name']}"})
+            for tool_data in tools_data
+        ]
+
         # Unlock first 2 tools for test user
-        unlocked_tools = list(self.tools.values())[:2]
-        for tool in unlocked_tools:
-            self.user_tool_access.append({
-                'user_id': user_id,
-                'tool_id': tool['id'],
-                'unlocked_at': datetime.utcnow().isoformat(),
-                'usage_count': 0
-            })
-    
-    def table(self, table_name: str):
-        """Mock table method."""
+        for tool in tools[:2]:
+            self._insert('user_tool_access', {'user_id': user['id'], 'tool_id': tool['id']})
+
+    def table(self, table_name: str) -> "MockTable":
+        """Start a query builder on a table."""
+        if table_name not in PRIMARY_KEYS:
+            raise ValueError(f'relation "{table_name}" does not exist')
         return MockTable(self, table_name)
 
+    # Storage primitives
+
+    def _key(self, table: str, row: Dict[str, Any]) -> Tuple:
+        return tuple(row[column] for column in PRIMARY_KEYS[table])
+
+    def _insert(self, table: str, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert one row with schema defaults; raises on key or constraint violations."""
+        now = utc_now()
+        row = {column: _coerce(column, value) for column, value in values.items()}
+
+        if table == 'users':
+            row = {
+                'id': uuid.uuid4(), 'guild_id': 'global', 'avatar_url': None, 'xp': 0, 'level': 1,
+                'rank_tier': 'Basic', 'streak_days': 0, 'unlocked_tools_count': 0,
+                'last_active': None, 'created_at': now, 'updated_at': now, **row
+            }
+            self._check_user(row)
+            if (row['guild_id'], row['discord_id']) in self._members:
+                raise ValueError(
+                    f"duplicate key value violates unique constraint \"users_guild_id_discord_id_key\": "
+                    f"({row['guild_id']}, {row['discord_id']})"
+                )
+        elif table == 'tools':
+            row = {
+                'id': uuid.uuid4(), 'icon': '🛠️', 'enabled': True, 'config': {},
+                'created_at': now, 'updated_at': now, **row
+            }
+        elif table == 'user_tool_access':
+            row = {'unlocked_at': now, 'usage_count': 0, **row}
+            if self._key('users', {'id': row['user_id']}) not in self._rows['users']:
+                raise ValueError(f"user_tool_access.user_id {row['user_id']} is not present in users")
+            if self._key('tools', {'id': row['tool_id']}) not in self._rows['tools']:
+                raise ValueError(f"user_tool_access.tool_id {row['tool_id']} is not present in tools")
+        elif table == 'xp_events':
+            row = {
+                'id': uuid.uuid4(), 'guild_id': 'global', 'channel_id': None, 'metadata': {},
+                'created_at': now, **row
+            }
+        elif table == 'guild_leveling_profiles':
+            row = {'created_at': now, 'updated_at': now, **row}
+
+        key = self._key(table, row)
+        if key in self._rows[table]:
+            raise ValueError(f"duplicate key value violates unique constraint \"{table}_pkey\": {key}")
+        self._rows[table][key] = row
+        self._index(table, row)
+        if table == 'users':
+            self._users_by_created[row['guild_id']][row['id']] = None
+
+        if table == 'user_tool_access':
+            user = self._rows['users'][(row['user_id'],)]
+            self._update('users', user, {'unlocked_tools_count': user['unlocked_tools_count'] + 1})
+        elif table == 'xp_events' and row['user_id'] is not None:
+            self._roll_up(row)
+        return row
+
+    def _roll_up(self, event: Dict[str, Any]):
+        """Add a logged event to its daily total, like the roll_up_xp_events trigger."""
+        day = event['created_at'].astimezone(timezone.utc).date()
+        total = self._rows['xp_daily_totals'].get((event['guild_id'], event['user_id'], day, event['event_type']))
+        if total is None:
+            self._insert('xp_daily_totals', {
+                'guild_id': event['guild_id'], 'user_id': event['user_id'], 'day': day,
+                'event_type': event['event_type'], 'events': 1, 'xp': event['xp_amount']
+            })
+        else:
+            total['events'] += 1
+            total['xp'] += event['xp_amount']
+
+    def _update(self, table: str, row: Dict[str, Any], fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Update one stored row in place, re-indexing it."""
+        fields = {column: _coerce(column, value) for column, value in fields.items()}
+        if table == 'users':
+            self._check_user({**row, **fields})
+        if table in ('users', 'tools', 'guild_leveling_profiles'):
+            fields.setdefault('updated_at', utc_now())
+
+        old_key = self._key(table, row)
+        old_guild_id = row.get('guild_id')
+        self._unindex(table, row)
+        row.update(fields)
+        if table == 'users' and row['guild_id'] != old_guild_id:
+            del self._users_by_created[old_guild_id][row['id']]
+            self._users_by_created[row['guild_id']][row['id']] = None
+        new_key = self._key(table, row)
+        if new_key != old_key:
+            del self._rows[table][old_key]
+            self._rows[table][new_key] = row
+        self._index(table, row)
+        return row
+
+    def _delete(self, table: str, row: Dict[str, Any]):
+        """Delete one row, cascading like the schema's foreign keys."""
+        if table == 'users':
+            for access in list(self._access_by_user.get(row['id'], {}).values()):
+                self._delete('user_tool_access', access)
+            for event in list(self._events_by_user.get(row['id'], [])):
+                self._delete('xp_events', event)
+            for total in list(self._totals_by_user.get(row['id'], {}).values()):
+                self._delete('xp_daily_totals', total)
+        elif table == 'tools':
+            for access in [
+                access for access in self._rows['user_tool_access'].values()
+                if access['tool_id'] == row['id']
+            ]:
+                self._delete('user_tool_access', access)
+
+        self._unindex(table, row)
+        del self._rows[table][self._key(table, row)]
+        if table == 'users':
+            del self._users_by_created[row['guild_id']][row['id']]
+
+        if table == 'user_tool_access':
+            user = self._rows['users'].get((row['user_id'],))
+            if user is not None:
+                self._update('users', user, {'unlocked_tools_count': max(0, user['unlocked_tools_count'] - 1)})
+
+    def _index(self, table: str, row: Dict[str, Any]):
+        """Add a row to its table's secondary indexes."""
+        if table == 'users':
+            self._members[(row['guild_id'], row['discord_id'])] = row['id']
+            self._users_by_discord_id[row['discord_id']].add(row['id'])
+            self._users_by_xp[row['guild_id']].add((-row['xp'], row['discord_id'], row['id']))
+        elif table == 'user_tool_access':
+            self._access_by_user[row['user_id']][row['tool_id']] = row
+        elif table == 'xp_events':
+            self._events_by_user[row['user_id']].append(row)
+        elif table == 'xp_daily_totals':
+            key = self._key(table, row)
+            self._totals_by_user[row['user_id']][key] = row
+            self._totals_by_guild[row['guild_id']][key] = row
+        elif table == 'guild_leveling_profiles':
+            self._profile_tables[row['guild_id']] = LevelTable(
+                row['level_thresholds'], row['tier_starts'], row['tier_names']
+            )
+
+    def _unindex(self, table: str, row: Dict[str, Any]):
+        """Remove a row from its table's secondary indexes."""
+        if table == 'users':
+            del self._members[(row['guild_id'], row['discord_id'])]
+            self._users_by_discord_id[row['discord_id']].discard(row['id'])
+            if not self._users_by_discord_id[row['discord_id']]:
+                del self._users_by_discord_id[row['discord_id']]
+            self._users_by_xp[row['guild_id']].remove((-row['xp'], row['discord_id'], row['id']))
+        elif table == 'user_tool_access':
+            self._access_by_user[row['user_id']].pop(row['tool_id'], None)
+            if not self._access_by_user[row['user_id']]:
+                del self._access_by_user[row['user_id']]
+        elif table == 'xp_events':
+            events = self._events_by_user[row['user_id']]
+            del events[next(position for position, event in enumerate(events) if event is row)]
+            if not events:
+                del self._events_by_user[row['user_id']]
+        elif table == 'xp_daily_totals':
+            key = self._key(table, row)
+            for index, owner in ((self._totals_by_user, row['user_id']), (self._totals_by_guild, row['guild_id'])):
+                index[owner].pop(key, None)
+                if not index[owner]:
+                    del index[owner]
+        elif table == 'guild_leveling_profiles':
+            self._profile_tables.pop(row['guild_id'], None)
+
+    @staticmethod
+    def _check_user(row: Dict[str, Any]):
+        """Enforce the users CHECK constraints and INTEGER range."""
+        if not 0 <= row['xp'] <= MAX_INTEGER:
+            raise ValueError(f'new row for relation "users" violates check constraint "users_xp_check": xp={row["xp"]}')
+        if row['level'] < 1:
+            raise ValueError(f'new row for relation "users" violates check constraint "users_level_check"')
+
+    def _member(self, guild_id: str, discord_id: str) -> Optional[Dict[str, Any]]:
+        user_id = self._members.get((guild_id, discord_id))
+        return None if user_id is None else self._rows['users'][(user_id,)]
+
+    def _level_table(self, guild_id: str) -> LevelTable:
+        return self._profile_tables.get(guild_id, LevelingService.LEVEL_TABLE)
+
+    async def _round_trip(self):
+        """Simulate network latency (and always yield, like real I/O)."""
+        await asyncio.sleep(self.latency)
+
+    # Lifecycle
+
+    async def connect(self) -> None:
+        """Nothing to connect to."""
+
+    async def disconnect(self) -> None:
+        """Nothing to disconnect from."""
+
+    # Users
+
+    async def get_user(self, discord_id: str, guild_id: str) -> Optional[Dict[str, Any]]:
+        """Get a guild member by Discord ID."""
+        await self._round_trip()
+        user = self._member(guild_id, discord_id)
+        return dict(user) if user is not None else None
+
+    async def upsert_user(
+        self,
+        discord_id: str,
+        guild_id: str,
+        username: str,
+        avatar_url: Optional[str]
+    ) -> Dict[str, Any]:
+        """Create a guild member, or refresh username/avatar if they already exist."""
+        await self._round_trip()
+        user = self._member(guild_id, discord_id)
+        if user is None:
+            user = self._insert('users', {
+                'guild_id': guild_id, 'discord_id': discord_id,
+                'username': username, 'avatar_url': avatar_url
+            })
+        else:
+            self._update('users', user, {'username': username, 'avatar_url': avatar_url})
+        return dict(user)
+
+    async def update_user(self, discord_id: str, guild_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update selected columns of a guild member. Returns the updated row or None."""
+        columns = [name for name in fields if name in USER_UPDATE_COLUMNS]
+        if not columns:
+            raise ValueError("No updatable fields provided")
+
+        await self._round_trip()
+        user = self._member(guild_id, discord_id)
+        if user is None:
+            return None
+        return dict(self._update('users', user, {name: fields[name] for name in columns}))
+
+    async def list_users(self, guild_id: str, limit: int, offset: int) -> List[Dict[str, Any]]:
+        """List a guild's members with offset pagination."""
+        await self._round_trip()
+        ids = islice(self._users_by_created.get(guild_id, {}), offset, offset + limit)
+        return [dict(self._rows['users'][(user_id,)]) for user_id in ids]
+
+    async def get_leaderboard(self, guild_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Get a guild's top members by XP."""
+        await self._round_trip()
+        entries = self._users_by_xp.get(guild_id, [])
+        return [dict(self._rows['users'][(user_id,)]) for _, _, user_id in entries[:limit]]
+
+    async def get_users_by_discord_ids(self, guild_id: str, discord_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get several guild members by Discord ID (order not preserved)."""
+        await self._round_trip()
+        users = (self._member(guild_id, discord_id) for discord_id in set(discord_ids))
+        return [dict(user) for user in users if user is not None]
+
+    async def get_all_user_xp(self) -> List[Tuple[str, str, int]]:
+        """Get (guild_id, discord_id, xp) for every user, used to build the rank indexes."""
+        await self._round_trip()
+        return [(user['guild_id'], user['discord_id'], user['xp']) for user in self._rows['users'].values()]
+
+    async def get_user_levels_page(
+        self,
+        after_guild_id: str,
+        after_discord_id: str,
+        limit: int,
+        guild_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get the next keyset page of (guild_id, discord_id, xp, level, rank_tier) rows."""
+        await self._round_trip()
+        start = (guild_id, after_discord_id) if guild_id is not None else (after_guild_id, after_discord_id)
+        page = []
+        for member in self._members.irange(minimum=start, inclusive=(False, True)):
+            if len(page) == limit or (guild_id is not None and member[0] != guild_id):
+                break
+            user = self._rows['users'][(self._members[member],)]
+            page.append({column: user[column] for column in ('guild_id', 'discord_id', 'xp', 'level', 'rank_tier')})
+        return page
+
+    async def update_user_levels(
+        self,
+        guild_ids: List[str],
+        discord_ids: List[str],
+        xp_values: List[int],
+        levels: List[int],
+        rank_tiers: List[str]
+    ) -> int:
+        """Write recalculated levels and tiers for members whose XP still matches. Returns the rows updated."""
+        await self._round_trip()
+        updated = 0
+        for guild_id, discord_id, xp, level, rank_tier in zip(guild_ids, discord_ids, xp_values, levels, rank_tiers):
+            user = self._member(guild_id, discord_id)
+            if user is not None and user['xp'] == xp:
+                self._update('users', user, {'level': level, 'rank_tier': rank_tier})
+                updated += 1
+        return updated
+
+    async def estimate_user_count(self, guild_id: Optional[str] = None) -> int:
+        """Member count for a guild, or for the whole table."""
+        await self._round_trip()
+        if guild_id is not None:
+            return len(self._users_by_xp.get(guild_id, ()))
+        return len(self._rows['users'])
+
+    # XP events
+
+    async def award_xp(
+        self,
+        discord_id: str,
+        guild_id: str,
+        event_type: str,
+        xp_amount: int,
+        channel_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Add XP, recompute level/tier from the guild's profile and log the event."""
+        awards = await self.award_xp_batch([guild_id], [discord_id], [event_type], [xp_amount], [channel_id])
+        if not awards:
+            return None
+        award = awards[0]
+        return {
+            column: award[column]
+            for column in ('user_id', 'old_xp', 'new_xp', 'old_level', 'new_level', 'rank_tier')
+        }
+
+    async def award_xp_batch(
+        self,
+        guild_ids: List[str],
+        discord_ids: List[str],
+        event_types: List[str],
+        xp_amounts: List[int],
+        channel_ids: List[Optional[str]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Apply a batch of XP events, grouped per guild member.
+
+        Every member is validated before anything is written, so a batch
+        that would break a constraint changes nothing, as in one transaction.
+        """
+        await self._round_trip()
+        events = list(zip(guild_ids, discord_ids, event_types, xp_amounts, channel_ids))
+
+        totals: Dict[Tuple[str, str], int] = {}
+        for guild_id, discord_id, _, xp_amount, _ in events:
+            member = (guild_id, discord_id)
+            totals[member] = totals.get(member, 0) + xp_amount
+
+        awards = []
+        for (guild_id, discord_id), xp_gained in totals.items():
+            user = self._member(guild_id, discord_id)
+            if user is None:
+                continue
+            table = self._level_table(guild_id)
+            new_xp = user['xp'] + xp_gained
+            new_level = table.level_for(new_xp)
+            self._check_user({**user, 'xp': new_xp, 'level': new_level})
+            awards.append({
+                'guild_id': guild_id,
+                'discord_id': discord_id,
+                'user_id': user['id'],
+                'xp_gained': xp_gained,
+                'old_xp': user['xp'],
+                'new_xp': new_xp,
+                'old_level': user['level'],
+                'new_level': new_level,
+                'rank_tier': table.tier_for(new_level)
+            })
+
+        now = utc_now()
+        for award in awards:
+            user = self._member(award['guild_id'], award['discord_id'])
+            self._update('users', user, {
+                'xp': award['new_xp'],
+                'level': award['new_level'],
+                'rank_tier': award['rank_tier'],
+                'last_active': now
+            })
+
+        known = {(award['guild_id'], award['discord_id']): award['user_id'] for award in awards}
+        for guild_id, discord_id, event_type, xp_amount, channel_id in events:
+            user_id = known.get((guild_id, discord_id))
+            if user_id is not None:
+                self._insert('xp_events', {
+                    'guild_id': guild_id, 'user_id': user_id, 'event_type': event_type,
+                    'xp_amount': xp_amount, 'channel_id': channel_id, 'created_at': now
+                })
+        return awards
+
+    async def get_xp_history(self, guild_id: str, user_id: UUID, limit: int) -> List[Dict[str, Any]]:
+        """Get the most recent XP events for a guild member."""
+        await self._round_trip()
+        history = []
+        for event in reversed(self._events_by_user.get(_coerce('user_id', user_id), [])):
+            if len(history) == limit:
+                break
+            if event['guild_id'] == guild_id:
+                history.append(dict(event))
+        return history
+
+    async def delete_xp_events_before(self, cutoff: datetime, limit: int) -> int:
+        """Delete up to `limit` raw XP events logged before a cutoff; daily totals are kept."""
+        await self._round_trip()
+        deleted = 0
+        for events in list(self._events_by_user.values()):
+            old = list(islice((event for event in events if event['created_at'] < cutoff), limit - deleted))
+            for event in old:
+                self._delete('xp_events', event)
+            deleted += len(old)
+            if deleted >= limit:
+                break
+        return deleted
+
+    # XP daily totals
+
+    async def get_xp_daily_totals(
+        self,
+        guild_id: str,
+        user_id: UUID,
+        start_day: date,
+        end_day: date
+    ) -> List[Dict[str, Any]]:
+        """Get a guild member's XP per UTC day and event type between two days (inclusive), newest first."""
+        await self._round_trip()
+        rows = [
+            {'day': total['day'], 'event_type': total['event_type'], 'events': total['events'], 'xp': total['xp']}
+            for total in self._totals_by_user.get(_coerce('user_id', user_id), {}).values()
+            if total['guild_id'] == guild_id and start_day <= total['day'] <= end_day
+        ]
+        rows.sort(key=lambda row: row['event_type'])
+        rows.sort(key=lambda row: row['day'], reverse=True)
+        return rows
+
+    async def get_guild_xp_daily_totals(self, guild_id: str, start_day: date, end_day: date) -> List[Dict[str, Any]]:
+        """Get a guild's XP and active members per UTC day and event type between two days (inclusive), newest first."""
+        await self._round_trip()
+        grouped: Dict[Tuple[date, str], Dict[str, Any]] = {}
+        for total in self._totals_by_guild.get(guild_id, {}).values():
+            if not start_day <= total['day'] <= end_day:
+                continue
+            row = grouped.setdefault((total['day'], total['event_type']), {
+                'day': total['day'], 'event_type': total['event_type'], 'events': 0, 'xp': 0, 'active_members': 0
+            })
+            row['events'] += total['events']
+            row['xp'] += total['xp']
+            row['active_members'] += 1
+        return [grouped[key] for key in sorted(grouped, key=lambda key: (-key[0].toordinal(), key[1]))]
+
+    # Leveling profiles
+
+    async def get_leveling_profiles(self) -> List[Dict[str, Any]]:
+        """Get every guild's stored leveling profile with its compiled tables."""
+        await self._round_trip()
+        return [dict(row) for row in self._rows['guild_leveling_profiles'].values()]
+
+    async def get_leveling_profile(self, guild_id: str) -> Optional[Dict[str, Any]]:
+        """Get one guild's stored leveling profile."""
+        await self._round_trip()
+        row = self._rows['guild_leveling_profiles'].get((guild_id,))
+        return dict(row) if row is not None else None
+
+    async def upsert_leveling_profile(
+        self,
+        guild_id: str,
+        profile: Dict[str, Any],
+        level_thresholds: List[int],
+        tier_starts: List[int],
+        tier_names: List[str]
+    ) -> Dict[str, Any]:
+        """Store a guild's profile together with its compiled thresholds and tier bands."""
+        await self._round_trip()
+        fields = {
+            'profile': profile,
+            'level_thresholds': list(level_thresholds),
+            'tier_starts': list(tier_starts),
+            'tier_names': list(tier_names)
+        }
+        row = self._rows['guild_leveling_profiles'].get((guild_id,))
+        if row is None:
+            row = self._insert('guild_leveling_profiles', {'guild_id': guild_id, **fields})
+        else:
+            self._update('guild_leveling_profiles', row, fields)
+        return dict(row)
+
+    async def delete_leveling_profile(self, guild_id: str) -> bool:
+        """Delete a guild's profile. Returns True if one existed."""
+        await self._round_trip()
+        row = self._rows['guild_leveling_profiles'].get((guild_id,))
+        if row is None:
+            return False
+        self._delete('guild_leveling_profiles', row)
+        return True
+
+    # Tools
+
+    async def list_tools(self, tier: Optional[str] = None, enabled_only: bool = True) -> List[Dict[str, Any]]:
+        """List tools ordered by required level."""
+        await self._round_trip()
+        tools = [
+            tool for tool in self._rows['tools'].values()
+            if (tier is None or tool['tier'] == tier) and (not enabled_only or tool['enabled'])
+        ]
+        return [dict(tool) for tool in sorted(tools, key=lambda tool: tool['required_level'])]
+
+    async def get_tool(self, tool_id: UUID) -> Optional[Dict[str, Any]]:
+        """Get a tool by ID."""
+        await self._round_trip()
+        tool = self._rows['tools'].get((_coerce('id', tool_id),))
+        return dict(tool) if tool is not None else None
+
+    async def create_tool(self, tool_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert a new tool."""
+        await self._round_trip()
+        return dict(self._insert('tools', {
+            'name': tool_data['name'],
+            'description': tool_data['description'],
+            'icon': tool_data['icon'],
+            'required_level': tool_data['required_level'],
+            'tier': tool_data['tier'],
+            'config': tool_data.get('config') or {},
+            'enabled': tool_data.get('enabled', True)
+        }))
+
+    async def update_tool(self, tool_id: UUID, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update selected columns of a tool. Returns the updated row or None."""
+        columns = [name for name in fields if name in TOOL_UPDATE_COLUMNS]
+        if not columns:
+            raise ValueError("No updatable fields provided")
+
+        await self._round_trip()
+        tool = self._rows['tools'].get((_coerce('id', tool_id),))
+        if tool is None:
+            return None
+        return dict(self._update('tools', tool, {name: fields[name] for name in columns}))
+
+    async def get_tools_watermark(self) -> Tuple[int, Optional[datetime]]:
+        """Cheap version of the tools table: (row count, latest updated_at)."""
+        await self._round_trip()
+        tools = self._rows['tools'].values()
+        return len(tools), max((tool['updated_at'] for tool in tools), default=None)
+
+    async def get_user_with_tool_access(self, discord_id: str, guild_id: str) -> Optional[Dict[str, Any]]:
+        """Get a guild member plus parallel arrays of their tool access rows."""
+        await self._round_trip()
+        user = self._member(guild_id, discord_id)
+        if user is None:
+            return None
+        access = list(self._access_by_user.get(user['id'], {}).values())
+        return {
+            **user,
+            'access_tool_ids': [row['tool_id'] for row in access],
+            'access_unlocked_at': [row['unlocked_at'] for row in access],
+            'access_usage_counts': [row['usage_count'] for row in access]
+        }
+
+    async def get_user_tool_access(self, user_id: UUID) -> List[Dict[str, Any]]:
+        """Get all tool access rows for a user."""
+        await self._round_trip()
+        return [dict(row) for row in self._access_by_user.get(_coerce('user_id', user_id), {}).values()]
+
+    async def grant_tool_access(self, user_id: UUID, tool_id: UUID) -> bool:
+        """Grant a tool to a user. Returns False if it was already unlocked."""
+        return bool(await self.grant_tools_bulk([user_id], [tool_id]))
+
+    async def grant_tools_bulk(self, user_ids: List[UUID], tool_ids: List[UUID]) -> List[Dict[str, Any]]:
+        """Grant many (user, tool) pairs, skipping ones already granted. Returns the new pairs."""
+        await self._round_trip()
+        granted = []
+        for user_id, tool_id in zip(user_ids, tool_ids):
+            user_id, tool_id = _coerce('user_id', user_id), _coerce('tool_id', tool_id)
+            if tool_id in self._access_by_user.get(user_id, {}):
+                continue
+            self._insert('user_tool_access', {'user_id': user_id, 'tool_id': tool_id})
+            granted.append({'user_id': user_id, 'tool_id': tool_id})
+        return granted
+
+    async def ping(self, timeout: float) -> float:
+        """Round-trip time of a simulated call in seconds."""
+        started = time.perf_counter()
+        await asyncio.wait_for(self._round_trip(), timeout)
+        return time.perf_counter() - started
+
+    async def health_check(self) -> bool:
+        """The in-memory backend is always reachable."""
+        await self._round_trip()
+        return True
+
 
 class MockTable:
-    """Mock table for query building."""
-    
+    """
+    Supabase-style query builder over a MockDatabase table.
+
+    Filters on indexed columns (users.id/discord_id/guild_id, *.id,
+    user_tool_access.user_id, xp_events.user_id) use the indexes, and
+    `users` ordered by xp within a guild walks the sorted xp index.
+    insert/upsert/update/delete take effect on execute(), like the client.
+    """
+
     def __init__(self, db: MockDatabase, table_name: str):
         self.db = db
         self.table_name = table_name
-        self._filters = {}
+        self._filters: List[Tuple[str, Any]] = []
         self._select_fields = '*'
-        self._limit_val = None
-        self._order_by = None
-    
+        self._order_by: Optional[Tuple[str, bool]] = None
+        self._offset = 0
+        self._limit_val: Optional[int] = None
+        self._write: Optional[Tuple[str, Any, Optional[str]]] = None
+
     def select(self, fields: str = '*'):
         self._select_fields = fields
         return self
-    
+
     def eq(self, field: str, value: Any):
-        self._filters[field] = value
+        self._filters.append((field, _coerce(field, value)))
         return self
-    
+
+    def order(self, field: str, desc: bool = False):
+        self._order_by = (field, desc)
+        return self
+
     def limit(self, n: int):
         self._limit_val = n
         return self
-    
-    def order(self, field: str, desc: bool = False):
-        self._order_by = (field, desc)
+
+    def range(self, start: int, end: int):
+        """Rows start..end inclusive (offset pagination)."""
+        self._offset = start
+        self._limit_val = max(0, end - start + 1)
+        return self
+
+    def insert(self, data: Union[Dict, List[Dict]]):
+        self._write = ('insert', data, None)
+        return self
+
+    def upsert(self, data: Union[Dict, List[Dict]], on_conflict: Optional[str] = None):
+        """Insert rows, updating existing ones that match on `on_conflict` columns (default: primary key)."""
+        self._write = ('upsert', data, on_conflict)
+        return self
+
+    def update(self, data: Dict):
+        self._write = ('update', data, None)
         return self
-    
-    def execute(self):
+
+    def delete(self):
+        self._write = ('delete', None, None)
+        return self
+
+    def execute(self) -> "MockResponse":
         """Execute the query."""
-        if self.table_name == 'users':
-            data = list(self.db.users.values())
-        elif self.table_name == 'tools':
-            data = list(self.db.tools.values())
-        elif self.table_name == 'user_tool_access':
-            data = self.db.user_tool_access
-        elif self.table_name == 'xp_events':
-            data = self.db.xp_events
+        if self._write is None:
+            return MockResponse([self._project(row) for row in self._select()])
+
+        operation, data, on_conflict = self._write
+        if operation in ('insert', 'upsert'):
+            rows = data if isinstance(data, list) else [data]
+            written = [
+                self._upsert_row(row, on_conflict) if operation == 'upsert'
+                else self.db._insert(self.table_name, row)
+                for row in rows
+            ]
+        elif operation == 'update':
+            written = [self.db._update(self.table_name, row, dict(data)) for row in list(self._select())]
         else:
-            data = []
-        
-        # Apply filters
-        for field, value in self._filters.items():
-            data = [item for item in data if item.get(field) == value]
-        
-        # Apply ordering
-        if self._order_by:
-            field, desc = self._order_by
-            data = sorted(data, key=lambda x: x.get(field, 0), reverse=desc)
-        
-        # Apply limit
-        if self._limit_val:
-            data = data[:self._limit_val]
-        
-        return MockResponse(data)
-    
-    def insert(self, data: Dict):
-        """Insert data."""
+            written = list(self._select())
+            for row in written:
+                self.db._delete(self.table_name, row)
+        return MockResponse([dict(row) for row in written])
+
+    def _upsert_row(self, values: Dict[str, Any], on_conflict: Optional[str]) -> Dict[str, Any]:
+        columns = on_conflict.split(',') if on_conflict else list(PRIMARY_KEYS[self.table_name])
+        columns = [column.strip() for column in columns]
+        existing = None
+        if all(column in values for column in columns):
+            matcher = MockTable(self.db, self.table_name)
+            for column in columns:
+                matcher.eq(column, values[column])
+            existing = next(iter(matcher._select()), None)
+        if existing is None:
+            return self.db._insert(self.table_name, values)
+        return self.db._update(self.table_name, existing, {
+            column: value for column, value in values.items() if column not in columns
+        })
+
+    def _candidates(self) -> Iterable[Dict[str, Any]]:
+        """Rows that can match the filters, narrowed by an index where one applies."""
+        rows = self.db._rows[self.table_name]
+        filters = dict(self._filters)
+        primary_key = PRIMARY_KEYS[self.table_name]
+        if all(column in filters for column in primary_key):
+            row = rows.get(tuple(filters[column] for column in primary_key))
+            return [row] if row is not None else []
+
         if self.table_name == 'users':
-            self.db.users[data['discord_id']] = data
-        elif self.table_name == 'tools':
-            self.db.tools[data['id']] = data
-        elif self.table_name == 'user_tool_access':
-            self.db.user_tool_access.append(data)
-        elif self.table_name == 'xp_events':
-            self.db.xp_events.append(data)
-        
-        return MockResponse([data])
-    
-    def update(self, data: Dict):
-        """Update data."""
-        return self
+            if 'guild_id' in filters and 'discord_id' in filters:
+                user = self.db._member(filters['guild_id'], filters['discord_id'])
+                return [user] if user is not None else []
+            if 'discord_id' in filters:
+                return [rows[(user_id,)] for user_id in self.db._users_by_discord_id.get(filters['discord_id'], ())]
+            if 'guild_id' in filters:
+                if self._order_by and self._order_by[0] == 'xp':
+                    return self._by_xp(filters['guild_id'], self._order_by[1])
+                return [rows[(user_id,)] for user_id in self.db._users_by_created.get(filters['guild_id'], {})]
+        elif self.table_name == 'user_tool_access' and 'user_id' in filters:
+            return list(self.db._access_by_user.get(filters['user_id'], {}).values())
+        elif self.table_name == 'xp_events' and 'user_id' in filters:
+            return list(self.db._events_by_user.get(filters['user_id'], []))
+        return list(rows.values())
+
+    def _by_xp(self, guild_id: str, desc: bool) -> Iterator[Dict[str, Any]]:
+        """A guild's users in xp order straight from the sorted index."""
+        entries = self.db._users_by_xp.get(guild_id, [])
+        for _, _, user_id in (iter(entries) if desc else reversed(entries)):
+            yield self.db._rows['users'][(user_id,)]
+
+    def _select(self) -> List[Dict[str, Any]]:
+        rows = (
+            row for row in self._candidates()
+            if all(row.get(field) == value for field, value in self._filters)
+        )
+        presorted = (
+            self.table_name == 'users' and self._order_by is not None
+            and self._order_by[0] == 'xp' and 'guild_id' in dict(self._filters)
+        )
+        if self._order_by and not presorted:
+            field, desc = self._order_by
+            rows = iter(sorted(rows, key=lambda row: (row.get(field) is None, row.get(field)), reverse=desc))
+
+        selected = []
+        for position, row in enumerate(rows):
+            if position < self._offset:
+                continue
+            if self._limit_val is not None and len(selected) >= self._limit_val:
+                break
+            selected.append(row)
+        return selected
+
+    def _project(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        if self._select_fields.strip() == '*':
+            return dict(row)
+        return {field.strip(): row.get(field.strip()) for field in self._select_fields.split(',')}
 
 
 class MockResponse:
     """Mock response object."""
-    
+
     def __init__(self, data: List[Dict]):
         self.data = data
 
 
 # Global mock database instance
-mock_db = MockDatabase()
-
+mock_db = MockDatabase(latency_ms=settings.mock_db_latency_ms)
@@ -0,0 +1,250 @@
+"""
+Profiling - event-loop stack sampling and slow-callback detection.
+Both work from a helper thread reading the loop thread's current frame, so
+they see synchronous work (validation, serialization, blocking calls) that
+per-coroutine timing misses. Nothing here runs unless it is started:
+ProfilingMiddleware is only installed when PROFILE_SAMPLE_EVERY is set and
+the watchdog only when SLOW_CALLBACK_THRESHOLD_MS is set.
+
+Profiles are written in the folded-stack format ("frame;frame;frame count"
+per line) read by flamegraph.pl, speedscope and inferno.
+"""
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from typing import Optional
+
+
+def frame_label(frame) -> str:
+    """Short 'function (file:line)' label for a frame, line being the function's first line."""
+    code = frame.f_code
+    filename = code.co_filename.rsplit("site-packages" + os.sep, 1)[-1]
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def fold_stack(frame) -> str:
+    """Root-first ';'-joined labels for a frame and its callers."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """
+    Samples one thread's stack at a fixed interval from a helper thread.
+
+    Only one sampler runs at a time per process; while a request is being
+    profiled everything else on the loop is sampled too, which is what
+    explains most tail latency.
+    """
+
+    _running: Optional['StackSampler'] = None
+    _lock = threading.Lock()
+
+    def __init__(self, interval: float):
+        """
+        Initialize the sampler.
+
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._thread_id = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def busy(cls) -> bool:
+        """Whether a sampler is already running."""
+        return cls._running is not None
+
+    def start(self, thread_id: Optional[int] = None) -> bool:
+        """
+        Start sampling.
+
+        Args:
+            thread_id: Thread to sample (default: the calling thread)
+
+        Returns:
+            False if another sampler is already running
+        """
+        with self._lock:
+            if StackSampler._running is not None:
+                return False
+            StackSampler._running = self
+        self._thread_id = thread_id or threading.get_ident()
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> Counter:
+        """Stop sampling and return folded stack -> sample count."""
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+        with self._lock:
+            StackSampler._running = None
+        return self.stacks
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self.stacks[fold_stack(frame)] += 1
+            del frame
+
+    def top_functions(self, limit: int = 15) -> list:
+        """Functions most often on top of the stack, as (label, share of samples)."""
+        total = sum(self.stacks.values())
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return [(label, round(count / total, 3)) for label, count in leaves.most_common(limit)] if total else []
+
+
+def save_profile(stacks: Counter, output_dir: str, label: str) -> str:
+    """
+    Write folded stacks to a timestamped file.
+
+    Args:
+        stacks: Folded stack -> sample count
+        output_dir: Directory for profile files (created if missing)
+        label: Short description used in the file name
+
+    Returns:
+        Path of the written file
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", label).strip("-")[:60]
+    path = os.path.join(output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 10**6:06d}-{slug}.folded")
+    with open(path, "w") as f:
+        for stack, count in stacks.items():
+            f.write(f"{stack} {count}\n")
+    return path
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that samples the event loop during 1 in N HTTP requests.
+
+    Requests arriving while another profile is running are not sampled,
+    and profiles that caught no samples are not written.
+    """
+
+    def __init__(self, app, sample_every: int, output_dir: str, interval: float, exclude_prefixes: tuple = ()):
+        """
+        Wrap an ASGI app.
+
+        Args:
+            app: ASGI app to wrap
+            sample_every: Profile every Nth HTTP request
+            output_dir: Directory for profile files
+            interval: Seconds between stack samples
+            exclude_prefixes: Paths never sampled (e.g. the on-demand profiling route)
+        """
+        self.app = app
+        self.sample_every = sample_every
+        self.output_dir = output_dir
+        self.interval = interval
+        self.exclude_prefixes = exclude_prefixes
+        self._requests = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        self._requests += 1
+        if self._requests % self.sample_every or StackSampler.busy():
+            await self.app(scope, receive, send)
+            return
+
+        sampler = StackSampler(self.interval)
+        if not sampler.start():
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            stacks = sampler.stop()
+            if stacks:
+                label = f"{scope['method']} {scope['path']} {sampler.duration * 1000:.0f}ms"
+                await asyncio.to_thread(save_profile, stacks, self.output_dir, label)
+
+
+class SlowCallbackWatchdog:
+    """
+    Logs the stack of any callback that blocks the event loop too long.
+
+    A ticker task on the loop records a heartbeat; a helper thread notices
+    when the heartbeat stops, prints the loop thread's stack while it is
+    still stuck, then prints the total stall once the loop moves again.
+    """
+
+    def __init__(self, threshold: float, name: str):
+        """
+        Initialize the watchdog.
+
+        Args:
+            threshold: Seconds a single callback may block the loop
+            name: Log prefix, e.g. "API" or "Bot"
+        """
+        self.threshold = threshold
+        self.name = name
+        self.tick_interval = min(max(threshold / 4, 0.005), 0.1)
+        self._last_tick = 0.0
+        self._thread_id = 0
+        self._ticker: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start watching the running loop. Must be called from the loop thread."""
+        self._thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._ticker = asyncio.get_running_loop().create_task(self._tick())
+        self._thread = threading.Thread(target=self._watch, name="slow-callback-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching."""
+        if self._ticker is not None:
+            self._ticker.cancel()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    async def _tick(self):
+        while True:
+            self._last_tick = time.monotonic()
+            await asyncio.sleep(self.tick_interval)
+
+    def _watch(self):
+        stalled_tick = None
+        while not self._stop.wait(self.tick_interval):
+            last_tick = self._last_tick
+            if stalled_tick is not None:
+                if last_tick != stalled_tick:
+                    blocked = last_tick - stalled_tick - self.tick_interval
+                    print(f"[{self.name}] Event loop unblocked after {blocked * 1000:.0f}ms")
+                    stalled_tick = None
+                continue
+
+            blocked = time.monotonic() - last_tick - self.tick_interval
+            if blocked > self.threshold:
+                frame = sys._current_frames().get(self._thread_id)
+                stack = "".join(traceback.format_stack(frame)) if frame is not None else "  <no frame>\n"
+                del frame
+                print(f"[{self.name}] Event loop blocked for {blocked * 1000:.0f}ms so far in:\n{stack}", end="")
+                stalled_tick = last_tick
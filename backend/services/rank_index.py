@@ -0,0 +1,141 @@
+"""
+Rank index - in-memory order statistics over user XP.
+Answers rank and "around me" queries in O(log n) without scanning users.
+Each guild has its own index, so lookups only touch that guild's members.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sortedcontainers import SortedList
+
+
+class RankIndex:
+    """Users ordered by XP (descending), ties broken by Discord ID."""
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._entries = SortedList()  # (-xp, discord_id)
+        self._xp: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._xp)
+
+    def load(self, rows: Iterable[Tuple[str, int]]):
+        """
+        Replace the index contents.
+
+        Args:
+            rows: (discord_id, xp) pairs for every user
+        """
+        self._xp = {discord_id: xp for discord_id, xp in rows}
+        self._entries = SortedList((-xp, discord_id) for discord_id, xp in self._xp.items())
+
+    def update(self, discord_id: str, xp: int):
+        """Insert a user or move them to their new XP position."""
+        old_xp = self._xp.get(discord_id)
+        if old_xp == xp:
+            return
+        if old_xp is not None:
+            self._entries.remove((-old_xp, discord_id))
+        self._entries.add((-xp, discord_id))
+        self._xp[discord_id] = xp
+
+    def remove(self, discord_id: str):
+        """Drop a user from the index."""
+        old_xp = self._xp.pop(discord_id, None)
+        if old_xp is not None:
+            self._entries.remove((-old_xp, discord_id))
+
+    def get_xp(self, discord_id: str) -> Optional[int]:
+        """Get the indexed XP for a user."""
+        return self._xp.get(discord_id)
+
+    def rank(self, discord_id: str) -> Optional[int]:
+        """
+        Get a user's 1-based leaderboard position.
+
+        Returns:
+            Rank, or None if the user is not indexed
+        """
+        xp = self._xp.get(discord_id)
+        if xp is None:
+            return None
+        return self._entries.index((-xp, discord_id)) + 1
+
+    def top(self, limit: int) -> List[Tuple[int, str, int]]:
+        """
+        Get the top users.
+
+        Returns:
+            List of (rank, discord_id, xp)
+        """
+        return self._slice(0, limit)
+
+    def around(self, discord_id: str, radius: int) -> List[Tuple[int, str, int]]:
+        """
+        Get a user plus up to `radius` users directly above and below them.
+
+        Returns:
+            List of (rank, discord_id, xp), empty if the user is not indexed
+        """
+        rank = self.rank(discord_id)
+        if rank is None:
+            return []
+        start = max(0, rank - 1 - radius)
+        return self._slice(start, rank + radius)
+
+    def _slice(self, start: int, stop: int) -> List[Tuple[int, str, int]]:
+        """Positions [start, stop) as (rank, discord_id, xp)."""
+        return [
+            (position, discord_id, -neg_xp)
+            for position, (neg_xp, discord_id) in enumerate(self._entries.islice(start, stop), start=start + 1)
+        ]
+
+
+class RankIndexRegistry:
+    """Per-guild rank indexes."""
+
+    def __init__(self):
+        """Initialize with no guilds."""
+        self._guilds: Dict[str, RankIndex] = {}
+
+    def __len__(self) -> int:
+        return len(self._guilds)
+
+    def load(self, rows: Iterable[Tuple[str, str, int]]):
+        """
+        Rebuild every guild's index.
+
+        Args:
+            rows: (guild_id, discord_id, xp) triples for every user
+        """
+        grouped: Dict[str, List[Tuple[str, int]]] = {}
+        for guild_id, discord_id, xp in rows:
+            grouped.setdefault(guild_id, []).append((discord_id, xp))
+
+        guilds = {}
+        for guild_id, members in grouped.items():
+            index = RankIndex()
+            index.load(members)
+            guilds[guild_id] = index
+        self._guilds = guilds
+
+    def get(self, guild_id: str) -> Optional[RankIndex]:
+        """Get a guild's index, or None if the guild has no members."""
+        return self._guilds.get(guild_id)
+
+    def update(self, guild_id: str, discord_id: str, xp: int):
+        """Insert or move a guild member."""
+        index = self._guilds.get(guild_id)
+        if index is None:
+            index = self._guilds[guild_id] = RankIndex()
+        index.update(discord_id, xp)
+
+    def remove(self, guild_id: str, discord_id: str):
+        """Drop a guild member."""
+        index = self._guilds.get(guild_id)
+        if index is not None:
+            index.remove(discord_id)
+
+
+# Global per-guild rank indexes
+rank_indexes = RankIndexRegistry()
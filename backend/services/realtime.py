@@ -0,0 +1,296 @@
+"""
+Real-time updates - the Socket.IO server, its rooms and targeted emits.
+Authenticated connections join one room for their Discord user and one per
+guild in their token. Events go only to the rooms they concern, and a room
+nobody is in is skipped before any packet is built, so emit cost follows the
+number of interested clients rather than the number of connections.
+
+With SOCKETIO_MESSAGE_QUEUE set, every API worker shares a pub/sub channel:
+emits reach sockets on any worker, and workers use the same channel to keep
+each other's in-memory state current (see services.cluster). XP events are
+published as one peer message per award or batch (send_emits) that each
+worker delivers to its own members.
+"""
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import socketio
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+from config import settings
+from services.local_pubsub import LocalPubSubManager
+from services.metrics import MeteredAsyncServer
+
+
+# Emits on this namespace are messages between workers, never sent to clients
+PEER_NAMESPACE = "/peers"
+
+
+def user_room(discord_id: str) -> str:
+    """Room of every connection belonging to a Discord user."""
+    return f"user:{discord_id}"
+
+
+def guild_room(guild_id: str) -> str:
+    """Room of every connection allowed to follow a guild."""
+    return f"guild:{guild_id}"
+
+
+class RoomIndexMixin:
+    """
+    Keeps a sid -> rooms index next to the manager's room -> sids map.
+
+    The stock manager finds a client's rooms by scanning every room in the
+    namespace, which with one room per user makes each disconnect cost
+    O(connected users). Mix in ahead of any Socket.IO manager class.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sid_rooms: Dict[tuple, set] = defaultdict(set)
+
+    def basic_enter_room(self, sid, namespace, room, eio_sid=None):
+        super().basic_enter_room(sid, namespace, room, eio_sid=eio_sid)
+        self.sid_rooms[(namespace, sid)].add(room)
+
+    def basic_leave_room(self, sid, namespace, room):
+        super().basic_leave_room(sid, namespace, room)
+        rooms = self.sid_rooms.get((namespace, sid))
+        if rooms is not None:
+            rooms.discard(room)
+            if not rooms:
+                del self.sid_rooms[(namespace, sid)]
+
+    def basic_disconnect(self, sid, namespace, **kwargs):
+        if namespace not in self.rooms:
+            return
+        for room in list(self.sid_rooms.get((namespace, sid), ())):
+            self.basic_leave_room(sid, namespace, room)
+        self.callbacks.pop(sid, None)
+        pending = self.pending_disconnect.get(namespace)
+        if pending is not None and sid in pending:
+            pending.remove(sid)
+            if not pending:
+                del self.pending_disconnect[namespace]
+
+    def get_rooms(self, sid, namespace):
+        return [room for room in self.sid_rooms.get((namespace, sid), ()) if room is not None]
+
+
+class PeerMessagesMixin:
+    """
+    Hands emits on PEER_NAMESPACE from other workers to registered handlers.
+
+    Peer messages travel as ordinary pub/sub emits, so they share the
+    queue connection and ordering of client events. A worker's own peer
+    messages are ignored. While held, incoming messages are queued until
+    release_peer_messages(), so state loaded at startup is not overwritten
+    by the load.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.peer_handlers: Dict[str, Callable[[Any], Awaitable[None]]] = {}
+        self.peer_backlog: Optional[List[tuple]] = None
+
+    async def _handle_emit(self, message):
+        if message.get('namespace') != PEER_NAMESPACE:
+            return await super()._handle_emit(message)
+        if message.get('host_id') == self.host_id:
+            return
+        if self.peer_backlog is not None:
+            self.peer_backlog.append((message['event'], message['data']))
+            return
+        await self.dispatch_peer_message(message['event'], message['data'])
+
+    async def dispatch_peer_message(self, event: str, data: Any):
+        handler = self.peer_handlers.get(event)
+        if handler is not None:
+            await handler(data)
+
+
+class IndexedAsyncManager(RoomIndexMixin, socketio.AsyncManager):
+    """In-process Socket.IO manager with the sid -> rooms index."""
+
+
+class IndexedAsyncRedisManager(PeerMessagesMixin, RoomIndexMixin, socketio.AsyncRedisManager):
+    """Redis-backed manager for multi-worker deployments."""
+
+
+class IndexedLocalPubSubManager(PeerMessagesMixin, RoomIndexMixin, LocalPubSubManager):
+    """Manager backed by the local broker, for single-machine workers and tests."""
+
+
+def create_client_manager(url: str):
+    """
+    Pick the Socket.IO client manager for a message queue URL.
+
+    Args:
+        url: redis://, rediss:// or local://host:port; empty for a single worker
+
+    Returns:
+        Client manager instance
+    """
+    if not url:
+        return IndexedAsyncManager()
+    if url.startswith(("redis://", "rediss://")):
+        return IndexedAsyncRedisManager(url, channel=settings.socketio_channel)
+    if url.startswith("local://"):
+        return IndexedLocalPubSubManager(url, channel=settings.socketio_channel)
+    raise ValueError(f"Unsupported SOCKETIO_MESSAGE_QUEUE scheme: {url}")
+
+
+# Global Socket.IO server
+sio = MeteredAsyncServer(
+    client_manager=create_client_manager(settings.socketio_message_queue),
+    async_mode='asgi',
+    cors_allowed_origins=settings.cors_origins,
+    logger=settings.debug,
+    engineio_logger=settings.debug
+)
+
+
+def is_shared() -> bool:
+    """Whether emits go through a message queue shared with other workers."""
+    return isinstance(sio.manager, AsyncPubSubManager)
+
+
+def has_local_listeners(room: str, namespace: str = "/") -> bool:
+    """Whether any client connected to this worker is in a room."""
+    return room in sio.manager.rooms.get(namespace, ())
+
+
+def start_message_queue():
+    """
+    Subscribe to the shared queue now rather than on the first connection,
+    holding peer messages until release_peer_messages().
+    """
+    if not is_shared() or sio.manager_initialized:
+        return
+    sio.manager.peer_backlog = []
+    sio.manager_initialized = True
+    sio.manager.initialize()
+
+
+async def release_peer_messages():
+    """Apply peer messages held since start_message_queue(), then stop holding."""
+    manager = sio.manager
+    while getattr(manager, 'peer_backlog', None):
+        backlog, manager.peer_backlog = manager.peer_backlog, []
+        for event, data in backlog:
+            await manager.dispatch_peer_message(event, data)
+    if is_shared():
+        manager.peer_backlog = None
+
+
+# Peer message carrying a batch of client emits for each worker to deliver locally
+EMIT_BATCH_EVENT = "emit_batch"
+
+# (event, data, rooms)
+ClientEmit = Tuple[str, Dict[str, Any], List[str]]
+
+
+def xp_award_emits(
+    guild_id: str,
+    discord_id: str,
+    xp_gained: int,
+    total_xp: int,
+    old_level: int,
+    new_level: int,
+    unlocked_tools: Optional[Iterable[str]] = None
+) -> List[ClientEmit]:
+    """
+    Build the events for one member's XP award and the rooms that care.
+
+    xp_gained and tool_unlocked go to the member's own room; level_up goes
+    to the member and to the guild.
+
+    Args:
+        guild_id: Guild the XP was earned in
+        discord_id: Member's Discord ID
+        xp_gained: XP added by the award
+        total_xp: Member's XP after the award
+        old_level: Level before the award
+        new_level: Level after the award
+        unlocked_tools: Names of tools the award unlocked
+
+    Returns:
+        Emits to pass to send_emits()
+    """
+    member_room = user_room(discord_id)
+    emits: List[ClientEmit] = [('xp_gained', {
+        "guild_id": guild_id,
+        "discord_id": discord_id,
+        "xp_gained": xp_gained,
+        "total_xp": total_xp,
+        "level": new_level
+    }, [member_room])]
+
+    if new_level > old_level:
+        emits.append(('level_up', {
+            "guild_id": guild_id,
+            "discord_id": discord_id,
+            "old_level": old_level,
+            "new_level": new_level
+        }, [member_room, guild_room(guild_id)]))
+
+    if unlocked_tools:
+        emits.extend(tools_unlocked_emits(guild_id, discord_id, unlocked_tools))
+    return emits
+
+
+def tools_unlocked_emits(guild_id: str, discord_id: str, tool_names: Iterable[str]) -> List[ClientEmit]:
+    """Build the tool_unlocked event for the member's own room."""
+    return [('tool_unlocked', {
+        "guild_id": guild_id,
+        "discord_id": discord_id,
+        "tools": list(tool_names)
+    }, [user_room(discord_id)])]
+
+
+async def emit_locally(emits: List[ClientEmit]):
+    """Deliver emits to the clients connected to this worker, skipping rooms it has no members in."""
+    for event, data, rooms in emits:
+        rooms = [room for room in rooms if has_local_listeners(room)]
+        if rooms:
+            await sio.emit(event, data, room=rooms, ignore_queue=True)
+
+
+async def send_emits(emits: List[ClientEmit]):
+    """
+    Deliver emits to every worker's clients.
+
+    With a shared queue the whole list goes out as one peer message, so a
+    batch award costs one publish instead of one per event; each worker then
+    delivers to its own members.
+    """
+    if not emits:
+        return
+    if is_shared():
+        try:
+            await sio.manager.emit(EMIT_BATCH_EVENT, emits, namespace=PEER_NAMESPACE)
+        except Exception as e:
+            print(f"[Realtime] Failed to publish {len(emits)} emits: {e}")
+    await emit_locally(emits)
+
+
+async def notify_xp_award(
+    guild_id: str,
+    discord_id: str,
+    xp_gained: int,
+    total_xp: int,
+    old_level: int,
+    new_level: int,
+    unlocked_tools: Optional[Iterable[str]] = None
+):
+    """Send the events for one member's XP award (see xp_award_emits)."""
+    await send_emits(xp_award_emits(guild_id, discord_id, xp_gained, total_xp, old_level, new_level, unlocked_tools))
+
+
+async def notify_tools_unlocked(guild_id: str, discord_id: str, tool_names: Iterable[str]):
+    """Send tool_unlocked to the member's own room."""
+    await send_emits(tools_unlocked_emits(guild_id, discord_id, tool_names))
+
+
+if hasattr(sio.manager, 'peer_handlers'):
+    sio.manager.peer_handlers[EMIT_BATCH_EVENT] = emit_locally
@@ -0,0 +1,58 @@
+"""
+Socket.IO auth tokens.
+HS256 JWTs signed with SOCKET_IO_SECRET naming a Discord user (sub) and the
+guilds whose rooms they may join, with an exp claim. Verification is a
+single HMAC, so it stays cheap during reconnect storms.
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+from jose import JWTError, jwt
+
+from config import settings
+
+
+ALGORITHM = "HS256"
+
+
+def create_socket_token(discord_id: str, guild_ids: List[str], ttl: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Issue a token for a Socket.IO connection.
+
+    Args:
+        discord_id: User the connection belongs to
+        guild_ids: Guilds whose rooms the connection joins
+        ttl: Seconds until expiry (default: SOCKET_TOKEN_TTL)
+
+    Returns:
+        token and expires_at (Unix seconds)
+    """
+    expires_at = int(time.time() + (ttl if ttl is not None else settings.socket_token_ttl))
+    claims = {"sub": discord_id, "guilds": list(guild_ids), "exp": expires_at}
+    return {"token": jwt.encode(claims, settings.socket_io_secret, algorithm=ALGORITHM), "expires_at": expires_at}
+
+
+def verify_socket_token(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Check a token's signature and expiry.
+
+    Args:
+        token: Token from create_socket_token
+
+    Returns:
+        Claims (sub, guilds, exp), or None if the token is malformed, forged or expired
+    """
+    if not isinstance(token, str):
+        return None
+    try:
+        claims = jwt.decode(
+            token,
+            settings.socket_io_secret,
+            algorithms=[ALGORITHM],
+            options={"require_exp": True, "require_sub": True}
+        )
+    except (JWTError, TypeError, ValueError):
+        return None
+    if not isinstance(claims.get("guilds"), list):
+        return None
+    return claims
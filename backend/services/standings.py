@@ -0,0 +1,74 @@
+"""
+Standings - single entry point for keeping in-memory leaderboard state
+in step with user XP and profile writes, on this worker and its peers.
+"""
+from typing import List, Tuple
+
+from config import settings
+from services.cluster import CoalescingPublisher, on_peer
+from services.leaderboard_cache import LeaderboardCache
+from services.leaderboard_stream import leaderboard_stream
+from services.rank_index import rank_indexes
+
+
+# Global leaderboard page cache
+leaderboard_cache = LeaderboardCache(
+    max_staleness=settings.leaderboard_cache_ttl,
+    max_pages=settings.leaderboard_cache_max_pages
+)
+
+# Standing changes for other workers, one message per batch of writes
+standings_publisher = CoalescingPublisher("standings")
+
+# Guilds whose cached pages other workers must drop
+invalidations_publisher = CoalescingPublisher("leaderboard_invalidate")
+
+
+def apply_standing(guild_id: str, discord_id: str, xp: int):
+    """
+    Record a guild member's current XP in this worker only.
+
+    Moves the member in the guild's rank index, drops cached leaderboard
+    pages the change could affect and flags the guild for the next
+    leaderboard_delta tick if its top N is being streamed.
+    """
+    rank_indexes.update(guild_id, discord_id, xp)
+    leaderboard_cache.on_member_change(guild_id, discord_id, xp)
+    leaderboard_stream.on_member_change(guild_id, discord_id, xp)
+
+
+def update_standing(guild_id: str, discord_id: str, xp: int):
+    """
+    Record a guild member's current XP after a write.
+
+    Applies the change here and queues it for the other workers. Call
+    after any write that changes a member's XP or anything shown on the
+    leaderboard.
+    """
+    apply_standing(guild_id, discord_id, xp)
+    standings_publisher.add((guild_id, discord_id), xp)
+
+
+def invalidate_leaderboard(guild_id: str):
+    """
+    Drop a guild's cached leaderboard pages here and on the other workers.
+
+    Call after writes that change what a page shows without changing XP,
+    such as tool unlocks or a level recalculation.
+    """
+    leaderboard_cache.invalidate_guild(guild_id)
+    invalidations_publisher.add(guild_id, None)
+
+
+@on_peer("standings")
+async def apply_peer_standings(batch: List[Tuple[Tuple[str, str], int]]):
+    """Apply standing changes published by another worker."""
+    for (guild_id, discord_id), xp in batch:
+        apply_standing(guild_id, discord_id, xp)
+
+
+@on_peer("leaderboard_invalidate")
+async def invalidate_peer_leaderboards(batch: List[Tuple[str, None]]):
+    """Drop guilds' cached pages after another worker changed what they show."""
+    for guild_id, _ in batch:
+        leaderboard_cache.invalidate_guild(guild_id)
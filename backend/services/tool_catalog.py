@@ -0,0 +1,178 @@
+"""
+Tool catalog - process-wide cache of validated tools.
+The tools table is small and rarely changes, so every worker keeps the
+whole table as Tool models indexed by id, tier and required level.
+A worker that writes a tool reloads at once and tells its peers to do the
+same; each worker also polls a cheap (count, max updated_at) watermark and
+reloads only when it moves, so workers converge even without a shared queue.
+"""
+import asyncio
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+from uuid import UUID
+
+from models.tool import Tool
+from services.cluster import on_peer, publish_to_peers
+from services.database import db
+
+
+ToolsWatermark = Tuple[int, Optional[datetime]]
+
+
+class ToolCatalog:
+    """
+    Validated tools with lookups by id, by tier and by required level.
+
+    Lists are built once per load and shared between callers; treat them
+    as read-only.
+    """
+
+    def __init__(self):
+        """Initialize an empty catalog."""
+        self.watermark: Optional[ToolsWatermark] = None
+        self.version = 0  # Bumped on every load
+        self._by_id: Dict[UUID, Tool] = {}
+        self._tools: List[Tool] = []
+        self._enabled: List[Tool] = []
+        self._enabled_levels: List[int] = []
+        self._by_tier: Dict[str, List[Tool]] = {}
+        self._enabled_by_tier: Dict[str, List[Tool]] = {}
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    def load(self, rows: Iterable[Mapping[str, Any]], watermark: Optional[ToolsWatermark] = None):
+        """
+        Replace the catalog with a full set of tool rows.
+
+        Args:
+            rows: Every row of the tools table, enabled or not
+            watermark: Table watermark the rows were read at
+        """
+        tools = sorted((Tool(**row) for row in rows), key=lambda tool: (tool.required_level, tool.name))
+        enabled = [tool for tool in tools if tool.enabled]
+
+        by_tier = defaultdict(list)
+        enabled_by_tier = defaultdict(list)
+        for tool in tools:
+            by_tier[tool.tier].append(tool)
+            if tool.enabled:
+                enabled_by_tier[tool.tier].append(tool)
+
+        self._by_id = {tool.id: tool for tool in tools}
+        self._tools = tools
+        self._enabled = enabled
+        self._enabled_levels = [tool.required_level for tool in enabled]
+        self._by_tier = dict(by_tier)
+        self._enabled_by_tier = dict(enabled_by_tier)
+        self.watermark = watermark
+        self.version += 1
+
+    def get(self, tool_id: UUID) -> Optional[Tool]:
+        """Get a tool by ID, enabled or not."""
+        return self._by_id.get(tool_id)
+
+    def list(self, tier: Optional[str] = None, enabled_only: bool = True) -> List[Tool]:
+        """
+        Tools ordered by required level.
+
+        Args:
+            tier: Only tools in this tier
+            enabled_only: Skip disabled tools
+        """
+        if tier is None:
+            return self._enabled if enabled_only else self._tools
+        by_tier = self._enabled_by_tier if enabled_only else self._by_tier
+        return by_tier.get(tier, [])
+
+    def unlocked_between(self, old_level: int, new_level: int) -> List[Tool]:
+        """
+        Enabled tools unlocked by moving from one level to a higher one.
+
+        Args:
+            old_level: Level before the award
+            new_level: Level after the award
+
+        Returns:
+            Tools with old_level < required_level <= new_level, lowest level first
+        """
+        if new_level <= old_level:
+            return []
+        start = bisect_right(self._enabled_levels, old_level)
+        end = bisect_right(self._enabled_levels, new_level)
+        return self._enabled[start:end]
+
+
+# Global tool catalog
+tool_catalog = ToolCatalog()
+
+
+async def refresh_tool_catalog(force: bool = False) -> bool:
+    """
+    Reload the catalog if the tools table changed since it was loaded.
+
+    Args:
+        force: Reload even if the watermark is unchanged
+
+    Returns:
+        True if the catalog was reloaded
+    """
+    watermark = await db.get_tools_watermark()
+    if not force and watermark == tool_catalog.watermark:
+        return False
+    # Rows read after the watermark can only be newer, so a change racing
+    # this reload is picked up again by the next check
+    tool_catalog.load(await db.list_tools(enabled_only=False), watermark)
+    return True
+
+
+async def reload_tool_catalog_everywhere():
+    """Reload the catalog after a tool write here and on every other worker."""
+    await refresh_tool_catalog(force=True)
+    await publish_to_peers("tools_changed", None)
+
+
+@on_peer("tools_changed")
+async def reload_peer_tool_catalog(_):
+    """Reload the catalog after another worker wrote a tool."""
+    await refresh_tool_catalog(force=True)
+
+
+async def keep_tool_catalog_fresh(interval: float):
+    """Check the tools watermark every `interval` seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await refresh_tool_catalog()
+        except Exception as e:
+            print(f"[Tools] Catalog refresh failed: {e}")
+
+
+async def grant_level_unlocks(awards: Iterable[Mapping[str, Any]]) -> Dict[UUID, List[str]]:
+    """
+    Grant the tools unlocked by a set of XP awards with one bulk insert.
+
+    Args:
+        awards: Award rows with user_id, old_level and new_level
+
+    Returns:
+        User ID -> names of tools newly unlocked (users with none are omitted)
+    """
+    user_ids = []
+    tool_ids = []
+    tool_names = {}
+    for award in awards:
+        for tool in tool_catalog.unlocked_between(award['old_level'], award['new_level']):
+            user_ids.append(award['user_id'])
+            tool_ids.append(tool.id)
+            tool_names[tool.id] = tool.name
+
+    if not user_ids:
+        return {}
+
+    unlocked = defaultdict(list)
+    for grant in await db.grant_tools_bulk(user_ids, tool_ids):
+        unlocked[grant['user_id']].append(tool_names[grant['tool_id']])
+    return dict(unlocked)
@@ -1,15 +1,94 @@
 /**
  * React Query hooks for leaderboard
  */
-import { useQuery } from '@tanstack/react-query';
-import { api } from '../lib/api';
+import { useEffect, useState } from 'react';
+import { useQuery, useQueryClient } from '@tanstack/react-query';
+import { api, LeaderboardEntry } from '../lib/api';
+import { socketService } from '../lib/socket';
+
+const GLOBAL_GUILD_ID = 'global';
+
+// [rank, discord_id, xp, level]
+type StreamEntry = [number, string, number, number];
+
+interface LeaderboardSnapshot {
+  guild_id: string;
+  seq: number;
+  size: number;
+}
+
+interface LeaderboardDelta {
+  guild_id: string;
+  seq: number;
+  changes: StreamEntry[];
+  removed: string[];
+}
 
 export const useLeaderboard = (limit: number = 10) => {
+  const queryClient = useQueryClient();
+  const queryKey = ['leaderboard', limit];
+  // Entries the server streams; rows past it only update by polling
+  const [streamSize, setStreamSize] = useState<number | null>(null);
+
+  useEffect(() => {
+    let seq = 0;
+
+    const subscribe = () => socketService.emit('subscribe_leaderboard', { guild_id: GLOBAL_GUILD_ID });
+
+    const onSnapshot = (data: LeaderboardSnapshot) => {
+      if (data.guild_id !== GLOBAL_GUILD_ID) return;
+      seq = data.seq;
+      setStreamSize(data.size);
+    };
+
+    // Patch rank/XP/level in place; refetch when someone enters or leaves the shown rows or a delta was missed
+    const onDelta = (delta: LeaderboardDelta) => {
+      if (delta.guild_id !== GLOBAL_GUILD_ID) return;
+      const missed = delta.seq !== seq + 1;
+      seq = delta.seq;
+
+      const current = queryClient.getQueryData<LeaderboardEntry[]>(queryKey);
+      const byId = new Map(current?.map((entry) => [entry.user.discord_id, entry]));
+      // Moves below the rows shown here do not concern this list
+      const changes = delta.changes.filter(([rank, id]) => byId.has(id) || rank <= limit);
+      if (!changes.length && !missed) return;
+      if (
+        missed ||
+        !current ||
+        delta.removed.some((id) => byId.has(id)) ||
+        changes.some(([, id]) => !byId.has(id))
+      ) {
+        queryClient.invalidateQueries({ queryKey });
+        return;
+      }
+
+      for (const [rank, id, xp, level] of changes) {
+        const entry = byId.get(id)!;
+        byId.set(id, { ...entry, rank, xp, level, user: { ...entry.user, xp, level } });
+      }
+      queryClient.setQueryData(queryKey, [...byId.values()].sort((a, b) => a.rank - b.rank));
+    };
+
+    socketService.on('connection_established', subscribe);
+    socketService.on('leaderboard_snapshot', onSnapshot);
+    socketService.on('leaderboard_delta', onDelta);
+    subscribe();
+
+    return () => {
+      socketService.emit('unsubscribe_leaderboard', { guild_id: GLOBAL_GUILD_ID });
+      socketService.off('connection_established', subscribe);
+      socketService.off('leaderboard_snapshot', onSnapshot);
+      socketService.off('leaderboard_delta', onDelta);
+    };
+  }, [limit]);
+
+  const streamed = streamSize !== null && limit <= streamSize;
+
   return useQuery({
-    queryKey: ['leaderboard', limit],
+    queryKey,
     queryFn: () => api.getLeaderboard(limit),
     staleTime: 1000 * 60, // 1 minute
-    refetchInterval: 1000 * 60, // Refetch every minute
+    // Safety net when leaderboard_delta covers every row; rows past the stream need the regular poll
+    refetchInterval: streamed ? 1000 * 60 * 5 : 1000 * 60,
   });
 };
-
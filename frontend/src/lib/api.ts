@@ -40,6 +40,7 @@ apiClient.interceptors.response.use(
 export interface User {
   id: string;
   discord_id: string;
+  guild_id: string;
   username: string;
   avatar_url?: string;
   xp: number;
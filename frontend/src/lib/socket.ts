@@ -14,6 +14,8 @@ class SocketService {
     this.socket = io(config.socketUrl, {
       transports: ['websocket', 'polling'],
       autoConnect: true,
+      // Token from POST /api/users/{discord_id}/socket-token; joins this user's and guilds' rooms
+      auth: (cb) => cb({ token: localStorage.getItem('socket_token') }),
     });
 
     this.socket.on('connect', () => {